@@ -1,18 +1,75 @@
-import io
+from __future__ import annotations
+
+import itertools
 import json
+import time
+from array import array
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
-import numpy as np
-import pandas as pd
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from dropout_common.lazy_imports import lazy_import
+from fastapi import (
+    APIRouter,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from pydantic import ValidationError
 
 from app import __version__, schemas
 from app.config import settings
-from app.utils.model_loader import make_prediction, model_source, model_version
-from app.utils.preprocessing import normalize_input_columns, prepare_model_input
+from app.utils.audit_log import get_audit_log
+from app.utils.calibration import DEFAULT_DECISION_THRESHOLD
+from app.utils.cohort_analytics import COHORT_DIMENSIONS, cohort_analytics
+from app.utils.columnar import (
+    COLUMNAR_EXTENSIONS,
+    COLUMNAR_MEDIA_TYPES,
+    ColumnarResultWriter,
+    details_to_record_batch,
+    iter_record_batches,
+    validate_columnar_frame,
+)
+from app.utils.dedup import dedup_stats
+from app.utils.feature_importance import (
+    MODEL_FEATURE_IMPORTANCE_PATH,
+    FeatureImportanceEntry,
+    feature_importance_cache,
+)
+from app.utils.model_loader import (
+    EXPLANATION_TOP_K,
+    decision_threshold,
+    drift_monitor,
+    drift_state_dir,
+    make_prediction,
+    model_source,
+    model_version,
+)
+from app.utils.prediction_store import get_prediction_writer, match_previous_scores
+from app.utils.preprocessing import (
+    MODEL_FEATURES,
+    prepare_model_input,
+    read_csv_columns,
+)
+from app.utils.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    annotate,
+    checkpoint,
+    get_profiler,
+)
+from app.utils.risk_rules import build_risk_details_dicts, get_rules_loader
+from app.utils.warmup import is_warm
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 api_router = APIRouter()
 FEATURE_IMPORTANCE_PATH = Path(__file__).resolve().parent / "feature_importance.json"
@@ -33,6 +90,11 @@ CSV_FEATURE_FIELDS = (
     "curricular_units_2nd_sem_approved",
     "curricular_units_2nd_sem_grade",
 )
+CSV_COLUMNS = CSV_STUDENT_INFO_FIELDS + CSV_ACADEMIC_CONTEXT_FIELDS + CSV_FEATURE_FIELDS
+# Los formatos columnares se validan por lote (sin pydantic por fila): solo se
+# exigen el identificador y las variables que usa el modelo.
+COLUMNAR_REQUIRED_FIELDS = ("student_id",) + CSV_FEATURE_FIELDS
+COLUMNAR_FIELDS = COLUMNAR_REQUIRED_FIELDS + ("name",) + CSV_ACADEMIC_CONTEXT_FIELDS
 
 
 # Ruta para verificar que la API se esté ejecutando correctamente
@@ -46,24 +108,29 @@ def health() -> dict:
         api_version=__version__,
         model_version=model_version,
         model_source=model_source,
+        ready=is_warm(),
     )
 
     return health.dict()
 
 
 @api_router.get("/feature-importance", status_code=200)
-def feature_importance() -> Any:
+def feature_importance(request: Request, source: str = "static") -> Any:
     """
-    Returns static feature importance scores used by clients.
+    Returns feature importance scores used by clients.
+    `source=model` returns the importances bundled with the currently loaded model.
+    Responses carry ETag/Last-Modified and conditional requests get 304 Not Modified.
     """
-    if not FEATURE_IMPORTANCE_PATH.exists():
+    if source not in ("static", "model"):
         raise HTTPException(
-            status_code=404,
-            detail="feature_importance.json not found",
+            status_code=400, detail="source must be 'static' or 'model'"
         )
+    path = (
+        FEATURE_IMPORTANCE_PATH if source == "static" else MODEL_FEATURE_IMPORTANCE_PATH
+    )
 
     try:
-        return json.loads(FEATURE_IMPORTANCE_PATH.read_text(encoding="utf-8"))
+        entry = feature_importance_cache.get(path)
     except json.JSONDecodeError as exc:
         logger.warning(f"feature_importance.json is invalid: {exc}")
         raise HTTPException(
@@ -71,40 +138,257 @@ def feature_importance() -> Any:
             detail="feature_importance.json is invalid",
         ) from exc
 
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="feature_importance.json not found",
+        )
+
+    headers = entry.headers()
+    headers["X-Model-Version"] = model_version
+    if _is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _is_not_modified(request: Request, entry: FeatureImportanceEntry) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags or f"W/{entry.etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return entry.mtime <= since.timestamp()
+    return False
+
+
+def warm_feature_importance_cache() -> None:
+    """Carga y serializa feature_importance.json al iniciar la aplicación."""
+    for path in (FEATURE_IMPORTANCE_PATH, MODEL_FEATURE_IMPORTANCE_PATH):
+        try:
+            feature_importance_cache.get(path)
+        except json.JSONDecodeError as exc:
+            logger.warning(f"{path} is invalid: {exc}")
+
+
+@api_router.get(
+    "/analytics/cohorts", response_model=schemas.CohortAnalytics, status_code=200
+)
+def cohort_analytics_summary(group_by: Optional[str] = None) -> Any:
+    """
+    Agregados de riesgo sobre las predicciones persistidas en el store
+    compartido (se reutilizan hasta COHORT_ANALYTICS_TTL segundos): histograma
+    y percentiles del risk_score, y conteos por nivel y categoría.
+    `group_by` puede ser batch_id, course o semester; sin él se retorna el global.
+    """
+    if group_by is not None and group_by not in COHORT_DIMENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of {list(COHORT_DIMENSIONS)}",
+        )
+    writer = get_prediction_writer()
+    if writer is None:
+        raise HTTPException(status_code=503, detail="Prediction store is disabled")
+
+    # Agregados del store compartido (iguales en todos los workers), con un TTL corto
+    cohort_analytics.refresh(
+        writer.backend, float(getattr(settings, "COHORT_ANALYTICS_TTL", 5.0))
+    )
+    return schemas.CohortAnalytics(
+        group_by=group_by,
+        groups=cohort_analytics.summarize(group_by),
+    )
+
+
+@api_router.get("/rules/stats", response_model=schemas.RiskRulesStatus, status_code=200)
+def risk_rules_stats() -> Any:
+    """
+    Reglas de riesgo compiladas vigentes con sus conteos de evaluación,
+    coincidencias y tiempo acumulado por regla.
+    """
+    loader = get_rules_loader()
+    rule_set = loader.get()
+    return schemas.RiskRulesStatus(
+        source=rule_set.source,
+        version=rule_set.version,
+        loaded_at=datetime.fromtimestamp(rule_set.loaded_at, timezone.utc).isoformat(
+            timespec="seconds"
+        ),
+        last_error=loader.last_error,
+        rules=rule_set.stats(),
+    )
+
+
+@api_router.get(
+    "/monitoring/drift", response_model=schemas.DriftReport, status_code=200
+)
+def monitoring_drift() -> Any:
+    """
+    Drift de las 16 variables del modelo y del risk_score respecto a la
+    referencia de entrenamiento (PSI y KS por intervalos), acumulado desde que
+    arrancó el servicio. Con DRIFT_STATE_DIR se suman los conteos de todos los
+    workers; sin él, solo los del worker que atiende la petición.
+    """
+    monitor = drift_monitor()
+    if monitor is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Drift monitoring requires drift_reference.json in the model",
+        )
+    state_dir = drift_state_dir()
+    if state_dir is not None:
+        monitor = monitor.combined(state_dir)
+    return monitor.report()
+
+
+@api_router.get("/monitoring/dedup", response_model=schemas.DedupStats, status_code=200)
+def monitoring_dedup() -> Any:
+    """
+    Filas recibidas por el modelo y filas distintas efectivamente puntuadas
+    desde que arrancó el proceso; `dedup_ratio` es filas por fila distinta.
+    """
+    return dedup_stats.as_dict()
+
+
+@api_router.get(
+    "/admin/profiling", response_model=schemas.ProfilingStatus, status_code=200
+)
+def profiling_status(
+    x_profile: Optional[str] = Header(None, alias=PROFILE_HEADER)
+) -> Any:
+    """Estado del perfilado bajo demanda (requiere `X-Profile: <PROFILING_TOKEN>`)."""
+    profiler = get_profiler()
+    if not profiler.authorized(x_profile):
+        raise HTTPException(
+            status_code=403, detail="Invalid or missing profiling token"
+        )
+    return profiler.status()
+
+
+@api_router.put(
+    "/admin/profiling", response_model=schemas.ProfilingStatus, status_code=200
+)
+def set_profiling_sample_rate(
+    sample_rate: float = Query(..., ge=0.0, le=1.0),
+    x_profile: Optional[str] = Header(None, alias=PROFILE_HEADER),
+) -> Any:
+    """
+    Ajusta en caliente la fracción de peticiones a `/predict/csv` que se perfilan
+    (0 la desactiva) en todos los workers, que la releen de `PROFILING_DIR` en
+    hasta un segundo. Requiere `X-Profile: <PROFILING_TOKEN>` y `PROFILING_DIR`.
+    """
+    profiler = get_profiler()
+    if not profiler.authorized(x_profile):
+        raise HTTPException(
+            status_code=403, detail="Invalid or missing profiling token"
+        )
+    if not profiler.enabled:
+        raise HTTPException(status_code=503, detail="Profiling requires PROFILING_DIR")
+    try:
+        profiler.set_sample_rate(sample_rate)
+    except OSError as exc:
+        raise HTTPException(
+            status_code=503, detail=f"Could not store sample rate: {exc}"
+        )
+    logger.info(f"Profiling sample rate set to {sample_rate}")
+    return profiler.status()
+
+
 # Ruta para realizar las predicciones
 @api_router.post("/predict", response_model=schemas.PredictionResults, status_code=200)
-async def predict(input_data: schemas.StudentFeaturesMultiple) -> Any:
+async def predict(
+    input_data: schemas.StudentFeaturesMultiple,
+    explain: bool = False,
+    top_k: int = Query(EXPLANATION_TOP_K, ge=1, le=len(MODEL_FEATURES)),
+) -> Any:
     """
-    Prediccion usando el modelo de dropout students
+    Prediccion usando el modelo de dropout students.
+    Con `explain=true` cada detalle incluye las `top_k` variables con mayor
+    contribución TreeSHAP (solo modelos XGBoost).
     """
-
+    started = time.perf_counter()
     input_df = pd.DataFrame(input_data.to_feature_rows())
-    input_df = prepare_model_input(input_df.replace({np.nan: None}))
+    try:
+        input_df = prepare_model_input(input_df.replace({np.nan: None}))
+    except ValueError as e:
+        logger.warning(f"Feature preprocessing error: {e}")
+        raise HTTPException(status_code=422, detail=str(e)) from e
     student_ids = [item.student_info.student_id.strip() for item in input_data.inputs]
 
-    logger.info(f"Making prediction on inputs: {input_data.inputs}")
-    results = make_prediction(input_data=input_df)
+    logger.info(f"Making prediction on {len(input_df)} inputs")
+    results = make_prediction(input_data=input_df, explain=explain, top_k=top_k)
 
     if results["errors"] is not None:
         logger.warning(f"Prediction validation error: {results.get('errors')}")
         raise HTTPException(status_code=400, detail=json.loads(results["errors"]))
 
-    logger.info(f"Prediction results: {results.get('predictions')}")
-
-    return schemas.PredictionResults.from_inference(
+    prediction_results = schemas.PredictionResults.from_inference(
         input_df,
         results,
         student_ids=student_ids,
         api_version=__version__,
     )
+    _persist_predictions(
+        input_df,
+        prediction_results.prediction,
+        pd.DataFrame(input_data.to_context_rows()),
+        prediction_results.version,
+        prediction_results.predictions,
+    )
+    _audit_request(
+        "/predict",
+        started,
+        prediction_results,
+        params={"explain": explain, "top_k": top_k},
+        body=lambda: input_data.model_dump(mode="json"),
+    )
+    return prediction_results
 
 
-@api_router.post("/predict/csv", response_model=schemas.PredictionResults, status_code=200)
-async def predict_csv(file: UploadFile = File(...)) -> Any:
+@api_router.post(
+    "/predict/csv", response_model=schemas.PredictionResults, status_code=200
+)
+async def predict_csv(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    explain: bool = False,
+    top_k: int = Query(EXPLANATION_TOP_K, ge=1, le=len(MODEL_FEATURES)),
+    delta: bool = False,
+) -> Any:
     """
     Batch prediction from a CSV file upload.
-    The CSV should have the same columns as required by the model (excluding Target if present).
+    The CSV should have the same columns as required by the model
+    (excluding Target if present).
+    Use `explain=true` to include the `top_k` TreeSHAP contributions per student.
+    Use `delta=true` to score only students whose features changed since their last
+    stored prediction for the current model version; the rest are reused from the
+    prediction store (reused rows carry no contributions).
+    Profiling: with `PROFILING_DIR` set, requests carrying `X-Profile: <token>`
+    (or sampled at `PROFILING_SAMPLE_RATE`) are profiled with cProfile; the
+    profile id is returned in the `X-Profile-Id` response header.
     """
+    profile = get_profiler().start(request.headers, "predict_csv")
+    if profile is None:
+        return await _predict_csv(file, explain, top_k, delta)
+    response.headers[PROFILE_ID_HEADER] = profile.profile_id
+    with profile:
+        return await _predict_csv(file, explain, top_k, delta)
+
+
+async def _predict_csv(file: UploadFile, explain: bool, top_k: int, delta: bool) -> Any:
+    started = time.perf_counter()
+    writer = get_prediction_writer() if delta else None
+    if delta and writer is None:
+        raise HTTPException(
+            status_code=503, detail="Delta mode requires the prediction store"
+        )
+
     if not file.filename or not file.filename.lower().endswith(".csv"):
         raise HTTPException(
             status_code=400,
@@ -113,20 +397,22 @@ async def predict_csv(file: UploadFile = File(...)) -> Any:
 
     try:
         contents = await file.read()
-        input_df = pd.read_csv(io.BytesIO(contents))
+        # Solo se leen (con tipos declarados) las columnas del request; el resto,
+        # incluida Target, se descarta durante el parseo.
+        input_df = read_csv_columns(contents, CSV_COLUMNS)
     except Exception as e:
         logger.warning(f"CSV parse error: {e}")
-        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {str(e)}") from e
+        raise HTTPException(
+            status_code=400, detail=f"Invalid CSV file: {str(e)}"
+        ) from e
+    annotate(batch_size=len(input_df), explain=explain, delta=delta)
+    checkpoint("read_csv")
 
     if input_df.empty:
         raise HTTPException(status_code=400, detail="CSV file is empty")
 
-    # Drop Target column if present (label column, not for prediction)
-    if "Target" in input_df.columns:
-        input_df = input_df.drop(columns=["Target"])
-
-    # 1) Normalizar columnas CSV
-    normalized_df = normalize_input_columns(input_df.replace({np.nan: None}))
+    # 1) Columnas CSV ya normalizadas durante la lectura
+    normalized_df = input_df.replace({np.nan: None})
 
     # 2) Mapear explícitamente CSV -> esquema anidado del request
     records = normalized_df.to_dict(orient="records")
@@ -135,7 +421,9 @@ async def predict_csv(file: UploadFile = File(...)) -> Any:
         nested_inputs.append(
             {
                 "student_info": {k: row.get(k) for k in CSV_STUDENT_INFO_FIELDS},
-                "academic_context": {k: row.get(k) for k in CSV_ACADEMIC_CONTEXT_FIELDS},
+                "academic_context": {
+                    k: row.get(k) for k in CSV_ACADEMIC_CONTEXT_FIELDS
+                },
                 "features": {k: row.get(k) for k in CSV_FEATURE_FIELDS},
             }
         )
@@ -145,24 +433,320 @@ async def predict_csv(file: UploadFile = File(...)) -> Any:
     except ValidationError as e:
         logger.warning(f"CSV schema validation error: {e}")
         raise HTTPException(status_code=422, detail=json.loads(e.json())) from e
+    checkpoint("validate")
 
     # 3) Construir input final del modelo usando solo features
     input_df = pd.DataFrame(validated_payload.to_feature_rows())
-    input_df = prepare_model_input(input_df)
-    student_ids = [item.student_info.student_id.strip() for item in validated_payload.inputs]
+    try:
+        input_df = prepare_model_input(input_df)
+    except ValueError as e:
+        logger.warning(f"Feature preprocessing error: {e}")
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    student_ids = [
+        item.student_info.student_id.strip() for item in validated_payload.inputs
+    ]
 
-    logger.info(f"Making batch prediction on {len(input_df)} rows from CSV")
-    results = make_prediction(input_data=input_df)
+    context_df = pd.DataFrame(validated_payload.to_context_rows())
+    checkpoint("preprocess")
+    if writer is not None:
+        reused, stored_scores = match_previous_scores(
+            writer.backend, input_df, student_ids, model_version
+        )
+        checkpoint("match_previous")
+    else:
+        reused = np.zeros(len(input_df), dtype=bool)
+    rescored = ~reused
+    annotate(rows_rescored=int(rescored.sum()))
+
+    logger.info(
+        f"Making batch prediction on {int(rescored.sum())} of {len(input_df)} rows "
+        "from CSV"
+    )
+    if rescored.all():
+        results = make_prediction(input_data=input_df, explain=explain, top_k=top_k)
+    elif rescored.any():
+        results = make_prediction(
+            input_data=input_df[rescored].reset_index(drop=True),
+            explain=explain,
+            top_k=top_k,
+        )
+    else:
+        results = {
+            "errors": None,
+            "version": model_version,
+            "predictions": [],
+            "decision_threshold": decision_threshold(),
+        }
 
     if results["errors"] is not None:
         logger.warning(f"Prediction validation error: {results.get('errors')}")
         raise HTTPException(status_code=400, detail=json.loads(results["errors"]))
 
-    logger.info(f"Batch prediction completed: {len(results.get('predictions', []))} predictions")
+    checkpoint("predict")
+    annotate(
+        rows_unique=results.get("rows_unique"), dedup_ratio=results.get("dedup_ratio")
+    )
+
+    if delta:
+        results = _merge_delta_results(results, reused, stored_scores)
+    logger.info(
+        f"Batch prediction completed: {len(results.get('predictions', []))} predictions"
+    )
 
-    return schemas.PredictionResults.from_inference(
+    prediction_results = schemas.PredictionResults.from_inference(
         input_df,
         results,
         student_ids=student_ids,
         api_version=__version__,
     )
+    details = prediction_results.prediction
+    predictions = prediction_results.predictions
+    checkpoint("build_response")
+    if not rescored.all():
+        # En modo delta solo se persisten las filas nuevas o modificadas
+        positions = np.flatnonzero(rescored)
+        input_df = input_df.iloc[positions].reset_index(drop=True)
+        context_df = context_df.iloc[positions].reset_index(drop=True)
+        details = [details[i] for i in positions]
+        predictions = [predictions[i] for i in positions]
+    _persist_predictions(
+        input_df, details, context_df, prediction_results.version, predictions
+    )
+    checkpoint("persist")
+    filename = file.filename
+    _audit_request(
+        "/predict/csv",
+        started,
+        prediction_results,
+        params={"explain": explain, "top_k": top_k, "delta": delta},
+        body=lambda: {
+            "filename": filename,
+            "csv": contents.decode("utf-8", errors="replace"),
+        },
+    )
+    return prediction_results
+
+
+def _merge_delta_results(
+    results: dict, reused: np.ndarray, stored_scores: np.ndarray
+) -> dict:
+    """Intercala las predicciones reutilizadas del store con las recién calculadas."""
+    predictions = stored_scores.copy()
+    predictions[~reused] = results["predictions"]
+    merged = dict(results)
+    merged["predictions"] = [float(x) for x in predictions.tolist()]
+    merged["rows_reused"] = int(reused.sum())
+    merged["rows_rescored"] = int((~reused).sum())
+    contributions = results.get("contributions")
+    if contributions:
+        fresh = iter(contributions)
+        merged["contributions"] = [None if r else next(fresh) for r in reused]
+    return merged
+
+
+@api_router.post(
+    "/predict/parquet", response_model=schemas.PredictionResults, status_code=200
+)
+async def predict_parquet(file: UploadFile = File(...), output: str = "json") -> Any:
+    """
+    Batch prediction from a Parquet file upload.
+    Use `output=parquet` to receive the scored results as Parquet instead of JSON.
+    """
+    return await _predict_columnar(file, "parquet", output)
+
+
+@api_router.post(
+    "/predict/arrow", response_model=schemas.PredictionResults, status_code=200
+)
+async def predict_arrow(file: UploadFile = File(...), output: str = "json") -> Any:
+    """
+    Batch prediction from an Arrow IPC (file or stream) upload.
+    Use `output=arrow` to receive the scored results as an Arrow IPC stream
+    instead of JSON.
+    """
+    return await _predict_columnar(file, "arrow", output)
+
+
+async def _predict_columnar(file: UploadFile, fmt: str, output: str) -> Any:
+    """
+    Puntúa un archivo columnar por record batches: cada lote pasa directo de
+    los buffers de Arrow a la matriz de variables, sin conversión por fila.
+    El archivo se lee por lotes desde el spool del upload y la respuesta se
+    envía en streaming a medida que se puntúa cada lote, así que la memoria
+    queda acotada por el tamaño del lote.
+
+    El primer lote se puntúa antes de responder para que los errores de
+    formato o de esquema devuelvan 400/422; un error en un lote posterior
+    corta la respuesta ya iniciada.
+    """
+    label = fmt.capitalize()
+    if not file.filename or not file.filename.lower().endswith(
+        COLUMNAR_EXTENSIONS[fmt]
+    ):
+        raise HTTPException(status_code=400, detail=f"File must be a {label} file")
+    if output not in ("json", fmt):
+        raise HTTPException(
+            status_code=400,
+            detail=f"output must be 'json' or '{fmt}'",
+        )
+
+    scored = _iter_scored_columnar(file.file, fmt)
+    first = next(scored, None)
+    if first is None:
+        raise HTTPException(status_code=400, detail=f"{label} file is empty")
+    batches = itertools.chain([first], scored)
+
+    if output == fmt:
+        return StreamingResponse(
+            _stream_columnar_results(batches, fmt),
+            media_type=COLUMNAR_MEDIA_TYPES[fmt],
+            headers={
+                "X-Model-Version": first[3].get("version", ""),
+                "X-API-Version": __version__,
+            },
+        )
+    return StreamingResponse(
+        _stream_json_results(batches, label), media_type="application/json"
+    )
+
+
+def _iter_scored_columnar(source: Any, fmt: str) -> Iterator[tuple]:
+    """(batch_df, input_df, student_ids, resultados) por record batch no vacío."""
+    label = fmt.capitalize()
+    batches = iter_record_batches(source, fmt, COLUMNAR_FIELDS)
+    while True:
+        try:
+            batch_df = next(batches, None)
+        except Exception as e:
+            logger.warning(f"{label} parse error: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {label} file: {str(e)}"
+            ) from e
+        if batch_df is None:
+            return
+        if batch_df.empty:
+            continue
+
+        try:
+            validate_columnar_frame(batch_df, COLUMNAR_REQUIRED_FIELDS)
+            input_df = prepare_model_input(batch_df[list(CSV_FEATURE_FIELDS)])
+        except ValueError as e:
+            logger.warning(f"{label} schema validation error: {e}")
+            raise HTTPException(status_code=422, detail=str(e)) from e
+        student_ids = batch_df["student_id"].astype(str).str.strip().tolist()
+
+        results = make_prediction(input_data=input_df)
+        if results["errors"] is not None:
+            logger.warning(f"Prediction validation error: {results.get('errors')}")
+            raise HTTPException(status_code=400, detail=json.loads(results["errors"]))
+        yield batch_df, input_df, student_ids, results
+
+
+def _stream_columnar_results(batches: Iterator[tuple], fmt: str) -> Iterator[bytes]:
+    writer = ColumnarResultWriter(fmt)
+    n_rows = 0
+    for batch_df, input_df, student_ids, results in batches:
+        details = build_risk_details_dicts(
+            input_df,
+            results["predictions"],
+            results.get("decision_threshold", DEFAULT_DECISION_THRESHOLD),
+        )
+        for detail, student_id in zip(details, student_ids):
+            detail["student_id"] = student_id
+        _persist_predictions(
+            input_df,
+            details,
+            batch_df,
+            results.get("version", ""),
+            results["predictions"],
+        )
+        n_rows += len(input_df)
+        yield writer.write(details_to_record_batch(details))
+    yield writer.close()
+    logger.info(
+        f"Batch prediction completed: {n_rows} predictions from {fmt.capitalize()}"
+    )
+
+
+def _stream_json_results(batches: Iterator[tuple], label: str) -> Iterator[bytes]:
+    """
+    PredictionResults serializado lote a lote: los detalles se envían al
+    puntuarse y al final van `predictions` (floats compactos), versión y metadatos.
+    """
+    predictions = array("d")
+    metadata = []
+    version = ""
+    separator = b""
+    yield b'{"errors":null,"prediction":['
+    for batch_df, input_df, student_ids, results in batches:
+        part = schemas.PredictionResults.from_inference(
+            input_df,
+            results,
+            student_ids=student_ids,
+            api_version=__version__,
+        )
+        _persist_predictions(
+            input_df, part.prediction, batch_df, part.version, part.predictions
+        )
+        predictions.extend(part.predictions)
+        metadata.append(part.metadata)
+        version = part.version
+        yield separator + b",".join(
+            d.model_dump_json().encode() for d in part.prediction
+        )
+        separator = b","
+    combined = schemas.PredictionMetadata.combine(metadata, len(predictions))
+    yield (
+        f'],"predictions":{json.dumps(predictions.tolist())},'
+        f'"version":{json.dumps(version)},'
+        f'"metadata":{combined.model_dump_json()}}}'
+    ).encode()
+    logger.info(
+        f"Batch prediction completed: {len(predictions)} predictions from {label}"
+    )
+
+
+def _persist_predictions(
+    input_df: pd.DataFrame,
+    details: Any,
+    context: pd.DataFrame,
+    version: str,
+    predictions: Any = None,
+) -> None:
+    """Encola el lote puntuado en el store de predicciones, si está configurado."""
+    writer = get_prediction_writer()
+    if writer is not None and len(details):
+        writer.submit(
+            input_df,
+            details,
+            context=context,
+            model_version=version,
+            predictions=predictions,
+        )
+
+
+def _audit_request(
+    path: str,
+    started: float,
+    prediction_results: schemas.PredictionResults,
+    params: dict,
+    body: Any,
+) -> None:
+    """
+    Encola la petición en el audit log, si está configurado. `body` es una
+    función: solo se evalúa (en el hilo escritor) si la petición se muestrea.
+    """
+    audit_log = get_audit_log()
+    if audit_log is not None:
+        audit_log.record(
+            f"POST {settings.API_V1_STR}{path}",
+            started=started,
+            rows=len(prediction_results.predictions),
+            model_version=prediction_results.version,
+            params=params,
+            body=body,
+            response=lambda: {
+                "version": prediction_results.version,
+                "predictions": prediction_results.predictions,
+            },
+        )
@@ -5,8 +5,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from loguru import logger
 
-from app.api import api_router
+from app.api import api_router, warm_feature_importance_cache
 from app.config import settings, setup_app_logging
+from app.utils.audit_log import close_audit_log
+from app.utils.prediction_store import close_prediction_writer
+from app.utils.warmup import start_warm_up
 
 # setup logging as early as possible
 setup_app_logging(config=settings)
@@ -18,6 +21,24 @@ app = FastAPI(
 
 root_router = APIRouter()
 
+
+@app.on_event("startup")
+def load_static_responses() -> None:
+    """
+    Pre-serializa respuestas estáticas antes de recibir tráfico; el resto
+    (pandas, modelo, reglas, store) se calienta en segundo plano.
+    """
+    warm_feature_importance_cache()
+    start_warm_up()
+
+
+@app.on_event("shutdown")
+def flush_prediction_store() -> None:
+    """Escribe las predicciones y registros de auditoría pendientes antes de salir."""
+    close_prediction_writer()
+    close_audit_log()
+
+
 # Cuerpo de la respuesta en la raíz
 @root_router.get("/")
 def index(request: Request) -> Any:
@@ -55,5 +76,5 @@ if __name__ == "__main__":
     logger.warning("Running in development mode. Do not run like this in production.")
     import uvicorn
 
-    # ejecución del servidor - host para ejecutar en servidor 
+    # ejecución del servidor - host para ejecutar en servidor
     uvicorn.run(app, host="0.0.0.0", port=8001, log_level="debug")
@@ -1,14 +1,14 @@
+from .analytics import CohortAnalytics, CohortSummary, RiskHistogram
 from .health import Health
+from .monitoring import DedupStats, DriftReport, FeatureDrift
 from .predict import (
+    FeatureContribution,
     MultipleDataInputs,
     PredictionDetail,
     PredictionMetadata,
     PredictionResults,
     StudentFeaturesMultiple,
 )
-from .request import (
-    AcademicContext,
-    PredictionRequest,
-    StudentFeatures,
-    StudentInfo,
-)
+from .profiling import ProfilingStatus
+from .request import AcademicContext, PredictionRequest, StudentFeatures, StudentInfo
+from .rules import RiskRulesStatus, RuleStats
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RiskHistogram(BaseModel):
+    bin_edges: List[float]
+    counts: List[int]
+
+
+class CohortSummary(BaseModel):
+    """Agregados de riesgo de una cohorte (un valor de batch_id, course o semester)."""
+
+    group: Any = None
+    count: int
+    mean_risk_score: Optional[float] = None
+    percentiles: Dict[str, Optional[float]]
+    histogram: RiskHistogram
+    risk_levels: Dict[str, int]
+    categories: Dict[str, int]
+
+
+class CohortAnalytics(BaseModel):
+    group_by: Optional[str] = None
+    groups: List[CohortSummary]
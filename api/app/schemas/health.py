@@ -6,3 +6,5 @@ class Health(BaseModel):
     api_version: str
     model_version: str
     model_source: str
+    # False mientras el calentamiento (dependencias, modelo, reglas) sigue en curso
+    ready: bool = True
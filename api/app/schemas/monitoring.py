@@ -0,0 +1,32 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class FeatureDrift(BaseModel):
+    """Drift de una variable: PSI/KS contra la referencia y conteos por intervalo."""
+
+    feature: str
+    psi: Optional[float] = None
+    ks: Optional[float] = None
+    status: str
+    n_observed: int
+    missing_rate: Optional[float] = None
+    counts: List[int]
+
+
+class DedupStats(BaseModel):
+    """Filas puntuadas y filas distintas desde que arrancó el proceso."""
+
+    batches: int
+    rows: int
+    unique_rows: int
+    dedup_ratio: Optional[float] = None
+
+
+class DriftReport(BaseModel):
+    reference_version: str
+    since: str
+    rows_observed: int
+    features: List[FeatureDrift]
+    risk_score: FeatureDrift
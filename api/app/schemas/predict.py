@@ -2,9 +2,17 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
+
 from .request import PredictionRequest
 
 
+class FeatureContribution(BaseModel):
+    """Contribución TreeSHAP de una variable al score (escala log-odds)."""
+
+    feature: str
+    contribution: float
+
+
 class PredictionDetail(BaseModel):
     """Detalle de riesgo aplicado según reglas de negocio."""
 
@@ -16,12 +24,41 @@ class PredictionDetail(BaseModel):
     class_probabilities: Optional[Dict[str, float]] = None
     recommendation: str
     intervention_steps: str
+    # Todas las categorías cuyas reglas se cumplen, en orden de prioridad
+    matched_categories: Optional[List[str]] = None
+    top_features: Optional[List[FeatureContribution]] = None
 
 
 class PredictionMetadata(BaseModel):
     model_version: str
     api_version: str
     timestamp: str
+    # Umbral de risk_score (calibrado) usado para decidir el outcome
+    decision_threshold: Optional[float] = None
+    # Solo en modo delta: filas reutilizadas del store / filas puntuadas de nuevo
+    rows_reused: Optional[int] = None
+    rows_rescored: Optional[int] = None
+    # Filas distintas puntuadas por el modelo y filas por fila distinta
+    # (1.0 = sin duplicados)
+    rows_unique: Optional[int] = None
+    dedup_ratio: Optional[float] = None
+
+    @classmethod
+    def combine(
+        cls, parts: List["PredictionMetadata"], n_rows: int
+    ) -> Optional["PredictionMetadata"]:
+        """Metadatos de varios lotes de un archivo (la deduplicación es por lote)."""
+        if not parts:
+            return None
+        unique = [part.rows_unique for part in parts]
+        if None in unique:
+            return parts[0]
+        return parts[0].model_copy(
+            update={
+                "rows_unique": sum(unique),
+                "dedup_ratio": round(n_rows / sum(unique), 4) if sum(unique) else None,
+            }
+        )
 
 
 # Esquema de los resultados de predicción (respuesta batch/legacy)
@@ -47,15 +84,27 @@ class PredictionResults(BaseModel):
         from app.utils.risk_rules import build_risk_details_dicts
 
         predictions = raw_results.get("predictions") or []
-        risk_dicts = build_risk_details_dicts(input_df, predictions)
+        threshold = raw_results.get("decision_threshold")
+        if threshold is None:
+            risk_dicts = build_risk_details_dicts(input_df, predictions)
+        else:
+            risk_dicts = build_risk_details_dicts(input_df, predictions, threshold)
         if student_ids:
             for i, detail in enumerate(risk_dicts):
                 detail["student_id"] = student_ids[i] if i < len(student_ids) else None
+        contributions = raw_results.get("contributions")
+        if contributions:
+            for detail, top_features in zip(risk_dicts, contributions):
+                detail["top_features"] = top_features
         risk_details = [PredictionDetail(**d) for d in risk_dicts]
         model_version = raw_results.get("version", "")
-        timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds").replace(
-            "+00:00",
-            "Z",
+        timestamp = (
+            datetime.now(timezone.utc)
+            .isoformat(timespec="seconds")
+            .replace(
+                "+00:00",
+                "Z",
+            )
         )
 
         return cls(
@@ -67,6 +116,11 @@ class PredictionResults(BaseModel):
                 model_version=model_version,
                 api_version=api_version,
                 timestamp=timestamp,
+                decision_threshold=threshold,
+                rows_reused=raw_results.get("rows_reused"),
+                rows_rescored=raw_results.get("rows_rescored"),
+                rows_unique=raw_results.get("rows_unique"),
+                dedup_ratio=raw_results.get("dedup_ratio"),
             ),
         )
 
@@ -83,12 +137,12 @@ class StudentFeaturesMultiple(BaseModel):
                     {
                         "student_info": {
                             "student_id": "ST-2024-001",
-                            "name": "John Doe"
+                            "name": "John Doe",
                         },
                         "academic_context": {
                             "semester": 4,
                             "batch_id": "2026-01-MAIA",
-                            "course": "Computer Science"
+                            "course": "Computer Science",
                         },
                         "features": {
                             "age_at_enrollment": 19,
@@ -103,7 +157,7 @@ class StudentFeaturesMultiple(BaseModel):
                             "curricular_units_2nd_sem_enrolled": 6,
                             "curricular_units_2nd_sem_approved": 6,
                             "curricular_units_2nd_sem_grade": 15.0,
-                        }
+                        },
                     }
                 ]
             }
@@ -119,7 +173,19 @@ class StudentFeaturesMultiple(BaseModel):
                 rows.append(item.features.dict())
         return rows
 
+    def to_context_rows(self) -> List[Dict[str, Any]]:
+        """Nombre y contexto académico por input, para persistir con la predicción."""
+        return [
+            {
+                "name": item.student_info.name,
+                "semester": item.academic_context.semester,
+                "batch_id": item.academic_context.batch_id,
+                "course": item.academic_context.course,
+            }
+            for item in self.inputs
+        ]
+
 
 # Compatibilidad con contrato anterior (si otros módulos lo importan)
 class MultipleDataInputs(BaseModel):
-    inputs: List[Dict[str, Any]]
\ No newline at end of file
+    inputs: List[Dict[str, Any]]
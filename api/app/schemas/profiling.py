@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ProfilingStatus(BaseModel):
+    """Configuración vigente del perfilado bajo demanda y perfiles escritos."""
+
+    enabled: bool
+    directory: Optional[str] = None
+    sample_rate: float
+    profiles_written: int
+    skipped_busy: int
+    last_profile: Optional[str] = None
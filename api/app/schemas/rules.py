@@ -0,0 +1,25 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RuleStats(BaseModel):
+    """Evaluaciones acumuladas de una regla desde que se compiló el archivo."""
+
+    id: str
+    priority: int
+    categoria: str
+    when: str
+    batches: int
+    rows_evaluated: int
+    matches: int
+    total_ms: float
+    mean_us_per_row: Optional[float] = None
+
+
+class RiskRulesStatus(BaseModel):
+    source: str
+    version: str
+    loaded_at: str
+    last_error: Optional[str] = None
+    rules: List[RuleStats]
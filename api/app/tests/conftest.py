@@ -6,7 +6,6 @@ import pytest
 from fastapi.testclient import TestClient
 from pydantic import BaseModel
 
-
 # Mock del paquete `model` para evitar cargar el wheel real en tests unitarios.
 mock_model = types.ModuleType("model")
 mock_model.__version__ = "test-model-version"
@@ -44,6 +43,12 @@ class _Settings:
     PROJECT_NAME = "Dropout Students API"
     API_V1_STR = "/api/v1"
     BACKEND_CORS_ORIGINS = []
+    PREDICTION_STORE_URL = ""
+    RISK_RULES_PATH = ""
+    PROFILING_DIR = ""
+    PROFILING_SAMPLE_RATE = 0.0
+    PROFILING_TOKEN = ""
+    AUDIT_LOG_PATH = ""
 
 
 def _setup_app_logging(*_args, **_kwargs):
@@ -54,7 +59,8 @@ mock_app_config.settings = _Settings()
 mock_app_config.setup_app_logging = _setup_app_logging
 sys.modules["app.config"] = mock_app_config
 
-from app.main import app
+from app.main import app  # noqa: E402
+
 
 # Cliente de prueba
 @pytest.fixture()
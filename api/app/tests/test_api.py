@@ -1,47 +1,49 @@
+import io
 import json
 
 import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
 
 def _valid_predict_payload() -> dict:
     return {
-       "inputs": [
-                    {
-                        "student_info": {
-                            "student_id": "ST-2024-001",
-                            "name": "John Doe"
-                        },
-                        "academic_context": {
-                            "semester": 4,
-                            "batch_id": "2026-01-MAIA",
-                            "course": "Computer Science"
-                        },
-                        "features": {
-                            "age_at_enrollment": 19,
-                            "gender": 1,
-                            "displaced": 0,
-                            "debtor": 0,
-                            "tuition_fees_up_to_date": 1,
-                            "scholarship_holder": 1,
-                            "curricular_units_1st_sem_enrolled": 6,
-                            "curricular_units_1st_sem_approved": 6,
-                            "curricular_units_1st_sem_grade": 14.5,
-                            "curricular_units_2nd_sem_enrolled": 6,
-                            "curricular_units_2nd_sem_approved": 6,
-                            "curricular_units_2nd_sem_grade": 15.0,
-                        }
-                    }
-                ]
+        "inputs": [
+            {
+                "student_info": {"student_id": "ST-2024-001", "name": "John Doe"},
+                "academic_context": {
+                    "semester": 4,
+                    "batch_id": "2026-01-MAIA",
+                    "course": "Computer Science",
+                },
+                "features": {
+                    "age_at_enrollment": 19,
+                    "gender": 1,
+                    "displaced": 0,
+                    "debtor": 0,
+                    "tuition_fees_up_to_date": 1,
+                    "scholarship_holder": 1,
+                    "curricular_units_1st_sem_enrolled": 6,
+                    "curricular_units_1st_sem_approved": 6,
+                    "curricular_units_1st_sem_grade": 14.5,
+                    "curricular_units_2nd_sem_enrolled": 6,
+                    "curricular_units_2nd_sem_approved": 6,
+                    "curricular_units_2nd_sem_grade": 15.0,
+                },
+            }
+        ]
     }
 
 
 def _valid_csv_content() -> str:
     return (
-        "name, student_id, semester, batch_id, course, age_at_enrollment,gender,displaced,debtor,tuition_fees_up_to_date,scholarship_holder,"
-        "curricular_units_1st_sem_enrolled,curricular_units_1st_sem_approved,curricular_units_1st_sem_grade,"
-        "curricular_units_2nd_sem_enrolled,curricular_units_2nd_sem_approved,curricular_units_2nd_sem_grade\n"
-        "John Doe, ST-2024-001, 4, 2026-01-MAIA, Computer Science, 19, 1, 0, 0, 1, 1, 6, 6, 14.5, 6, 6, 15.0\n"
+        "name, student_id, semester, batch_id, course, age_at_enrollment,gender,"
+        "displaced,debtor,tuition_fees_up_to_date,scholarship_holder,"
+        "curricular_units_1st_sem_enrolled,curricular_units_1st_sem_approved,"
+        "curricular_units_1st_sem_grade,curricular_units_2nd_sem_enrolled,"
+        "curricular_units_2nd_sem_approved,curricular_units_2nd_sem_grade\n"
+        "John Doe, ST-2024-001, 4, 2026-01-MAIA, Computer Science, "
+        "19, 1, 0, 0, 1, 1, 6, 6, 14.5, 6, 6, 15.0\n"
     )
 
 
@@ -82,7 +84,7 @@ def test_feature_importance_returns_404_when_file_missing(
 def test_predict_success_returns_prediction_results(
     client: TestClient, monkeypatch
 ) -> None:
-    def fake_make_prediction(input_data: pd.DataFrame) -> dict:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
         assert isinstance(input_data, pd.DataFrame)
         return {"errors": None, "version": "test-version", "predictions": [0.2]}
 
@@ -115,6 +117,92 @@ def test_predict_success_returns_prediction_results(
     assert "pasos_intervencion" not in detail
 
 
+def test_predict_uses_calibrated_decision_threshold(
+    client: TestClient, monkeypatch
+) -> None:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        return {
+            "errors": None,
+            "version": "test-version",
+            "predictions": [0.42],
+            "decision_threshold": 0.38,
+        }
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+
+    response = client.post("/api/v1/predict", json=_valid_predict_payload())
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["metadata"]["decision_threshold"] == 0.38
+    assert body["prediction"][0]["outcome"] == "Dropout"
+
+
+def test_rules_stats_reports_per_rule_evaluations(
+    client: TestClient, monkeypatch
+) -> None:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        return {"errors": None, "version": "test-version", "predictions": [0.2]}
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    before = {r["id"]: r for r in client.get("/api/v1/rules/stats").json()["rules"]}
+
+    response = client.post("/api/v1/predict", json=_valid_predict_payload())
+    assert response.status_code == 200, response.text
+
+    body = client.get("/api/v1/rules/stats").json()
+    assert body["source"].endswith("risk_rules.json")
+    rules = {r["id"]: r for r in body["rules"]}
+    assert list(rules) == [
+        "financiero",
+        "academico",
+        "rendimiento",
+        "socioeconomico",
+        "bajo_riesgo",
+    ]
+    assert (
+        rules["bajo_riesgo"]["rows_evaluated"]
+        == before["bajo_riesgo"]["rows_evaluated"] + 1
+    )
+    assert rules["bajo_riesgo"]["matches"] == before["bajo_riesgo"]["matches"] + 1
+
+
+def test_monitoring_drift_reports_batches_scored_since_startup(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.config import settings
+    from app.utils.drift import DriftMonitor, drift_state_path
+
+    assert client.get("/api/v1/monitoring/drift").status_code == 503
+
+    monitor = DriftMonitor(
+        {
+            "version": "ref",
+            "features": {"debtor": {"edges": [0.5], "counts": [1, 1, 0]}},
+            "risk_score": {"edges": [0.5], "counts": [1, 1, 0]},
+        }
+    )
+    monitor.update(pd.DataFrame({"debtor": [0, 1]}), [0.2, 0.8])
+    monkeypatch.setattr("app.api.drift_monitor", lambda: monitor)
+
+    body = client.get("/api/v1/monitoring/drift").json()
+    assert body["reference_version"] == "ref"
+    assert body["rows_observed"] == 2
+    assert body["features"][0]["feature"] == "debtor"
+    assert body["features"][0]["psi"] == 0.0
+    assert body["risk_score"]["status"] == "stable"
+
+    # Con DRIFT_STATE_DIR se suman los conteos guardados por los demás workers
+    other = DriftMonitor(monitor._spec)
+    other.update(pd.DataFrame({"debtor": [1]}), [0.9])
+    other.save(tmp_path)
+    drift_state_path(tmp_path).rename(drift_state_path(tmp_path, pid=1))
+    monkeypatch.setattr(settings, "DRIFT_STATE_DIR", str(tmp_path), raising=False)
+
+    body = client.get("/api/v1/monitoring/drift").json()
+    assert body["rows_observed"] == 3
+    assert body["features"][0]["counts"] == [1, 2, 0]
+
+
 def test_predict_returns_422_for_invalid_payload(client: TestClient) -> None:
     invalid_payload = {"inputs": [{"age_at_enrollment": 19}]}
 
@@ -123,13 +211,29 @@ def test_predict_returns_422_for_invalid_payload(client: TestClient) -> None:
     assert response.status_code == 422
 
 
+@pytest.mark.parametrize("top_k", [0, 17])
+def test_predict_returns_422_for_top_k_out_of_range(
+    client: TestClient, top_k: int
+) -> None:
+    response = client.post(
+        f"/api/v1/predict?explain=true&top_k={top_k}", json=_valid_predict_payload()
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        f"/api/v1/predict/csv?explain=true&top_k={top_k}",
+        files={"file": ("students.csv", _valid_csv_content(), "text/csv")},
+    )
+    assert response.status_code == 422
+
+
 def test_predict_returns_400_when_model_validation_fails(
     client: TestClient, monkeypatch
 ) -> None:
     def fake_prepare_model_input(_: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame([{"debtor": 1}])
 
-    def fake_make_prediction(input_data: pd.DataFrame) -> dict:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
         assert isinstance(input_data, pd.DataFrame)
         return {
             "errors": json.dumps({"features": ["invalid format"]}),
@@ -149,7 +253,7 @@ def test_predict_returns_400_when_model_validation_fails(
 def test_predict_csv_success_returns_prediction_results(
     client: TestClient, monkeypatch
 ) -> None:
-    def fake_make_prediction(input_data: pd.DataFrame) -> dict:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
         assert isinstance(input_data, pd.DataFrame)
         return {"errors": None, "version": "csv-test-version", "predictions": [0.2]}
 
@@ -184,6 +288,101 @@ def test_predict_csv_success_returns_prediction_results(
     assert "pasos_intervencion" not in detail
 
 
+def test_predict_csv_profiles_request_with_profile_header(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.utils.profiling import Profiler
+
+    profiler = Profiler(tmp_path, token="secret")
+    monkeypatch.setattr("app.api.get_profiler", lambda: profiler)
+    monkeypatch.setattr(
+        "app.api.make_prediction",
+        lambda input_data, **_kwargs: {
+            "errors": None,
+            "version": "v",
+            "predictions": [0.2],
+        },
+    )
+    files = {"file": ("students.csv", _valid_csv_content(), "text/csv")}
+
+    response = client.post("/api/v1/predict/csv", files=files)
+    assert response.status_code == 200, response.text
+    assert "x-profile-id" not in response.headers
+
+    response = client.post(
+        "/api/v1/predict/csv", files=files, headers={"X-Profile": "secret"}
+    )
+    assert response.status_code == 200, response.text
+    profile_id = response.headers["x-profile-id"]
+    metadata = json.loads((tmp_path / f"{profile_id}.json").read_text(encoding="utf-8"))
+    assert metadata["endpoint"] == "predict_csv"
+    assert metadata["batch_size"] == 1
+    assert list(metadata["stages_ms"]) == [
+        "read_csv",
+        "validate",
+        "preprocess",
+        "predict",
+        "build_response",
+        "persist",
+    ]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+
+
+def test_predict_csv_records_sampled_request_in_audit_log(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.utils.audit_log import AuditLog, RotatingNDJSONFile
+
+    audit_log = AuditLog(
+        RotatingNDJSONFile(tmp_path / "requests.jsonl", 0, 0), sample_rate=1.0
+    )
+    monkeypatch.setattr("app.api.get_audit_log", lambda: audit_log)
+    monkeypatch.setattr(
+        "app.api.make_prediction",
+        lambda input_data, **_kwargs: {
+            "errors": None,
+            "version": "v",
+            "predictions": [0.2],
+        },
+    )
+
+    response = client.post(
+        "/api/v1/predict/csv",
+        files={"file": ("students.csv", _valid_csv_content(), "text/csv")},
+    )
+    assert response.status_code == 200, response.text
+    audit_log.close()
+
+    (line,) = (tmp_path / "requests.jsonl").read_text(encoding="utf-8").splitlines()
+    entry = json.loads(line)
+    assert entry["title"] == "POST /api/v1/predict/csv"
+    assert entry["body"] == {"filename": "students.csv", "csv": _valid_csv_content()}
+    assert entry["params"] == {"explain": False, "top_k": 3, "delta": False}
+    assert entry["response"] == {"version": "v", "predictions": [0.2]}
+    assert entry["rows"] == 1
+
+
+def test_admin_profiling_toggle_requires_token(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.utils.profiling import Profiler
+
+    profiler = Profiler(tmp_path, token="secret")
+    monkeypatch.setattr("app.api.get_profiler", lambda: profiler)
+
+    response = client.put("/api/v1/admin/profiling", params={"sample_rate": 0.1})
+    assert response.status_code == 403
+
+    response = client.put(
+        "/api/v1/admin/profiling",
+        params={"sample_rate": 0.1},
+        headers={"X-Profile": "secret"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["sample_rate"] == 0.1
+    assert profiler.sample_rate == 0.1
+
+
 def test_predict_csv_rejects_non_csv_extension(client: TestClient) -> None:
     response = client.post(
         "/api/v1/predict/csv",
@@ -196,9 +395,11 @@ def test_predict_csv_rejects_non_csv_extension(client: TestClient) -> None:
 
 def test_predict_csv_returns_400_for_empty_csv(client: TestClient) -> None:
     header_only = (
-        "age_at_enrollment,gender,displaced,debtor,tuition_fees_up_to_date,scholarship_holder,"
-        "curricular_units_1st_sem_enrolled,curricular_units_1st_sem_approved,curricular_units_1st_sem_grade,"
-        "curricular_units_2nd_sem_enrolled,curricular_units_2nd_sem_approved,curricular_units_2nd_sem_grade\n"
+        "age_at_enrollment,gender,displaced,debtor,tuition_fees_up_to_date,"
+        "scholarship_holder,curricular_units_1st_sem_enrolled,"
+        "curricular_units_1st_sem_approved,curricular_units_1st_sem_grade,"
+        "curricular_units_2nd_sem_enrolled,curricular_units_2nd_sem_approved,"
+        "curricular_units_2nd_sem_grade\n"
     )
     response = client.post(
         "/api/v1/predict/csv",
@@ -217,3 +418,376 @@ def test_predict_csv_returns_422_for_invalid_schema(client: TestClient) -> None:
     )
 
     assert response.status_code == 422
+
+
+def test_predict_returns_422_for_out_of_range_feature(client: TestClient) -> None:
+    payload = _valid_predict_payload()
+    payload["inputs"][0]["features"]["curricular_units_1st_sem_enrolled"] = 500
+
+    response = client.post("/api/v1/predict", json=payload)
+
+    assert response.status_code == 422
+    assert "curricular_units_1st_sem_enrolled" in response.json()["detail"]
+
+
+def test_predict_csv_ignores_extra_columns_and_target(
+    client: TestClient, monkeypatch
+) -> None:
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        assert len(input_data) == 2
+        return {
+            "errors": None,
+            "version": "csv-test-version",
+            "predictions": [0.2, 0.9],
+        }
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    csv_content = (
+        "student_id,name,semester,batch_id,Course,GDP,Mother's occupation,"
+        "Age at enrollment,Gender,Displaced,Debtor,Tuition fees up to date,"
+        "Scholarship holder,"
+        "Curricular units 1st sem (enrolled),Curricular units 1st sem (approved),"
+        "Curricular units 1st sem (grade),Curricular units 2nd sem (enrolled),"
+        "Curricular units 2nd sem (approved),Curricular units 2nd sem (grade),Target\n"
+        "ST-1,Ana,2,2026-01-MAIA,9500,1.74,5,19,1,0,0,1,1,6,6,14.5,6,6,15.0,Graduate\n"
+        "ST-2,Luis,2,2026-01-MAIA,9500,1.74,5,22,0,0,1,0,0,6,1,10.0,6,0,0.0,Dropout\n"
+    )
+
+    response = client.post(
+        "/api/v1/predict/csv",
+        files={"file": ("students.csv", csv_content, "text/csv")},
+    )
+
+    assert response.status_code == 200, response.text
+    details = response.json()["prediction"]
+    assert [d["student_id"] for d in details] == ["ST-1", "ST-2"]
+    assert details[1]["categoria"] == "Financiero"
+
+
+def _valid_feature_table():
+    import pyarrow as pa
+
+    features = _valid_predict_payload()["inputs"][0]["features"]
+    columns = {"student_id": ["ST-1", "ST-2"]}
+    columns.update({name: [value, value] for name, value in features.items()})
+    columns["debtor"] = [0, 1]
+    return pa.table(columns)
+
+
+def test_predict_parquet_returns_prediction_results(
+    client: TestClient, monkeypatch
+) -> None:
+    import pyarrow.parquet as pq
+
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        return {"errors": None, "version": "pq-version", "predictions": [0.2, 0.7]}
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    sink = io.BytesIO()
+    pq.write_table(_valid_feature_table(), sink)
+
+    response = client.post(
+        "/api/v1/predict/parquet",
+        files={
+            "file": ("students.parquet", sink.getvalue(), "application/octet-stream")
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["predictions"] == [0.2, 0.7]
+    assert [d["student_id"] for d in body["prediction"]] == ["ST-1", "ST-2"]
+    assert body["prediction"][1]["categoria"] == "Financiero"
+
+
+def test_predict_arrow_can_return_arrow_stream(client: TestClient, monkeypatch) -> None:
+    import pyarrow as pa
+
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        return {"errors": None, "version": "arrow-version", "predictions": [0.2, 0.7]}
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    table = _valid_feature_table()
+    sink = io.BytesIO()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    response = client.post(
+        "/api/v1/predict/arrow?output=arrow",
+        files={"file": ("students.arrow", sink.getvalue(), "application/octet-stream")},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["x-model-version"] == "arrow-version"
+    result = pa.ipc.open_stream(response.content).read_all().to_pydict()
+    assert result["student_id"] == ["ST-1", "ST-2"]
+    assert result["outcome"] == ["Graduate", "Dropout"]
+
+
+def test_predict_arrow_streams_each_record_batch(
+    client: TestClient, monkeypatch
+) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    batch_sizes = []
+
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        batch_sizes.append(len(input_data))
+        return {
+            "errors": None,
+            "version": "stream-version",
+            "predictions": [0.2] * len(input_data),
+            "rows_unique": 1,
+        }
+
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    table = _valid_feature_table()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+        writer.write_table(table.slice(0, 1))
+    upload = {"file": ("students.arrow", sink.getvalue(), "application/octet-stream")}
+
+    body = client.post("/api/v1/predict/arrow", files=upload).json()
+    assert batch_sizes == [2, 1]
+    assert body["version"] == "stream-version"
+    assert body["predictions"] == [0.2, 0.2, 0.2]
+    assert [d["student_id"] for d in body["prediction"]] == ["ST-1", "ST-2", "ST-1"]
+    assert (body["metadata"]["rows_unique"], body["metadata"]["dedup_ratio"]) == (
+        2,
+        1.5,
+    )
+
+    response = client.post("/api/v1/predict/arrow?output=arrow", files=upload)
+    result = pa.ipc.open_stream(response.content).read_all().to_pydict()
+    assert result["student_id"] == ["ST-1", "ST-2", "ST-1"]
+
+    sink = io.BytesIO()
+    pq.write_table(pa.concat_tables([table, table]), sink, row_group_size=1)
+    response = client.post(
+        "/api/v1/predict/parquet?output=parquet",
+        files={
+            "file": ("students.parquet", sink.getvalue(), "application/octet-stream")
+        },
+    )
+    assert pq.read_table(io.BytesIO(response.content)).num_rows == 4
+
+
+def test_predict_parquet_returns_422_for_missing_columns(client: TestClient) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    pq.write_table(pa.table({"student_id": ["ST-1"], "debtor": [0]}), sink)
+
+    response = client.post(
+        "/api/v1/predict/parquet",
+        files={
+            "file": ("students.parquet", sink.getvalue(), "application/octet-stream")
+        },
+    )
+
+    assert response.status_code == 422
+
+
+def test_feature_importance_supports_conditional_requests(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    feature_importance_file = tmp_path / "feature_importance.json"
+    feature_importance_file.write_text(
+        json.dumps([{"feature": "debtor", "importance": 0.1}]), encoding="utf-8"
+    )
+    monkeypatch.setattr("app.api.FEATURE_IMPORTANCE_PATH", feature_importance_file)
+
+    first = client.get("/api/v1/feature-importance")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    not_modified = client.get(
+        "/api/v1/feature-importance", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    since = client.get(
+        "/api/v1/feature-importance",
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+    assert since.status_code == 304
+
+    feature_importance_file.write_text(
+        json.dumps(
+            [
+                {"feature": "debtor", "importance": 0.2},
+                {"feature": "gender", "importance": 0.0},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    changed = client.get("/api/v1/feature-importance", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["importance"] == 0.2
+
+
+def test_feature_importance_for_loaded_model(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    model_file = tmp_path / "model_feature_importance.json"
+    model_file.write_text(
+        json.dumps([{"feature": "gender", "importance": 1.0}]), encoding="utf-8"
+    )
+    monkeypatch.setattr("app.api.MODEL_FEATURE_IMPORTANCE_PATH", model_file)
+
+    response = client.get("/api/v1/feature-importance?source=model")
+
+    assert response.status_code == 200
+    assert response.json() == [{"feature": "gender", "importance": 1.0}]
+    assert "x-model-version" in response.headers
+
+
+def test_predict_csv_persists_results_to_prediction_store(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.utils.prediction_store import PredictionWriter, SQLiteBackend
+
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        return {"errors": None, "version": "test-version", "predictions": [0.8]}
+
+    db_path = tmp_path / "predictions.db"
+    writer = PredictionWriter(SQLiteBackend(str(db_path)), flush_interval=0.05)
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    monkeypatch.setattr("app.api.get_prediction_writer", lambda: writer)
+
+    files = {"file": ("students.csv", _valid_csv_content(), "text/csv")}
+    response = client.post("/api/v1/predict/csv", files=files)
+    assert response.status_code == 200, response.text
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    import sqlite3
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT student_id, student_name, batch_id, course, semester, "
+            "outcome, dropout_prob, model_version FROM predictions"
+        ).fetchall()
+    assert rows == [
+        (
+            "ST-2024-001",
+            "John Doe",
+            "2026-01-MAIA",
+            "Computer Science",
+            4,
+            "Dropout",
+            0.8,
+            "test-version",
+        )
+    ]
+
+
+def test_cohort_analytics_returns_aggregates_from_the_store(
+    client: TestClient, monkeypatch
+) -> None:
+    from types import SimpleNamespace
+
+    from app.utils.cohort_analytics import CohortAnalytics
+
+    class _Backend:
+        def read_cohort_counts(self) -> pd.DataFrame:
+            return pd.DataFrame(
+                {
+                    "batch_id": ["2026-01-MAIA", "2026-01-MAIA"],
+                    "course": ["Computer Science", "Computer Science"],
+                    "semester": [4, 4],
+                    "risk_score": [0.2, 0.8],
+                    "risk_level": ["Bajo", "Alto"],
+                    "categoria": ["Bajo Riesgo", "Alto Riesgo"],
+                    "n": [1, 1],
+                }
+            )
+
+    monkeypatch.setattr("app.api.cohort_analytics", CohortAnalytics())
+    monkeypatch.setattr(
+        "app.api.get_prediction_writer", lambda: SimpleNamespace(backend=_Backend())
+    )
+
+    response = client.get("/api/v1/analytics/cohorts", params={"group_by": "batch_id"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["group_by"] == "batch_id"
+    (group,) = body["groups"]
+    assert group["group"] == "2026-01-MAIA"
+    assert group["count"] == 2
+    assert group["percentiles"]["p50"] == 0.2
+    assert group["risk_levels"] == {"Bajo": 1, "Alto": 1}
+    assert sum(group["histogram"]["counts"]) == 2
+
+    response = client.get("/api/v1/analytics/cohorts", params={"group_by": "name"})
+    assert response.status_code == 400
+
+
+def test_cohort_analytics_requires_prediction_store(client: TestClient) -> None:
+    response = client.get("/api/v1/analytics/cohorts")
+    assert response.status_code == 503
+
+
+def test_predict_csv_delta_rescores_only_changed_students(
+    client: TestClient, monkeypatch, tmp_path
+) -> None:
+    from app.utils.prediction_store import PredictionWriter, SQLiteBackend
+
+    scored_rows = []
+
+    def fake_make_prediction(input_data: pd.DataFrame, **_kwargs) -> dict:
+        scored_rows.append(len(input_data))
+        scores = (input_data["curricular_units_2nd_sem_grade"] / 20).round(2).tolist()
+        return {"errors": None, "version": "test-version", "predictions": scores}
+
+    writer = PredictionWriter(
+        SQLiteBackend(str(tmp_path / "predictions.db")), flush_interval=0.0
+    )
+    monkeypatch.setattr("app.api.make_prediction", fake_make_prediction)
+    monkeypatch.setattr("app.api.get_prediction_writer", lambda: writer)
+    monkeypatch.setattr("app.api.model_version", "test-version")
+
+    header, row = _valid_csv_content().splitlines()
+    second = row.replace("ST-2024-001", "ST-2024-002").replace("15.0", "10.0")
+    first_upload = "\n".join([header, row, second]) + "\n"
+    response = client.post(
+        "/api/v1/predict/csv",
+        params={"delta": "true"},
+        files={"file": ("students.csv", first_upload, "text/csv")},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["metadata"]["rows_reused"] == 0
+    assert writer.flush(timeout=5)
+
+    changed = second.replace("10.0", "12.0")
+    second_upload = "\n".join([header, row, changed]) + "\n"
+    response = client.post(
+        "/api/v1/predict/csv",
+        params={"delta": "true"},
+        files={"file": ("students.csv", second_upload, "text/csv")},
+    )
+    writer.close()
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert scored_rows == [2, 1]
+    assert body["predictions"] == pytest.approx([0.75, 0.6])
+    assert body["metadata"]["rows_reused"] == 1
+    assert body["metadata"]["rows_rescored"] == 1
+    assert [d["student_id"] for d in body["prediction"]] == [
+        "ST-2024-001",
+        "ST-2024-002",
+    ]
+    assert writer.stats["written"] == 3
+
+
+def test_predict_csv_delta_requires_prediction_store(client: TestClient) -> None:
+    files = {"file": ("students.csv", _valid_csv_content(), "text/csv")}
+    response = client.post("/api/v1/predict/csv", params={"delta": "true"}, files=files)
+    assert response.status_code == 503
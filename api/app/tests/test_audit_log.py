@@ -0,0 +1,90 @@
+import json
+import multiprocessing
+
+import pytest
+
+from app.utils.audit_log import AuditLog, RotatingNDJSONFile, fcntl
+
+
+def _write_from_worker(path, worker: int) -> None:
+    sink = RotatingNDJSONFile(path, max_bytes=20_000, backups=50)
+    for i in range(200):
+        sink.write_lines(
+            [json.dumps({"worker": worker, "i": i, "pad": "x" * 200}) + "\n"]
+        )
+    sink.close()
+
+
+def test_unsampled_requests_are_logged_without_evaluating_bodies(tmp_path) -> None:
+    def fail() -> dict:
+        raise AssertionError("body evaluated for an unsampled request")
+
+    audit_log = AuditLog(
+        RotatingNDJSONFile(tmp_path / "requests.jsonl", 0, 0), sample_rate=0.0
+    )
+    audit_log.record(
+        "POST /api/v1/predict", started=0.0, rows=3, body=fail, response=fail
+    )
+    audit_log.close()
+
+    (entry,) = [
+        json.loads(line)
+        for line in (tmp_path / "requests.jsonl").open(encoding="utf-8")
+    ]
+    assert entry["title"] == "POST /api/v1/predict"
+    assert entry["request_id"].startswith("req-")
+    assert entry["body"] is None and entry["response"] is None
+    assert entry["rows"] == 3
+    assert audit_log.stats["written"] == 1
+
+
+def test_sampled_bodies_are_written_and_file_rotates_by_size(tmp_path) -> None:
+    path = tmp_path / "requests.jsonl"
+    audit_log = AuditLog(
+        RotatingNDJSONFile(path, max_bytes=600, backups=2), sample_rate=1.0
+    )
+    for i in range(12):
+        audit_log.record(
+            "POST /api/v1/predict/csv",
+            started=0.0,
+            rows=1,
+            body=lambda i=i: {"filename": "a.csv", "csv": f"student_id\nST-{i}\n"},
+            response=lambda: {"predictions": [0.5]},
+        )
+    audit_log.close()
+
+    files = sorted(tmp_path.glob("requests.jsonl*"))
+    assert [p.name for p in files] == [
+        "requests.jsonl",
+        "requests.jsonl.1",
+        "requests.jsonl.2",
+    ]
+    assert all(p.stat().st_size <= 600 for p in files)
+    last = path.read_text(encoding="utf-8").splitlines()[-1]
+    assert json.loads(last)["body"]["csv"] == "student_id\nST-11\n"
+    assert json.loads(last)["response"] == {"predictions": [0.5]}
+
+
+@pytest.mark.skipif(fcntl is None, reason="requiere flock")
+def test_workers_sharing_the_file_never_interleave_or_lose_lines(tmp_path) -> None:
+    path = tmp_path / "requests.jsonl"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_write_from_worker, args=(path, w)) for w in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    entries = [
+        json.loads(line)
+        for file in tmp_path.glob("requests.jsonl*")
+        for line in file.read_text(encoding="utf-8").splitlines()
+    ]
+    assert sorted((e["worker"], e["i"]) for e in entries) == [
+        (w, i) for w in range(4) for i in range(200)
+    ]
+    assert all(
+        file.stat().st_size <= 20_000 for file in tmp_path.glob("requests.jsonl*")
+    )
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+from app.utils.cohort_analytics import CohortAnalytics
+from app.utils.prediction_store import ParquetBackend, PredictionWriter, SQLiteBackend
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "batch_id": ["A", "A", "A", "B"],
+            "course": ["CS", "CS", "Math", "Math"],
+            "semester": [1, 1, 2, 2],
+            "risk_score": [0.1, 0.5, 0.9, 1.0],
+            "risk_level": ["Bajo", "Medio", "Alto", "Alto"],
+            "categoria": ["Estable", "Seguimiento", "Crítico", "Crítico"],
+        }
+    )
+
+
+def test_update_maintains_histograms_percentiles_and_counts() -> None:
+    analytics = CohortAnalytics()
+    df = _frame()
+    analytics.update(df.iloc[:2])
+    analytics.update(df.iloc[2:])
+
+    (overall,) = analytics.summarize()
+    assert overall["count"] == 4
+    assert overall["mean_risk_score"] == pytest.approx(df["risk_score"].mean())
+    assert overall["percentiles"] == {"p25": 0.1, "p50": 0.5, "p75": 0.9, "p90": 1.0}
+    assert overall["histogram"]["counts"] == [0, 1, 0, 0, 0, 1, 0, 0, 0, 2]
+    assert overall["categories"] == {"Estable": 1, "Seguimiento": 1, "Crítico": 2}
+
+    by_batch = {g["group"]: g for g in analytics.summarize("batch_id")}
+    assert set(by_batch) == {"A", "B"}
+    assert by_batch["A"]["count"] == 3
+    assert by_batch["B"]["risk_levels"] == {"Alto": 1}
+    assert [g["group"] for g in analytics.summarize("semester")] == [1, 2]
+
+
+@pytest.mark.parametrize("backend_cls", [SQLiteBackend, ParquetBackend])
+def test_load_from_store_counts_matches_row_updates(tmp_path, backend_cls) -> None:
+    pytest.importorskip("pyarrow")
+    df = _frame()
+    details = [
+        {
+            "student_id": str(i),
+            "risk_score": score,
+            "risk_level": level,
+            "categoria": cat,
+        }
+        for i, (score, level, cat) in enumerate(
+            zip(df["risk_score"], df["risk_level"], df["categoria"])
+        )
+    ]
+    target = tmp_path / (
+        "predictions.db" if backend_cls is SQLiteBackend else "predictions"
+    )
+
+    writer = PredictionWriter(backend_cls(str(target)), flush_interval=0.0)
+    # Dos lotes (dos workers, o dos flushes) con las mismas filas
+    for _ in range(2):
+        writer.submit(
+            pd.DataFrame(), details, context=df[["batch_id", "course", "semester"]]
+        )
+    writer.close()
+
+    expected = CohortAnalytics()
+    expected.update(pd.concat([df, df], ignore_index=True))
+    loaded = CohortAnalytics()
+    loaded.load(backend_cls(str(target)))
+
+    for group_by in (None, "batch_id", "course", "semester"):
+        assert loaded.summarize(group_by) == expected.summarize(group_by)
+    assert loaded.summarize()[0]["count"] == 8
+
+
+def test_refresh_rereads_the_store_only_after_the_ttl() -> None:
+    df = _frame()
+
+    class _Backend:
+        reads = 0
+
+        def read_cohort_counts(self) -> pd.DataFrame:
+            _Backend.reads += 1
+            return df.assign(n=_Backend.reads)
+
+    analytics = CohortAnalytics()
+    analytics.refresh(_Backend(), max_age=60)
+    analytics.refresh(_Backend(), max_age=60)
+    assert _Backend.reads == 1
+    assert analytics.summarize()[0]["count"] == 4
+
+    analytics.refresh(_Backend(), max_age=0)
+    assert _Backend.reads == 2
+    # Los agregados se reemplazan con la nueva lectura, no se suman
+    assert analytics.summarize()[0]["count"] == 8
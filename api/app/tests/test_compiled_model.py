@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import model_loader
+from app.utils.compiled_model import CompiledEnsemble, compile_model
+from app.utils.preprocessing import MODEL_FEATURES
+
+
+def _training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.normal(size=(500, len(MODEL_FEATURES))).astype(np.float32),
+        columns=list(MODEL_FEATURES),
+    )
+    y = (X["efficiency_ratio"] + X["debtor"] * X["grade_trend"] > 0).astype(int)
+    return X, y
+
+
+def test_compiled_xgboost_matches_native_predictions(tmp_path) -> None:
+    xgb = pytest.importorskip("xgboost")
+    X, y = _training_data()
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=4, base_score=0.3).fit(X, y)
+
+    compiled = CompiledEnsemble(compile_model(model, tmp_path / "compiled"))
+
+    assert isinstance(compiled.threshold, np.memmap)
+    np.testing.assert_allclose(
+        compiled.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-6
+    )
+
+
+def test_compiled_random_forest_matches_native_predictions(tmp_path) -> None:
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    X, y = _training_data()
+    model = ensemble.RandomForestClassifier(
+        n_estimators=10, max_depth=6, random_state=0
+    )
+    model.fit(X, y)
+
+    compiled = CompiledEnsemble(compile_model(model, tmp_path / "compiled"))
+
+    np.testing.assert_allclose(
+        compiled.predict_proba(X), model.predict_proba(X), atol=1e-12
+    )
+
+
+def test_serving_model_uses_compiled_artifact_of_loaded_version(
+    tmp_path, monkeypatch
+) -> None:
+    xgb = pytest.importorskip("xgboost")
+    from app.config import settings
+
+    X, y = _training_data()
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=3).fit(X, y)
+    compile_model(model, tmp_path / "compiled", model_version="v1")
+
+    monkeypatch.setattr(model_loader, "COMPILED_MODEL_DIR", tmp_path / "compiled")
+    monkeypatch.setattr(model_loader, "_load_model", lambda: model)
+    monkeypatch.setattr(settings, "MODEL_BACKEND", "compiled", raising=False)
+    for version, expected in (("v1", CompiledEnsemble), ("v2", type(model))):
+        monkeypatch.setattr(model_loader, "model_version", version)
+        model_loader._load_compiled_model.cache_clear()
+        assert isinstance(model_loader._load_serving_model(), expected)
+
+    # Sin elegirlo explícitamente el compilado no se sirve aunque exista
+    monkeypatch.setattr(model_loader, "model_version", "v1")
+    for backend in ("auto", "native"):
+        monkeypatch.setattr(settings, "MODEL_BACKEND", backend)
+        assert model_loader._load_serving_model() is model
+    model_loader._load_compiled_model.cache_clear()
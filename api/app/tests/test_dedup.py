@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from app.schemas import PredictionMetadata, PredictionResults
+from app.utils import model_loader
+from app.utils.dedup import unique_rows
+from app.utils.preprocessing import MODEL_FEATURES
+from app.utils.risk_rules import build_risk_details_dicts
+
+
+def _batch_with_duplicates() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    distinct = pd.DataFrame(
+        rng.integers(0, 5, size=(4, len(MODEL_FEATURES))).astype(np.float32),
+        columns=list(MODEL_FEATURES),
+    )
+    # 4 filas distintas repetidas hasta 10 filas, intercaladas
+    return distinct.iloc[[0, 1, 0, 2, 0, 3, 1, 0, 2, 0]].reset_index(drop=True)
+
+
+def test_unique_rows_groups_identical_rows_and_scatters_back() -> None:
+    matrix = np.array(
+        [[0.0, 1.0], [-0.0, 1.0], [np.nan, 2.0], [np.nan, 2.0], [3.0, 1.0]]
+    )
+
+    groups = unique_rows(matrix)
+
+    assert (groups.n_rows, groups.n_unique) == (5, 3)
+    assert groups.ratio == 5 / 3
+    np.testing.assert_array_equal(groups.scatter(matrix[groups.first]), matrix + 0.0)
+    assert groups.scatter(["a", "b", "c"]) == [
+        ["a", "b", "c"][i] for i in groups.inverse
+    ]
+
+
+def test_make_prediction_scores_each_distinct_row_once(monkeypatch) -> None:
+    batch = _batch_with_duplicates()
+
+    class CountingModel:
+        rows_scored = 0
+
+        def predict_proba(self, matrix):
+            CountingModel.rows_scored += len(matrix)
+            risk = matrix.to_numpy().sum(axis=1) / 100
+            return np.column_stack([1 - risk, risk])
+
+    monkeypatch.setattr(model_loader, "_load_serving_model", CountingModel)
+    monkeypatch.setattr(model_loader, "_load_calibrator", lambda: None)
+    monkeypatch.setattr(model_loader, "drift_monitor", lambda: None)
+
+    results = model_loader.make_prediction(batch)
+
+    assert results["errors"] is None
+    assert CountingModel.rows_scored == 4
+    assert (results["rows_unique"], results["dedup_ratio"]) == (4, 2.5)
+    np.testing.assert_allclose(
+        results["predictions"], batch.to_numpy().sum(axis=1) / 100, rtol=1e-6
+    )
+
+    response = PredictionResults.from_inference(batch, results)
+    assert (response.metadata.rows_unique, response.metadata.dedup_ratio) == (4, 2.5)
+    # Como la respuesta JSON de /predict/parquet y /predict/arrow: metadata por
+    # record batch
+    combined = PredictionMetadata.combine(
+        [response.metadata, response.metadata], 2 * len(batch)
+    )
+    assert (combined.rows_unique, combined.dedup_ratio) == (8, 2.5)
+
+
+def test_risk_details_match_row_by_row_evaluation() -> None:
+    batch = _batch_with_duplicates()
+    # Mismas variables con distinto score: las reglas de score deben verlo
+    scores = [0.2, 0.7, 0.2, 0.5, 0.9, 0.1, 0.7, 0.2, 0.5, 0.2]
+
+    details = build_risk_details_dicts(batch, scores)
+
+    expected = [
+        build_risk_details_dicts(batch.iloc[[i]].reset_index(drop=True), [score])[0]
+        for i, score in enumerate(scores)
+    ]
+    assert details == expected
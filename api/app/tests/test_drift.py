@@ -0,0 +1,89 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.drift import (
+    DriftMonitor,
+    bin_counts,
+    clear_drift_state,
+    drift_state_path,
+)
+
+
+def _reference() -> dict:
+    return {
+        "version": "test",
+        "features": {
+            "debtor": {"edges": [0.5], "counts": [90, 10, 0]},
+            "curricular_units_1st_sem_grade": {"edges": [10.0], "counts": [50, 50, 0]},
+        },
+        "risk_score": {"edges": [0.5], "counts": [80, 20, 0]},
+    }
+
+
+def test_bin_counts_uses_left_closed_bins_and_missing_cell() -> None:
+    counts = bin_counts([9.9, 10.0, np.nan, 15.0], np.array([10.0]))
+
+    assert counts.tolist() == [1, 2, 1]
+
+
+def test_monitor_reports_psi_ks_and_merges_counts() -> None:
+    monitor = DriftMonitor(_reference())
+    stable = pd.DataFrame(
+        {"debtor": [0] * 9 + [1], "curricular_units_1st_sem_grade": [5.0, 15.0] * 5}
+    )
+    monitor.update(stable, [0.1] * 8 + [0.9] * 2)
+
+    shifted = pd.DataFrame(
+        {"debtor": [1] * 10, "curricular_units_1st_sem_grade": [np.nan] * 10}
+    )
+    other = DriftMonitor(_reference())
+    other.update(shifted, [0.9] * 10)
+    monitor.merge(other)
+
+    report = monitor.report()
+    features = {f["feature"]: f for f in report["features"]}
+    assert report["rows_observed"] == 20
+    assert features["debtor"]["counts"] == [9, 11, 0]
+    assert features["debtor"]["status"] == "significant"
+    assert features["debtor"]["ks"] == 0.45
+    assert features["curricular_units_1st_sem_grade"]["missing_rate"] == 0.5
+    assert report["risk_score"]["counts"] == [8, 12, 0]
+
+
+def test_combined_sums_counts_saved_by_other_workers(tmp_path) -> None:
+    worker = DriftMonitor(_reference())
+    worker.update(pd.DataFrame({"debtor": [1, 1]}), [0.9, 0.9])
+    worker.save(tmp_path)
+    saved = json.loads(drift_state_path(tmp_path).read_text(encoding="utf-8"))
+    saved["since"] = "2000-01-01T00:00:00+00:00"
+    drift_state_path(tmp_path, pid=1).write_text(json.dumps(saved), encoding="utf-8")
+    drift_state_path(tmp_path, pid=2).write_text(
+        json.dumps({"version": "old"}), encoding="utf-8"
+    )
+
+    report = worker.combined(tmp_path).report()
+
+    assert report["rows_observed"] == 4
+    assert report["since"] == "2000-01-01T00:00:00+00:00"
+    assert report["risk_score"]["counts"] == [0, 4, 0]
+    assert worker.report()["rows_observed"] == 2
+
+    clear_drift_state(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_autosave_writes_counts_outside_the_update_call(tmp_path) -> None:
+    monitor = DriftMonitor(_reference())
+    state_dir = tmp_path / "drift"
+    monitor.start_autosave(state_dir, interval=0.01)
+    monitor.update(pd.DataFrame({"debtor": [1]}), [0.9])
+
+    deadline = time.monotonic() + 5
+    while not drift_state_path(state_dir).exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    saved = json.loads(drift_state_path(state_dir).read_text(encoding="utf-8"))
+    assert saved["rows_observed"] == 1
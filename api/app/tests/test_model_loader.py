@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import model_loader
+from app.utils.calibration import Calibrator
+from app.utils.preprocessing import MODEL_FEATURES, to_model_matrix
+
+
+@pytest.fixture()
+def xgb_model(monkeypatch):
+    xgb = pytest.importorskip("xgboost")
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.integers(0, 10, size=(200, len(MODEL_FEATURES))).astype(np.float32),
+        columns=list(MODEL_FEATURES),
+    )
+    y = (X["efficiency_ratio"] + X["debtor"] > 9).astype(int)
+    model = xgb.XGBClassifier(n_estimators=10, max_depth=3).fit(X, y)
+    monkeypatch.setattr(model_loader, "_load_model", lambda: model)
+    model_loader.explanation_cache.clear()
+    return model, X
+
+
+def test_make_prediction_with_explain_returns_top_k_contributions(xgb_model) -> None:
+    model, X = xgb_model
+    sample = X.head(5)
+
+    results = model_loader.make_prediction(sample, explain=True, top_k=2)
+
+    assert results["errors"] is None
+    expected = model.predict_proba(to_model_matrix(sample))[:, 1]
+    np.testing.assert_allclose(results["predictions"], expected, rtol=1e-6)
+    assert len(results["contributions"]) == 5
+    for row in results["contributions"]:
+        assert len(row) == 2
+        assert abs(row[0]["contribution"]) >= abs(row[1]["contribution"])
+        assert row[0]["feature"] in MODEL_FEATURES
+
+
+def test_make_prediction_reuses_cached_explanations(xgb_model, monkeypatch) -> None:
+    _, X = xgb_model
+    first = model_loader.make_prediction(X.head(3), explain=True)
+
+    class _NoBooster:
+        def get_booster(self):
+            raise AssertionError("cached rows must not be rescored")
+
+    monkeypatch.setattr(model_loader, "_load_model", lambda: _NoBooster())
+    second = model_loader.make_prediction(X.head(3), explain=True)
+
+    assert second["errors"] is None
+    assert second["predictions"] == first["predictions"]
+    assert second["contributions"] == first["contributions"]
+
+
+def test_set_model_threads_limits_booster_threads(xgb_model) -> None:
+    model, _ = xgb_model
+
+    model_loader.set_model_threads(2)
+
+    config = json.loads(model.get_booster().save_config())
+    assert config["learner"]["generic_param"]["nthread"] == "2"
+    assert model.get_params()["n_jobs"] == 2
+
+
+def test_make_prediction_applies_calibration_table(xgb_model, monkeypatch) -> None:
+    model, X = xgb_model
+    sample = X.head(5)
+    calibrator = Calibrator([0.0, 0.5, 1.0], [0.0, 0.2, 1.0], decision_threshold=0.3)
+    monkeypatch.setattr(model_loader, "_load_calibrator", lambda: calibrator)
+
+    results = model_loader.make_prediction(sample)
+
+    raw = model.predict_proba(to_model_matrix(sample))[:, 1]
+    np.testing.assert_allclose(
+        results["predictions"], np.interp(raw, calibrator.x, calibrator.y)
+    )
+    assert results["decision_threshold"] == 0.3
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dropout_common.onnx_model import OnnxModel, convert_to_onnx, load_onnx_model
+
+from app.utils import model_loader
+from app.utils.preprocessing import MODEL_FEATURES
+
+pytest.importorskip("onnxruntime")
+
+
+def _training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.normal(size=(500, len(MODEL_FEATURES))).astype(np.float32),
+        columns=list(MODEL_FEATURES),
+    )
+    y = (X["efficiency_ratio"] + X["debtor"] * X["grade_trend"] > 0).astype(int)
+    return X, y
+
+
+def test_onnx_xgboost_matches_native_predictions(tmp_path) -> None:
+    xgb = pytest.importorskip("xgboost")
+    pytest.importorskip("onnxmltools")
+    X, y = _training_data()
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=4, base_score=0.3).fit(X, y)
+
+    convert_to_onnx(model, tmp_path / "model.onnx", list(X.columns), "v1", check_rows=X)
+    onnx_model = load_onnx_model(tmp_path / "model.onnx", intra_op_threads=1)
+
+    assert onnx_model.version == "v1"
+    assert list(onnx_model.feature_names) == list(X.columns)
+    # Las columnas se reordenan según los metadatos del grafo
+    np.testing.assert_allclose(
+        onnx_model.predict_proba(X[X.columns[::-1]]), model.predict_proba(X), atol=1e-5
+    )
+
+
+def test_onnx_random_forest_matches_native_predictions(tmp_path) -> None:
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    pytest.importorskip("skl2onnx")
+    X, y = _training_data()
+    model = ensemble.RandomForestClassifier(
+        n_estimators=10, max_depth=6, random_state=0
+    )
+    model.fit(X, y)
+
+    max_diff = convert_to_onnx(
+        model, tmp_path / "model.onnx", list(X.columns), check_rows=X
+    )
+
+    assert max_diff <= 1e-5
+    np.testing.assert_allclose(
+        OnnxModel(tmp_path / "model.onnx").predict_proba(X),
+        model.predict_proba(X),
+        atol=1e-5,
+    )
+
+
+def test_serving_model_uses_onnx_backend_of_loaded_version(
+    tmp_path, monkeypatch
+) -> None:
+    xgb = pytest.importorskip("xgboost")
+    pytest.importorskip("onnxmltools")
+    from app.config import settings
+
+    X, y = _training_data()
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=3).fit(X, y)
+    convert_to_onnx(model, tmp_path / "model.onnx", list(X.columns), "v1")
+
+    monkeypatch.setattr(model_loader, "ONNX_MODEL_PATH", tmp_path / "model.onnx")
+    monkeypatch.setattr(model_loader, "COMPILED_MODEL_DIR", tmp_path / "compiled")
+    monkeypatch.setattr(model_loader, "_load_model", lambda: model)
+    monkeypatch.setattr(settings, "MODEL_BACKEND", "onnx", raising=False)
+    for version, expected in (("v1", OnnxModel), ("v2", type(model))):
+        monkeypatch.setattr(model_loader, "model_version", version)
+        model_loader._load_onnx_model.cache_clear()
+        model_loader._load_compiled_model.cache_clear()
+        assert isinstance(model_loader._load_serving_model(), expected)
+
+    monkeypatch.setattr(model_loader, "model_version", "v1")
+    monkeypatch.setattr(settings, "MODEL_BACKEND", "native")
+    assert model_loader._load_serving_model() is model
+    model_loader._load_onnx_model.cache_clear()
+    model_loader._load_compiled_model.cache_clear()
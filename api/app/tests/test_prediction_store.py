@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+from app.utils.prediction_store import (
+    FEATURE_COLUMNS,
+    PREDICTION_COLUMNS,
+    PredictionWriter,
+    SQLiteBackend,
+    match_previous_scores,
+)
+
+
+def _scored_batch(n_rows: int):
+    features = {source: 1 for _, source, _, _ in FEATURE_COLUMNS}
+    features.update({"age_at_enrollment": 19, "curricular_units_1st_sem_grade": 14.5})
+    input_df = pd.DataFrame(
+        {name: [value] * n_rows for name, value in features.items()}
+    )
+    details = [
+        {
+            "student_id": f"ST-{i}",
+            "outcome": "Graduate",
+            "risk_score": 0.2,
+            "risk_level": "Bajo",
+            "categoria": "Estable",
+            "class_probabilities": {"Graduate": 0.8, "Dropout": 0.2},
+            "recommendation": "Seguimiento regular",
+            "intervention_steps": "Ninguna",
+        }
+        for i in range(n_rows)
+    ]
+    context = pd.DataFrame(
+        {"batch_id": ["2026-01-MAIA"] * n_rows, "semester": [4] * n_rows}
+    )
+    return input_df, details, context
+
+
+def test_writer_flushes_batches_in_bulk(tmp_path) -> None:
+    db_path = tmp_path / "predictions.db"
+    writer = PredictionWriter(SQLiteBackend(str(db_path)), flush_interval=0.05)
+
+    for _ in range(3):
+        input_df, details, context = _scored_batch(4)
+        assert writer.submit(input_df, details, context=context, model_version="v1")
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert writer.stats["written"] == 12
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT batch_id, student_id, semester, age_at_enrollment, "
+            "cu_1st_sem_grade, student_name, dropout_prob, model_version "
+            "FROM predictions"
+        ).fetchall()
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list('predictions')")}
+    assert len(rows) == 12
+    assert rows[0] == ("2026-01-MAIA", "ST-0", 4, 19, 14.5, None, 0.2, "v1")
+    assert {
+        "idx_predictions_batch_id",
+        "idx_predictions_student_id",
+        "idx_predictions_created_at",
+    } <= indexes
+
+
+def test_malformed_batch_is_counted_as_failed_and_writer_keeps_running(
+    tmp_path,
+) -> None:
+    writer = PredictionWriter(
+        SQLiteBackend(str(tmp_path / "predictions.db")), flush_interval=0.05
+    )
+    input_df, details, context = _scored_batch(2)
+    assert writer.submit(input_df, [None, None], context=context, model_version="v1")
+    assert writer.submit(input_df, details, context=context, model_version="v1")
+    assert writer.flush(timeout=5)
+
+    assert writer.submit(input_df, details, context=context, model_version="v1")
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert writer.stats["failed"] == 2
+    assert writer.stats["written"] == 4
+
+
+def test_submit_never_blocks_and_drops_when_queue_is_full(tmp_path) -> None:
+    release = threading.Event()
+
+    class _SlowBackend(SQLiteBackend):
+        def write_many(self, rows) -> None:
+            release.wait(timeout=5)
+            super().write_many(rows)
+
+    writer = PredictionWriter(
+        _SlowBackend(str(tmp_path / "predictions.db")), max_queue=1, flush_interval=0.0
+    )
+    input_df, details, context = _scored_batch(2)
+
+    assert writer.submit(input_df, details, context=context)
+    assert writer.flush(timeout=0.2) is False  # el hilo escritor está ocupado
+    assert writer.submit(input_df, details, context=context)
+    assert writer.submit(input_df, details, context=context) is False
+
+    release.set()
+    writer.close()
+    assert writer.stats == {"submitted": 4, "written": 4, "dropped": 2, "failed": 0}
+
+
+def test_match_previous_scores_uses_latest_fingerprint_per_student(tmp_path) -> None:
+    backend = SQLiteBackend(str(tmp_path / "predictions.db"))
+    writer = PredictionWriter(backend, flush_interval=0.0)
+    input_df, details, context = _scored_batch(2)
+    writer.submit(
+        input_df, details, context=context, model_version="v1", predictions=[0.1, 0.2]
+    )
+    writer.submit(
+        input_df, details, context=context, model_version="v2", predictions=[0.3, 0.4]
+    )
+    assert writer.flush(timeout=5)
+
+    changed = input_df.copy()
+    changed.loc[1, "curricular_units_1st_sem_grade"] = 10.0
+    reused, scores = match_previous_scores(backend, changed, ["ST-0", "ST-1"], "v1")
+    assert reused.tolist() == [True, False]
+    assert scores[0] == 0.1
+
+    reused, _ = match_previous_scores(backend, input_df, ["ST-0", "ST-1"], "v3")
+    assert not reused.any()
+    writer.close()
+
+
+def test_sqlite_backend_adds_columns_missing_from_an_older_store(tmp_path) -> None:
+    db_path = tmp_path / "predictions.db"
+    # Esquema anterior a feature_fingerprint / prediction
+    old_columns = [
+        f"{name} {sqlite_type}"
+        for name, sqlite_type, _ in PREDICTION_COLUMNS
+        if name not in ("feature_fingerprint", "prediction")
+    ]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"CREATE TABLE predictions ({', '.join(old_columns)})")
+
+    backend = SQLiteBackend(str(db_path))
+    writer = PredictionWriter(backend, flush_interval=0.0)
+    input_df, details, context = _scored_batch(2)
+    writer.submit(
+        input_df, details, context=context, model_version="v1", predictions=[0.1, 0.2]
+    )
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert writer.stats["failed"] == 0
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT student_id, prediction FROM predictions ORDER BY student_id"
+        )
+        assert rows.fetchall() == [("ST-0", 0.1), ("ST-1", 0.2)]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.preprocessing import (
+    FEATURE_DTYPES,
+    MODEL_FEATURES,
+    prepare_model_input,
+    to_model_matrix,
+)
+
+
+def _feature_row(**overrides) -> dict:
+    row = {
+        "age_at_enrollment": 19,
+        "gender": 1,
+        "displaced": 0,
+        "debtor": 0,
+        "tuition_fees_up_to_date": 1,
+        "scholarship_holder": 1,
+        "curricular_units_1st_sem_enrolled": 6,
+        "curricular_units_1st_sem_approved": 6,
+        "curricular_units_1st_sem_grade": 14.5,
+        "curricular_units_2nd_sem_enrolled": 6,
+        "curricular_units_2nd_sem_approved": 6,
+        "curricular_units_2nd_sem_grade": 15.0,
+    }
+    row.update(overrides)
+    return row
+
+
+def test_prepare_model_input_uses_compact_dtypes() -> None:
+    df = prepare_model_input(pd.DataFrame([_feature_row()]))
+
+    for col, dtype in FEATURE_DTYPES.items():
+        assert df[col].dtype == np.dtype(dtype), col
+    assert df["total_approved"].iloc[0] == 12
+    assert df["grade_trend"].iloc[0] == pytest.approx(0.5)
+
+    matrix = to_model_matrix(df)
+    assert list(matrix.columns) == list(MODEL_FEATURES)
+    assert (matrix.dtypes == np.float32).all()
+
+
+def test_prepare_model_input_rejects_out_of_range_values() -> None:
+    with pytest.raises(ValueError, match="age_at_enrollment"):
+        prepare_model_input(pd.DataFrame([_feature_row(age_at_enrollment=300)]))
@@ -0,0 +1,79 @@
+import json
+
+from app.utils.profiling import Profiler, annotate, checkpoint
+
+
+def test_disabled_profiler_never_profiles() -> None:
+    profiler = Profiler(None, sample_rate=1.0, token="secret")
+
+    assert profiler.start({"X-Profile": "secret"}, "predict_csv") is None
+    checkpoint("read_csv")  # sin perfil activo no hace nada
+    annotate(batch_size=10)
+
+
+def test_profile_writes_artifacts_with_stages_and_prunes(tmp_path) -> None:
+    profiler = Profiler(tmp_path, token="secret", max_profiles=2)
+    assert profiler.start({"X-Profile": "wrong"}, "predict_csv") is None
+
+    for _ in range(3):
+        profile = profiler.start({"X-Profile": "secret"}, "predict_csv")
+        assert (
+            profiler.start({"X-Profile": "secret"}, "predict_csv") is None
+        )  # uno a la vez
+        with profile:
+            annotate(batch_size=3)
+            sum(range(1000))
+            checkpoint("read_csv")
+            checkpoint("predict")
+
+    metadata = json.loads(
+        (tmp_path / f"{profile.profile_id}.json").read_text(encoding="utf-8")
+    )
+    assert metadata["trigger"] == "header"
+    assert metadata["batch_size"] == 3
+    assert list(metadata["stages_ms"]) == ["read_csv", "predict"]
+    assert (tmp_path / f"{profile.profile_id}.prof").exists()
+    assert "cumulative" in (tmp_path / f"{profile.profile_id}.txt").read_text(
+        encoding="utf-8"
+    )
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert profiler.status()["profiles_written"] == 3
+    assert profiler.status()["skipped_busy"] == 3
+
+
+def test_prune_keeps_latest_profiles_written_in_the_same_second(
+    tmp_path, monkeypatch
+) -> None:
+    from datetime import datetime as real_datetime
+
+    from app.utils import profiling
+
+    class FrozenDatetime(real_datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return real_datetime(2026, 1, 1, 12, 0, 0, tzinfo=tz)
+
+    monkeypatch.setattr(profiling, "datetime", FrozenDatetime)
+    profiler = Profiler(tmp_path, token="secret", max_profiles=3)
+    written = []
+    for _ in range(8):
+        profile = profiler.start({"X-Profile": "secret"}, "predict_csv")
+        with profile:
+            checkpoint("predict")
+        written.append(profile.profile_id)
+
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == written[-3:]
+
+
+def test_sample_rate_set_in_one_worker_applies_to_the_others(tmp_path) -> None:
+    handling_put = Profiler(tmp_path, sample_rate=0.0, rate_check_interval=0.0)
+    other_worker = Profiler(tmp_path, sample_rate=0.0, rate_check_interval=0.0)
+
+    handling_put.set_sample_rate(0.25)
+
+    assert other_worker.sample_rate == 0.25
+    assert other_worker.status()["sample_rate"] == 0.25
+    assert not list(tmp_path.glob("*.json"))
+
+    other_worker.clear_sample_rate()
+    assert Profiler(tmp_path, sample_rate=0.5).sample_rate == 0.5
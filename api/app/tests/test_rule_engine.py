@@ -0,0 +1,160 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from dropout_common.rule_engine import (
+    RuleSet,
+    RuleSetLoader,
+    RuleSyntaxError,
+    compile_expression,
+)
+
+from app.utils.risk_rules import RISK_RULES_PATH, build_risk_details_dicts
+
+
+def _spec(when: str = "debtor == 1") -> dict:
+    return {
+        "format_version": 1,
+        "version": "test",
+        "columns": {"debtor": {"aliases": ["Debtor"], "default": 0}},
+        "rules": [
+            {
+                "id": "deuda",
+                "categoria": "Financiero",
+                "nivel_riesgo": "Alto",
+                "when": when,
+                "recommendation": "Revisar pagos.",
+                "intervention_steps": "Llamar.",
+            },
+            {
+                "id": "riesgo",
+                "categoria": "Modelo",
+                "nivel_riesgo": "Medio",
+                "when": "risk_score > 0.4",
+                "recommendation": "Seguimiento.",
+                "intervention_steps": "Agendar cita.",
+            },
+        ],
+        "default": {
+            "categoria": "Sin clasificación específica",
+            "nivel_riesgo": "Medio",
+            "recommendation": "Rutina.",
+            "intervention_steps": "Monitorear.",
+        },
+    }
+
+
+def test_compiled_expression_is_vectorized_and_nan_never_matches() -> None:
+    expr = compile_expression("a + b > 0 AND NOT c < 0.5 OR notnull(d) AND 1 < d <= 3")
+    cols = {
+        "a": np.array([1.0, 0.0, 1.0, 0.0]),
+        "b": np.array([0.0, 0.0, 0.0, 0.0]),
+        "c": np.array([0.7, 0.7, 0.1, 0.1]),
+        "d": np.array([np.nan, 2.0, np.nan, 5.0]),
+    }
+
+    assert expr(cols, 4).tolist() == [True, True, False, False]
+    assert expr.names == {"a", "b", "c", "d"}
+
+
+def test_nan_counts_as_zero_in_sums_like_the_previous_rules() -> None:
+    expr = compile_expression("a + b > 0")
+    cols = {"a": np.array([np.nan, np.nan, 2.0]), "b": np.array([np.nan, 3.0, np.nan])}
+
+    assert expr(cols, 3).tolist() == [False, True, True]
+    assert compile_expression("a * b > 0")(cols, 3).tolist() == [False, False, False]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os').system('true')",
+        "debtor.real > 0",
+        "debtor",
+        "debtor in (1, 2)",
+    ],
+)
+def test_compile_expression_rejects_unsupported_syntax(expression: str) -> None:
+    with pytest.raises(RuleSyntaxError):
+        compile_expression(expression)
+
+
+def test_rule_set_resolves_aliases_defaults_and_counts_evaluations() -> None:
+    rule_set = RuleSet(_spec())
+    df = pd.DataFrame({"Debtor": [1, 0, 0]})
+
+    masks = rule_set.evaluate(df, [0.1, 0.9, np.nan])
+    assert masks.tolist() == [[True, False, False], [False, True, False]]
+    assert rule_set.first_match(masks).tolist() == [0, 1, -1]
+
+    rule_set.evaluate(pd.DataFrame({"age": [20]}), [0.5])
+    stats = {s["id"]: s for s in rule_set.stats()}
+    assert stats["deuda"]["batches"] == 2
+    assert stats["deuda"]["rows_evaluated"] == 4
+    assert stats["deuda"]["matches"] == 1
+    assert stats["riesgo"]["matches"] == 2
+    assert stats["riesgo"]["total_ms"] >= 0
+
+
+def test_bitsets_encode_all_matches_in_priority_order() -> None:
+    rule_set = RuleSet(_spec())
+    masks = rule_set.evaluate(
+        pd.DataFrame({"debtor": [1, 1, 0, 0]}), [0.9, 0.1, 0.9, 0.1]
+    )
+
+    bitsets = rule_set.bitsets(masks)
+
+    assert bitsets.dtype == np.uint64
+    assert bitsets.tolist() == [0b11, 0b01, 0b10, 0]
+    assert [rule.id for rule in rule_set.decode(bitsets[0])] == ["deuda", "riesgo"]
+    assert rule_set.decode(bitsets[3]) == []
+
+
+def test_rule_set_rejects_undeclared_variables() -> None:
+    with pytest.raises(ValueError, match="gpa"):
+        RuleSet(_spec("gpa < 2"))
+
+
+def test_loader_hot_reloads_and_keeps_previous_rules_on_error(tmp_path) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_spec()), encoding="utf-8")
+    loader = RuleSetLoader(path, check_interval=0)
+    assert loader.get().rules[0].when.source == "debtor == 1"
+
+    path.write_text(json.dumps(_spec("debtor == 0")), encoding="utf-8")
+    assert loader.reload().rules[0].when.source == "debtor == 0"
+
+    path.write_text(json.dumps(_spec("debtor ==")), encoding="utf-8")
+    assert loader.reload().rules[0].when.source == "debtor == 0"
+    assert "Sintaxis inválida" in loader.last_error
+
+
+def test_bundled_rules_compile_and_classify_batch() -> None:
+    assert RuleSet(json.loads(RISK_RULES_PATH.read_text(encoding="utf-8"))).rules
+    df = pd.DataFrame(
+        {
+            "debtor": [1, 0, 0, 0],
+            "tuition_fees_up_to_date": [1, 1, 1, 1],
+            "scholarship_holder": [1, 1, 0, 1],
+            "curricular_units_1st_sem_enrolled": [6, 6, 6, 0],
+            "curricular_units_2nd_sem_enrolled": [6, 6, 6, 0],
+            "efficiency_ratio": [1.0, 0.3, 1.0, 0.0],
+            "grade_trend": [0.0, 0.0, 0.0, 0.0],
+        }
+    )
+
+    details = build_risk_details_dicts(df, [0.2, 0.2, 0.6, 0.5])
+
+    assert [d["categoria"] for d in details] == [
+        "Financiero",
+        "Académico",
+        "Socioeconómico",
+        "Sin clasificación específica",
+    ]
+    assert [d["matched_categories"] for d in details] == [
+        ["Financiero", "Bajo Riesgo"],
+        ["Académico", "Bajo Riesgo"],
+        ["Socioeconómico"],
+        [],
+    ]
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from dropout_common.lazy_imports import LazyModule, lazy_import
+
+API_DIR = Path(__file__).resolve().parents[2]
+
+
+def test_lazy_module_imports_on_first_attribute_access() -> None:
+    proxy = LazyModule("json")
+    assert not proxy._lazy_loaded
+
+    assert proxy.dumps({"a": 1}) == '{"a": 1}'
+    assert proxy._lazy_loaded
+    assert "dumps" in vars(proxy)
+
+
+def test_lazy_import_fails_fast_for_missing_modules() -> None:
+    with pytest.raises(ImportError):
+        lazy_import("module_that_does_not_exist")
+    assert lazy_import("json") is lazy_import("json")
+
+
+def test_importing_app_does_not_load_pandas_or_numpy() -> None:
+    code = (
+        "import sys, app.main; "
+        "heavy = ('pandas', 'numpy', 'xgboost', 'mlflow'); "
+        "print(','.join(m for m in heavy if m in sys.modules))"
+    )
+    env = {**os.environ, "PYTHONPATH": str(API_DIR.parent)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
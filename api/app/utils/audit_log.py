@@ -0,0 +1,289 @@
+"""
+Registro de auditoría de peticiones en NDJSON, fuera del camino del request.
+
+Cada petición de predicción exitosa deja una línea con la misma forma que
+`requests.jsonl` (`request_id`, `title`, `body`) más metadatos de la respuesta
+(estado, filas, latencia, versión del modelo):
+
+    {"request_id": "req-…", "title": "POST /api/v1/predict/csv", "body": {...}, ...}
+
+Los cuerpos (entrada y predicciones) solo se guardan para la fracción
+muestreada `AUDIT_LOG_SAMPLE_RATE`; en el resto `body` y `response` son null.
+El endpoint solo encola la línea: el cuerpo se pasa como una función que se
+evalúa en el hilo escritor, de modo que la serialización (incluido decodificar
+un CSV de 50k filas) nunca ocurre en el request. El archivo rota por tamaño
+(`AUDIT_LOG_MAX_BYTES`, `AUDIT_LOG_BACKUPS`) y `benchmarks/bench_replay.py` lo
+reproduce como traza de tráfico real. Los workers de gunicorn comparten el
+mismo archivo (ver `RotatingNDJSONFile`).
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin workers de gunicorn no hay nada que coordinar
+    fcntl = None  # type: ignore[assignment]
+
+Payload = Optional[Callable[[], Any]]
+
+
+class RotatingNDJSONFile:
+    """
+    Archivo NDJSON de solo anexado que rota al superar `max_bytes` (path.1 … path.N).
+
+    Varios procesos pueden escribir el mismo archivo: cada línea se escribe con
+    un único `os.write` sobre un descriptor O_APPEND, así que las líneas de dos
+    workers nunca se mezclan, y cada lote se escribe con `flock` exclusivo
+    sobre `.<nombre>.lock`, de modo que revisar el tamaño, rotar y escribir es
+    atómico entre workers y ningún archivo supera `max_bytes`. Un proceso cuyo
+    descriptor ya no apunta a `path` (otro worker rotó) lo reabre antes de
+    escribir.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, backups: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(
+            self.path.with_name(f".{self.path.name}.lock"),
+            os.O_RDWR | os.O_CREAT,
+            0o644,
+        )
+        self._fd = self._open()
+
+    def _open(self) -> int:
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self) -> None:
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._fd).st_ino:
+            os.close(self._fd)
+            self._fd = self._open()
+
+    def _full(self, n_bytes: int) -> bool:
+        size = os.fstat(self._fd).st_size
+        return bool(self.max_bytes and size and size + n_bytes > self.max_bytes)
+
+    def write_lines(self, lines: List[str]) -> None:
+        pending = [line.encode("utf-8") for line in lines]
+        with self._locked():
+            self._reopen_if_rotated()
+            for line in pending:
+                if self._full(len(line)):
+                    self._rotate()
+                os.write(self._fd, line)
+
+    def _rotate(self) -> None:
+        os.close(self._fd)
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                source = self.path.with_name(f"{self.path.name}.{index}")
+                if source.exists():
+                    source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._fd = self._open()
+
+    def close(self) -> None:
+        os.close(self._fd)
+        os.close(self._lock_fd)
+
+
+class AuditLog:
+    """
+    Cola de registros de auditoría con un hilo escritor, como `PredictionWriter`:
+    `record` nunca bloquea y, si la cola se llena, el registro se descarta y se
+    contabiliza en `stats`.
+    """
+
+    def __init__(
+        self,
+        sink: RotatingNDJSONFile,
+        sample_rate: float = 0.0,
+        max_queue: int = 1_000,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.stats = {
+            "recorded": 0,
+            "sampled": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+        }
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        title: str,
+        *,
+        started: float,
+        rows: int,
+        model_version: str = "",
+        params: Optional[Dict[str, Any]] = None,
+        body: Payload = None,
+        response: Payload = None,
+        status_code: int = 200,
+    ) -> bool:
+        """
+        Encola el registro de una petición. `started` es el `time.perf_counter()`
+        de inicio; `body` y `response` se evalúan solo si la petición se muestrea.
+        """
+        if self._closed:
+            return False
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        entry = {
+            "request_id": f"req-{uuid.uuid4().hex[:12]}",
+            "title": title,
+            "body": body if sampled else None,
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "status_code": status_code,
+            "rows": rows,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "model_version": model_version,
+            "params": params or {},
+            "response": response if sampled else None,
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["recorded"] += 1
+        self.stats["sampled"] += int(sampled)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que lo encolado quede escrito; False si vence `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.sink.close()
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                return
+
+            entries = [entry]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                try:
+                    entry = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                entries.append(entry)
+
+            self._write(entries)
+            for _ in entries:
+                self._queue.task_done()
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        lines = []
+        for entry in entries:
+            try:
+                for key in ("body", "response"):
+                    if entry[key] is not None:
+                        entry[key] = entry[key]()
+                lines.append(
+                    json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+                )
+            except Exception as exc:
+                self.stats["failed"] += 1
+                logger.warning(
+                    f"Audit log entry {entry['request_id']} not serializable: {exc}"
+                )
+        try:
+            self.sink.write_lines(lines)
+            self.stats["written"] += len(lines)
+        except OSError as exc:
+            self.stats["failed"] += len(lines)
+            logger.warning(f"Audit log write failed ({len(lines)} entries): {exc}")
+
+
+_audit_log: Optional[AuditLog] = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log() -> Optional[AuditLog]:
+    """Audit log global según `AUDIT_LOG_PATH`; None si está deshabilitado."""
+    global _audit_log
+    if _audit_log is not None:
+        return _audit_log
+
+    from app.config import settings
+
+    path = getattr(settings, "AUDIT_LOG_PATH", None)
+    if not path:
+        return None
+    with _audit_log_lock:
+        if _audit_log is None:
+            sink = RotatingNDJSONFile(
+                Path(path),
+                max_bytes=int(getattr(settings, "AUDIT_LOG_MAX_BYTES", 50_000_000)),
+                backups=int(getattr(settings, "AUDIT_LOG_BACKUPS", 5)),
+            )
+            _audit_log = AuditLog(
+                sink, sample_rate=float(getattr(settings, "AUDIT_LOG_SAMPLE_RATE", 0.0))
+            )
+    return _audit_log
+
+
+def close_audit_log() -> None:
+    global _audit_log
+    with _audit_log_lock:
+        if _audit_log is not None:
+            _audit_log.close()
+            _audit_log = None
@@ -0,0 +1,71 @@
+"""
+Calibración de probabilidades y umbral de decisión del modelo exportado.
+
+El entrenamiento ajusta un calibrador (isotónico o Platt) sobre predicciones
+out-of-fold y lo guarda junto al modelo como una tabla de puntos (x, y) en
+`calibration.json`, con el umbral de decisión elegido sobre los scores ya
+calibrados. Aplicarlo es una interpolación lineal vectorizada (`np.interp`)
+sobre el lote completo: no requiere otra llamada al modelo.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+CALIBRATION_FILE = "calibration.json"
+DEFAULT_DECISION_THRESHOLD = 0.5
+
+
+class Calibrator:
+    """Tabla monótona score crudo -> probabilidad calibrada."""
+
+    def __init__(
+        self,
+        x: Any,
+        y: Any,
+        method: str = "isotonic",
+        decision_threshold: float = DEFAULT_DECISION_THRESHOLD,
+    ) -> None:
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape or len(self.x) < 2:
+            raise ValueError(
+                "La tabla de calibración necesita al menos dos puntos (x, y)"
+            )
+        if np.any(np.diff(self.x) < 0):
+            raise ValueError(
+                "Los puntos x de la tabla de calibración deben estar ordenados"
+            )
+        self.method = method
+        self.decision_threshold = float(decision_threshold)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Calibrator":
+        return cls(
+            data["x"],
+            data["y"],
+            method=data.get("method", "isotonic"),
+            decision_threshold=data.get(
+                "decision_threshold", DEFAULT_DECISION_THRESHOLD
+            ),
+        )
+
+    def apply(self, scores: Any) -> np.ndarray:
+        """Calibra un arreglo de scores; fuera de la tabla se usan los extremos."""
+        return np.clip(
+            np.interp(np.asarray(scores, dtype=np.float64), self.x, self.y), 0.0, 1.0
+        )
+
+
+def load_calibrator(path: Path) -> Optional[Calibrator]:
+    """Lee `calibration.json`; None si el modelo exportado no trae calibración."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return Calibrator.from_dict(json.loads(path.read_text(encoding="utf-8")))
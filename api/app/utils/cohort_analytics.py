@@ -0,0 +1,175 @@
+"""
+Agregados por cohorte (batch_id / course / semester) sobre las predicciones persistidas.
+
+Los agregados se calculan sobre el store compartido, no sobre lo que escribió
+cada worker: el store agrupa las filas por cohorte, risk_score, nivel y
+categoría (`read_cohort_counts`, un GROUP BY en SQL o DuckDB) y con esos
+conteos se reconstruyen los contadores cuando tienen más de
+COHORT_ANALYTICS_TTL segundos. Todos los workers responden lo mismo,
+incluidas las escrituras de los demás, con ese retraso máximo. Como el
+risk_score se persiste redondeado a dos decimales, un histograma de 101
+celdas (0.00 ... 1.00) permite responder percentiles exactos e histogramas.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COHORT_DIMENSIONS = ("batch_id", "course", "semester")
+ANALYTICS_COLUMNS = COHORT_DIMENSIONS + ("risk_score", "risk_level", "categoria")
+
+SCORE_CELLS = 101  # risk_score en pasos de 0.01
+HISTOGRAM_BINS = 10
+PERCENTILES = (25, 50, 75, 90)
+
+GroupKey = Tuple[str, Any]
+
+
+class _CohortStats:
+    __slots__ = ("score_counts", "risk_levels", "categories")
+
+    def __init__(self) -> None:
+        self.score_counts = np.zeros(SCORE_CELLS, dtype=np.int64)
+        self.risk_levels: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        n = int(self.score_counts.sum())
+        scores = np.arange(SCORE_CELLS) / (SCORE_CELLS - 1)
+        cumulative = np.cumsum(self.score_counts)
+        percentiles = {}
+        for q in PERCENTILES:
+            # Percentil por rango más cercano sobre las celdas de 0.01
+            rank = max(1, int(np.ceil(q / 100 * n)))
+            percentiles[f"p{q}"] = (
+                float(scores[np.searchsorted(cumulative, rank)]) if n else None
+            )
+
+        # 1.00 cae en el último intervalo, cerrado por la derecha
+        cells_per_bin = (SCORE_CELLS - 1) // HISTOGRAM_BINS
+        histogram = (
+            self.score_counts[:-1].reshape(HISTOGRAM_BINS, cells_per_bin).sum(axis=1)
+        )
+        histogram[-1] += self.score_counts[-1]
+
+        return {
+            "count": n,
+            "mean_risk_score": float(self.score_counts @ scores / n) if n else None,
+            "percentiles": percentiles,
+            "histogram": {
+                "bin_edges": [
+                    round(i / HISTOGRAM_BINS, 2) for i in range(HISTOGRAM_BINS + 1)
+                ],
+                "counts": histogram.tolist(),
+            },
+            "risk_levels": dict(self.risk_levels),
+            "categories": dict(self.categories),
+        }
+
+
+class CohortAnalytics:
+    """Contadores por (dimensión, valor), reconstruidos desde el store tras el TTL."""
+
+    def __init__(self) -> None:
+        self._stats: Dict[GroupKey, _CohortStats] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.loaded_at = None
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Acumula un lote con las columnas de ANALYTICS_COLUMNS; con una columna
+        `n` cada fila cuenta `n` veces (los conteos de `read_cohort_counts`).
+        """
+        df = df[df["risk_score"].notna()]
+        if df.empty:
+            return
+        df = df.assign(
+            _cell=(pd.to_numeric(df["risk_score"]).clip(0, 1) * (SCORE_CELLS - 1))
+            .round()
+            .astype(np.int64),
+            _n=df["n"].astype(np.int64) if "n" in df.columns else 1,
+        )
+
+        with self._lock:
+            for dimension in (None,) + COHORT_DIMENSIONS:
+                keys = df[dimension] if dimension else pd.Series("all", index=df.index)
+                keys = keys.where(keys.notna(), None).astype(object).rename("_key")
+
+                cells = df.groupby([keys, df["_cell"]], dropna=False, sort=False)[
+                    "_n"
+                ].sum()
+                for (value, cell), count in cells.items():
+                    self._group(dimension, value).score_counts[cell] += count
+                for column, attr in (
+                    ("risk_level", "risk_levels"),
+                    ("categoria", "categories"),
+                ):
+                    labels = df[column].dropna()
+                    counts = (
+                        df.loc[labels.index]
+                        .groupby(
+                            [keys.loc[labels.index], labels], dropna=False, sort=False
+                        )["_n"]
+                        .sum()
+                    )
+                    for (value, label), count in counts.items():
+                        counter = getattr(self._group(dimension, value), attr)
+                        counter[label] = counter.get(label, 0) + int(count)
+
+    def load(self, backend: Any) -> None:
+        """Reconstruye los agregados con los conteos agrupados del store."""
+        staged = CohortAnalytics()
+        staged.update(backend.read_cohort_counts())
+        with self._lock:
+            self._stats = staged._stats
+            self.loaded_at = time.monotonic()
+
+    def refresh(self, backend: Any, max_age: float) -> None:
+        """Vuelve a leer el store si los agregados tienen más de `max_age` segundos."""
+        with self._refresh_lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= max_age:
+                self.load(backend)
+
+    def _group(self, dimension: Optional[str], value: Any) -> _CohortStats:
+        key = (dimension or "all", _normalize_key(value))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _CohortStats()
+        return stats
+
+    def summarize(self, group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Resumen por cohorte de la dimensión pedida, o global sin `group_by`."""
+        dimension = group_by or "all"
+        with self._lock:
+            groups = [
+                {"group": value, **stats.summary()}
+                for (dim, value), stats in self._stats.items()
+                if dim == dimension
+            ]
+        return sorted(groups, key=lambda g: (g["group"] is None, str(g["group"])))
+
+
+def _normalize_key(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+cohort_analytics = CohortAnalytics()
@@ -0,0 +1,210 @@
+"""
+Lectura y escritura de formatos columnares (Parquet / Arrow IPC) para predicción batch.
+
+Los archivos se leen por record batches desde el archivo subido (sin cargarlo
+entero en memoria): cada lote se convierte directamente a un DataFrame con las
+columnas requeridas, sin pasar fila a fila por pydantic, y los resultados se
+escriben de forma incremental en el mismo formato, entregando los bytes de
+cada lote a medida que se producen.
+"""
+
+from __future__ import annotations
+
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+from dropout_common.lazy_imports import lazy_import
+
+from app.utils.preprocessing import _normalize_column_name
+
+pd = lazy_import("pandas")
+
+COLUMNAR_BATCH_SIZE = 65_536
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+COLUMNAR_EXTENSIONS = {
+    "parquet": (".parquet", ".pq"),
+    "arrow": (".arrow", ".feather", ".ipc"),
+}
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def _result_schema() -> Any:
+    """Esquema fijo de resultados, para que todos los lotes escritos coincidan."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("student_id", pa.string()),
+            ("outcome", pa.string()),
+            ("risk_score", pa.float64()),
+            ("risk_level", pa.string()),
+            ("categoria", pa.string()),
+            ("matched_categories", pa.list_(pa.string())),
+            ("graduate_probability", pa.float64()),
+            ("dropout_probability", pa.float64()),
+            ("recommendation", pa.string()),
+            ("intervention_steps", pa.string()),
+        ]
+    )
+
+
+def _select_columns(names: Sequence[str], columns: Sequence[str]) -> Dict[str, str]:
+    """Mapea nombre original -> nombre normalizado para las columnas requeridas."""
+    wanted = set(columns)
+    selected: Dict[str, str] = {}
+    for name in names:
+        normalized = _normalize_column_name(name)
+        if normalized in wanted and normalized not in selected.values():
+            selected[name] = normalized
+    return selected
+
+
+def _input_stream(source: Union[bytes, BinaryIO]) -> Any:
+    import pyarrow as pa
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(source)
+    return pa.PythonFile(source, mode="r")
+
+
+def iter_record_batches(
+    source: Union[bytes, BinaryIO],
+    fmt: str,
+    columns: Sequence[str],
+    batch_size: int = COLUMNAR_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Itera el archivo (bytes o un archivo binario con seek, como el spool de
+    un UploadFile) en lotes de como máximo `batch_size` filas, leyendo solo
+    las columnas requeridas y devolviéndolas con nombres normalizados.
+    """
+    import pyarrow as pa
+
+    stream = _input_stream(source)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(stream)
+        selected = _select_columns(parquet_file.schema_arrow.names, columns)
+        batches: Iterator[Any] = parquet_file.iter_batches(
+            batch_size=batch_size, columns=list(selected)
+        )
+    elif fmt == "arrow":
+        import pyarrow.ipc as ipc
+
+        try:
+            reader: Any = ipc.open_file(stream)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            stream.seek(0)
+            reader = ipc.open_stream(stream)
+            batches = iter(reader)
+        selected = _select_columns(reader.schema.names, columns)
+        batches = (batch.select(list(selected)) for batch in batches)
+    else:
+        raise ValueError(f"Formato columnar no soportado: {fmt}")
+
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            df = batch.slice(offset, batch_size).to_pandas()
+            df.columns = [selected[name] for name in df.columns]
+            yield df
+
+
+def validate_columnar_frame(df: pd.DataFrame, required: Sequence[str]) -> None:
+    """Valida de forma vectorizada que las columnas requeridas existan sin nulos."""
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas: {missing}")
+
+    null_counts = df[list(required)].isna().sum()
+    with_nulls = null_counts[null_counts > 0]
+    if not with_nulls.empty:
+        raise ValueError(f"Columnas con valores vacíos: {with_nulls.to_dict()}")
+
+
+def details_to_record_batch(details: List[Dict[str, Any]]) -> Any:
+    """Convierte los detalles de riesgo de un lote a un RecordBatch de resultados."""
+    import pyarrow as pa
+
+    probabilities = [d.get("class_probabilities") or {} for d in details]
+    data = {
+        "student_id": [d.get("student_id") for d in details],
+        "outcome": [d.get("outcome") for d in details],
+        "risk_score": [d.get("risk_score") for d in details],
+        "risk_level": [d.get("risk_level") for d in details],
+        "categoria": [d.get("categoria") for d in details],
+        "matched_categories": [d.get("matched_categories") for d in details],
+        "graduate_probability": [p.get("Graduate") for p in probabilities],
+        "dropout_probability": [p.get("Dropout") for p in probabilities],
+        "recommendation": [d.get("recommendation") for d in details],
+        "intervention_steps": [d.get("intervention_steps") for d in details],
+    }
+    return pa.RecordBatch.from_pydict(data, schema=_result_schema())
+
+
+class _ChunkSink:
+    """
+    Destino de escritura que acumula solo los bytes aún no entregados
+    (`drain`); `tell` cuenta todo lo escrito, como necesita el footer de Parquet.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ColumnarResultWriter:
+    """
+    Escribe lotes de resultados en Parquet o Arrow IPC (stream); `write`
+    retorna los bytes listos para enviar, así que en memoria solo queda el
+    lote en curso.
+    """
+
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+        self._sink = _ChunkSink()
+        self._writer: Optional[Any] = None
+
+    def write(self, batch: Any) -> bytes:
+        if self._writer is None:
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self._sink, batch.schema)
+            else:
+                import pyarrow.ipc as ipc
+
+                self._writer = ipc.new_stream(self._sink, batch.schema)
+        self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Cierra el archivo (footer Parquet o fin del stream) y retorna el resto."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self._sink.drain()
@@ -0,0 +1,260 @@
+"""
+Artefacto de serving con el ensamble de árboles aplanado en arreglos NumPy.
+
+Cada nodo de todos los árboles ocupa una posición en arreglos planos
+(feature, threshold, children, default_left, value) guardados como .npy.
+Al cargarlos con `np.load(mmap_mode="r")` los workers y las versiones de
+modelo comparten las páginas del page cache en lugar de deserializar cada
+uno su propia copia en el heap; la carga es prácticamente instantánea.
+
+La predicción recorre todos los árboles a la vez, un nivel por iteración
+(árboles en el eje externo y filas en el interno, en bloques que caben en
+caché), con la misma regla de corte que el modelo original (XGBoost: x < umbral en
+float32; scikit-learn: x <= umbral en float64), de modo que las hojas
+alcanzadas coinciden exactamente.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COMPILED_DIR_NAME = "compiled"
+COMPILED_FORMAT_VERSION = 1
+COMPILED_ARRAYS = ("feature", "threshold", "children", "default_left", "value", "roots")
+PREDICT_CHUNK_ROWS = 1_024
+
+
+def _xgboost_arrays(model: Any) -> Dict[str, Any]:
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    objective = config["learner"]["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Unsupported XGBoost objective for compilation: {objective}")
+
+    dump = json.loads(booster.save_raw("json"))
+    learner = dump["learner"]
+    trees = learner["gradient_booster"]["model"]["trees"]
+    base_score = float(
+        str(learner["learner_model_param"]["base_score"]).strip("[]").split(",")[0]
+    )
+
+    nodes = []
+    for tree in trees:
+        left = np.asarray(tree["left_children"], dtype=np.int32)
+        nodes.append(
+            {
+                "feature": np.asarray(tree["split_indices"], dtype=np.int32),
+                # En las hojas split_conditions guarda el valor de la hoja
+                "threshold": np.asarray(tree["split_conditions"], dtype=np.float32),
+                "left": left,
+                "right": np.asarray(tree["right_children"], dtype=np.int32),
+                "default_left": np.asarray(tree["default_left"], dtype=bool),
+                "value": np.where(
+                    left == -1,
+                    np.asarray(tree["split_conditions"], dtype=np.float32),
+                    0,
+                ).astype(np.float32),
+            }
+        )
+    return {
+        "kind": "xgboost",
+        "split_rule": "<",
+        "base_margin": float(np.log(base_score / (1 - base_score))),
+        "feature_names": list(booster.feature_names or []),
+        "nodes": nodes,
+    }
+
+
+def _random_forest_arrays(model: Any) -> Dict[str, Any]:
+    nodes = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int32)
+        counts = tree.value[:, 0, :]
+        proba = counts[:, 1] / counts.sum(axis=1)
+        missing_left = getattr(tree, "missing_go_to_left", None)
+        nodes.append(
+            {
+                "feature": np.maximum(tree.feature, 0).astype(np.int32),
+                "threshold": tree.threshold.astype(np.float64),
+                "left": left,
+                "right": tree.children_right.astype(np.int32),
+                "default_left": (
+                    np.zeros(len(left), dtype=bool)
+                    if missing_left is None
+                    else missing_left.astype(bool)
+                ),
+                "value": np.where(left == -1, proba, 0).astype(np.float64),
+            }
+        )
+    return {
+        "kind": "random_forest",
+        "split_rule": "<=",
+        "base_margin": 0.0,
+        "feature_names": [
+            str(name) for name in getattr(model, "feature_names_in_", [])
+        ],
+        "nodes": nodes,
+    }
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = np.zeros(len(left), dtype=np.int32)
+    for node in range(len(left)):  # los hijos siempre tienen índice mayor que el padre
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def compile_model(model: Any, directory: Path, model_version: str = "") -> Path:
+    """Aplana el ensamble de `model` y lo guarda en `directory` como arreglos .npy."""
+    if hasattr(model, "get_booster"):
+        spec = _xgboost_arrays(model)
+    elif hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        spec = _random_forest_arrays(model)
+    else:
+        raise ValueError(
+            f"Unsupported model type for compilation: {type(model).__name__}"
+        )
+
+    arrays: Dict[str, list] = {name: [] for name in COMPILED_ARRAYS if name != "roots"}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in spec["nodes"]:
+        left, right = tree["left"], tree["right"]
+        max_depth = max(max_depth, _tree_depth(left, right))
+        is_leaf = left == -1
+        own = np.arange(len(left))
+        # Hijos intercalados [izq, der] por nodo: el siguiente nodo es
+        # children[2 * nodo + va_derecha]. Las hojas apuntan a sí mismas: el
+        # recorrido por niveles se queda quieto al llegar.
+        children = np.stack(
+            [np.where(is_leaf, own, left), np.where(is_leaf, own, right)], axis=1
+        )
+        # Índices en intp para que np.take no convierta en cada nivel
+        arrays["children"].append((children + offset).reshape(-1).astype(np.intp))
+        arrays["feature"].append(np.where(is_leaf, 0, tree["feature"]).astype(np.intp))
+        arrays["threshold"].append(tree["threshold"])
+        arrays["default_left"].append(tree["default_left"])
+        arrays["value"].append(tree["value"])
+        roots.append(offset)
+        offset += len(left)
+
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    for name, parts in arrays.items():
+        np.save(tmp_dir / f"{name}.npy", np.concatenate(parts))
+    np.save(tmp_dir / "roots.npy", np.asarray(roots, dtype=np.intp))
+    meta = {
+        "format_version": COMPILED_FORMAT_VERSION,
+        "kind": spec["kind"],
+        "split_rule": spec["split_rule"],
+        "base_margin": spec["base_margin"],
+        "feature_names": spec["feature_names"],
+        "n_trees": len(roots),
+        "max_depth": max_depth,
+        "model_version": model_version,
+    }
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    if directory.exists():
+        for path in directory.iterdir():
+            path.unlink()
+        directory.rmdir()
+    tmp_dir.rename(directory)
+    return directory
+
+
+def read_compiled_meta(directory: Path) -> Dict[str, Any]:
+    meta_path = Path(directory) / "meta.json"
+    if not meta_path.exists():
+        return {}
+    return json.loads(meta_path.read_text(encoding="utf-8"))
+
+
+class CompiledEnsemble:
+    """Ensamble compilado de solo lectura con el `predict_proba` del modelo original."""
+
+    def __init__(self, directory: Path, mmap: bool = True) -> None:
+        self.directory = Path(directory)
+        self.meta = read_compiled_meta(self.directory)
+        if self.meta.get("format_version") != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format in {self.directory}")
+        mode = "r" if mmap else None
+        for name in COMPILED_ARRAYS:
+            setattr(self, name, np.load(self.directory / f"{name}.npy", mmap_mode=mode))
+        self.feature_names: Sequence[str] = self.meta["feature_names"]
+        self.max_depth: int = self.meta["max_depth"]
+        self.version: str = self.meta.get("model_version", "")
+
+    def _aggregate(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        x_flat = X.reshape(-1)
+        # Índice plano (fila, feature) para gathers 1-D con np.take, más baratos que 2-D
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[None, :]
+        idx = np.repeat(np.asarray(self.roots)[:, None], n_rows, axis=1)
+        strict = self.meta["split_rule"] == "<"
+        for _ in range(self.max_depth):
+            x = np.take(x_flat, row_offsets + np.take(self.feature, idx))
+            threshold = np.take(self.threshold, idx)
+            go_right = ~(x < threshold) if strict else ~(x <= threshold)
+            missing = np.isnan(x)
+            if missing.any():
+                go_right = np.where(missing, ~np.take(self.default_left, idx), go_right)
+            idx = np.take(self.children, 2 * idx + go_right)
+        leaves = np.take(self.value, idx)
+        if self.meta["kind"] == "xgboost":
+            # Suma secuencial en float32, árbol por árbol, como el predictor de XGBoost
+            margin = np.full(n_rows, self.meta["base_margin"], dtype=np.float32)
+            for tree_leaves in leaves:
+                margin += tree_leaves
+            return 1.0 / (1.0 + np.exp(-margin))
+        return leaves.mean(axis=0)
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names:
+                X = X[list(self.feature_names)]
+            X = X.to_numpy()
+        dtype = np.float32 if self.meta["kind"] == "xgboost" else np.float64
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(dtype, copy=False)
+        positive = np.concatenate(
+            [
+                self._aggregate(X[start : start + PREDICT_CHUNK_ROWS])
+                for start in range(0, len(X), PREDICT_CHUNK_ROWS)
+            ]
+            or [np.empty(0)]
+        )
+        return np.column_stack([1.0 - positive, positive])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compila el modelo MLflow exportado en `<model_dir>/compiled`:
+    `python -m app.utils.compiled_model ../prod_model/modelo_final`
+    """
+    import mlflow.pyfunc
+    from mlflow.models import Model
+
+    args = sys.argv[1:] if argv is None else argv
+    model_dir = Path(args[0])
+    metadata = Model.load(str(model_dir))
+    # Misma prioridad que model_loader.get_model_version
+    version = getattr(metadata, "model_id", None) or metadata.run_id or "local-model"
+    model = mlflow.pyfunc.load_model(str(model_dir)).get_raw_model()
+    target = compile_model(model, model_dir / COMPILED_DIR_NAME, model_version=version)
+    print(f"Compiled model {version} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Deduplicación de filas idénticas dentro de un lote.
+
+Los CSV de una institución suelen traer muchos estudiantes con exactamente
+las mismas variables (p. ej. primer año con todas las unidades curriculares
+en 0). `unique_rows` agrupa las filas iguales con `np.unique` sobre una
+vista estructurada de la matriz (cada fila como un único bloque de bytes),
+de modo que el modelo y las reglas se evalúan una vez por fila distinta y
+el resultado se reparte al orden original con `RowGroups.scatter`.
+
+`dedup_stats` acumula filas recibidas y filas distintas desde que arrancó el
+proceso (`GET /monitoring/dedup`).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+
+class RowGroups:
+    """Filas distintas de un lote: `first` indexa el lote y `inverse` lo reconstruye."""
+
+    __slots__ = ("n_rows", "first", "inverse")
+
+    def __init__(self, n_rows: int, first: Any, inverse: Any) -> None:
+        self.n_rows = n_rows
+        self.first = first
+        self.inverse = inverse
+
+    @property
+    def n_unique(self) -> int:
+        return len(self.first)
+
+    @property
+    def is_identity(self) -> bool:
+        return self.n_unique == self.n_rows
+
+    @property
+    def ratio(self) -> float:
+        """Filas por fila distinta (1.0 = sin duplicados)."""
+        return self.n_rows / self.n_unique if self.n_unique else 1.0
+
+    def scatter(self, values: Any) -> Any:
+        """Reparte un resultado por fila distinta (array o lista) al orden del lote."""
+        if self.is_identity:
+            return values
+        if isinstance(values, list):
+            return [values[i] for i in self.inverse.tolist()]
+        return np.asarray(values)[self.inverse]
+
+
+def unique_rows(values: Any) -> RowGroups:
+    """
+    Agrupa las filas idénticas de una matriz numérica 2D (array o DataFrame).
+    La comparación es por bytes: -0.0 se normaliza a 0.0 y NaN con NaN agrupa
+    cuando comparten representación, como los que produce pandas.
+    """
+    matrix = np.asarray(values)
+    n_rows = len(matrix)
+    if n_rows <= 1 or matrix.ndim != 2 or matrix.dtype.kind not in "biuf":
+        return RowGroups(n_rows, np.arange(n_rows), np.arange(n_rows))
+
+    # `+ 0.0` convierte -0.0 en 0.0 para que ambos compartan representación
+    matrix = np.ascontiguousarray(matrix + 0.0 if matrix.dtype.kind == "f" else matrix)
+    rows = matrix.view(
+        np.dtype((np.void, matrix.dtype.itemsize * matrix.shape[1]))
+    ).reshape(-1)
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    return RowGroups(n_rows, first, inverse.reshape(-1))
+
+
+class DedupStats:
+    """Contadores acumulados de filas puntuadas y filas distintas del proceso."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.unique_rows = 0
+
+    def record(self, groups: RowGroups) -> None:
+        with self._lock:
+            self.batches += 1
+            self.rows += groups.n_rows
+            self.unique_rows += groups.n_unique
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "unique_rows": self.unique_rows,
+                "dedup_ratio": round(self.rows / self.unique_rows, 4)
+                if self.unique_rows
+                else None,
+            }
+
+
+dedup_stats = DedupStats()
@@ -0,0 +1,248 @@
+"""
+Monitoreo de drift de las variables del modelo y del risk_score.
+
+El entrenamiento exporta junto al modelo `drift_reference.json`: para cada
+una de las 16 variables y para el risk_score, los cortes de los intervalos
+(cuantiles de train, o puntos medios entre valores si la variable es
+discreta) y los conteos de referencia en cada intervalo. El API mantiene un
+histograma de conteos sobre esos mismos intervalos por variable: actualizarlo
+es un `searchsorted` + `bincount` por lote, la memoria es fija (intervalos + 1
+celda de faltantes por variable) y dos monitores se combinan sumando conteos.
+
+Cada worker de gunicorn tiene su propio monitor: con DRIFT_STATE_DIR un hilo
+de cada worker guarda sus conteos en `drift.<pid>.json` cada
+DRIFT_SAVE_INTERVAL segundos (fuera del request) y `/monitoring/drift` suma
+los de todos los workers (`DriftMonitor.combined`), con ese retraso máximo
+para los conteos de los demás.
+
+Con esos histogramas se reportan PSI (con la celda de faltantes) y KS sobre
+la CDF por intervalos, que es una cota inferior del KS exacto.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dropout_common.lazy_imports import lazy_import
+from loguru import logger
+
+np = lazy_import("numpy")
+
+DRIFT_REFERENCE_FILE = "drift_reference.json"
+RISK_SCORE = "risk_score"
+PSI_EPSILON = 1e-4
+DRIFT_STATE_GLOB = "drift.*.json"
+# Umbrales habituales de PSI: < 0.1 estable, < 0.25 moderado, resto significativo
+PSI_THRESHOLDS = ((0.1, "stable"), (0.25, "moderate"))
+
+
+def bin_counts(values: Any, edges: Any) -> np.ndarray:
+    """Conteos por intervalo (cerrado por la izquierda) más una celda de faltantes."""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    counts = np.bincount(
+        np.searchsorted(edges, values[~missing], side="right"), minlength=len(edges) + 1
+    )
+    return np.append(counts, missing.sum()).astype(np.int64)
+
+
+def psi(expected: np.ndarray, observed: np.ndarray) -> float:
+    """Population Stability Index entre dos conteos sobre los mismos intervalos."""
+    e = np.clip(expected / expected.sum(), PSI_EPSILON, None)
+    o = np.clip(observed / observed.sum(), PSI_EPSILON, None)
+    return float(np.sum((o - e) * np.log(o / e)))
+
+
+def ks(expected: np.ndarray, observed: np.ndarray) -> Optional[float]:
+    """Máxima distancia entre CDFs por intervalos (sin la celda de faltantes)."""
+    e, o = expected[:-1], observed[:-1]
+    if not e.sum() or not o.sum():
+        return None
+    return float(np.max(np.abs(np.cumsum(e) / e.sum() - np.cumsum(o) / o.sum())))
+
+
+def psi_status(value: Optional[float]) -> str:
+    if value is None:
+        return "no_data"
+    for threshold, status in PSI_THRESHOLDS:
+        if value < threshold:
+            return status
+    return "significant"
+
+
+def drift_state_path(directory: Path, pid: Optional[int] = None) -> Path:
+    """Archivo de conteos de un worker dentro del directorio compartido."""
+    return Path(directory) / f"drift.{os.getpid() if pid is None else pid}.json"
+
+
+def clear_drift_state(directory: Path) -> None:
+    """Borra los conteos de una ejecución anterior (el maestro, antes del fork)."""
+    for path in Path(directory).glob(DRIFT_STATE_GLOB):
+        path.unlink(missing_ok=True)
+
+
+class DriftMonitor:
+    """Histogramas acumulados de producción sobre los intervalos de referencia."""
+
+    def __init__(self, reference: Dict[str, Any]) -> None:
+        self._spec = reference
+        self.version = str(reference.get("version", ""))
+        self._edges: Dict[str, np.ndarray] = {}
+        self._reference: Dict[str, np.ndarray] = {}
+        for name, spec in {
+            **reference["features"],
+            RISK_SCORE: reference[RISK_SCORE],
+        }.items():
+            edges = np.asarray(spec["edges"], dtype=np.float64)
+            counts = np.asarray(spec["counts"], dtype=np.int64)
+            if counts.shape != (len(edges) + 2,):
+                raise ValueError(f"Referencia de drift inválida para '{name}'")
+            self._edges[name] = edges
+            self._reference[name] = counts
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.reset()
+
+    @property
+    def features(self) -> List[str]:
+        return [name for name in self._edges if name != RISK_SCORE]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = {
+                name: np.zeros_like(ref) for name, ref in self._reference.items()
+            }
+            self.rows_observed = 0
+            self.since = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def update(self, matrix: Any, risk_scores: Any) -> None:
+        """Agrega un lote ya puntuado (matriz del modelo y risk_score calibrado)."""
+        batch = {
+            name: bin_counts(matrix[name].to_numpy(dtype=np.float64), self._edges[name])
+            for name in self.features
+            if name in matrix
+        }
+        batch[RISK_SCORE] = bin_counts(risk_scores, self._edges[RISK_SCORE])
+        with self._lock:
+            for name, counts in batch.items():
+                self.counts[name] += counts
+            self.rows_observed += len(matrix)
+
+    def merge(self, other: "DriftMonitor") -> None:
+        """Suma los conteos de otro monitor de igual referencia (otro worker)."""
+        with self._lock:
+            for name, counts in other.counts.items():
+                self.counts[name] += counts
+            self.rows_observed += other.rows_observed
+            self.since = min(self.since, other.since)
+
+    def _merge_state(self, state: Dict[str, Any]) -> None:
+        counts = {
+            name: np.asarray(state["counts"][name], dtype=np.int64)
+            for name in self.counts
+        }
+        if any(counts[name].shape != self.counts[name].shape for name in counts):
+            raise ValueError("Conteos de drift con otros intervalos")
+        with self._lock:
+            for name, values in counts.items():
+                self.counts[name] += values
+            self.rows_observed += int(state["rows_observed"])
+            self.since = min(self.since, str(state["since"]))
+
+    def save(self, directory: Path) -> None:
+        """Escribe los conteos del proceso en `drift.<pid>.json` (reemplazo atómico)."""
+        path = drift_state_path(directory)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with self._save_lock:
+            with self._lock:
+                state = {
+                    "version": self.version,
+                    "since": self.since,
+                    "rows_observed": self.rows_observed,
+                    "counts": {
+                        name: counts.tolist() for name, counts in self.counts.items()
+                    },
+                }
+            tmp.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def start_autosave(self, directory: Path, interval: float) -> None:
+        """Crea `directory` y guarda los conteos cada `interval` s en otro hilo."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        threading.Thread(
+            target=self._autosave,
+            args=(directory, interval),
+            name="drift-autosave",
+            daemon=True,
+        ).start()
+
+    def _autosave(self, directory: Path, interval: float) -> None:
+        saved_rows = 0
+        while True:
+            time.sleep(interval)
+            if self.rows_observed == saved_rows:
+                continue
+            saved_rows = self.rows_observed
+            try:
+                self.save(directory)
+            except OSError as exc:
+                logger.warning(f"Could not save drift counts to {directory}: {exc}")
+
+    def combined(self, directory: Path) -> "DriftMonitor":
+        """
+        Monitor nuevo con los conteos de este proceso más los guardados por los
+        demás workers en `directory`. Se ignoran archivos de otra referencia o
+        ilegibles (p. ej. borrados mientras se leían).
+        """
+        total = DriftMonitor(self._spec)
+        total.merge(self)
+        own = drift_state_path(directory)
+        for path in sorted(Path(directory).glob(DRIFT_STATE_GLOB)):
+            if path == own:
+                continue
+            try:
+                state = json.loads(path.read_text(encoding="utf-8"))
+                if state.get("version") == self.version:
+                    total._merge_state(state)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+        return total
+
+    def _summary(self, name: str) -> Dict[str, Any]:
+        observed = self.counts[name]
+        n = int(observed.sum())
+        value = psi(self._reference[name], observed) if n else None
+        return {
+            "feature": name,
+            "psi": None if value is None else round(value, 6),
+            "ks": ks(self._reference[name], observed) if n else None,
+            "status": psi_status(value),
+            "n_observed": n,
+            "missing_rate": float(observed[-1] / n) if n else None,
+            "counts": observed.tolist(),
+        }
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "reference_version": self.version,
+                "since": self.since,
+                "rows_observed": self.rows_observed,
+                "features": [self._summary(name) for name in self.features],
+                "risk_score": self._summary(RISK_SCORE),
+            }
+
+
+def load_drift_monitor(path: Path) -> Optional[DriftMonitor]:
+    """Monitor con la referencia exportada con el modelo; None si no la trae."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return DriftMonitor(json.loads(path.read_text(encoding="utf-8")))
@@ -0,0 +1,72 @@
+"""
+Cache de feature_importance.json ya serializado para el endpoint /feature-importance.
+
+El archivo se lee, valida y serializa una sola vez; solo se vuelve a leer si
+cambia en disco (mtime/tamaño), p. ej. cuando se despliega un nuevo modelo.
+Cada entrada guarda su ETag y Last-Modified para responder 304.
+"""
+
+import hashlib
+import json
+from email.utils import formatdate
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from app.utils.model_loader import MODEL_DIR
+
+MODEL_FEATURE_IMPORTANCE_PATH = MODEL_DIR / "feature_importance.json"
+
+
+class FeatureImportanceEntry:
+    """Respuesta pre-serializada junto a sus validadores HTTP."""
+
+    def __init__(self, body: bytes, mtime: float) -> None:
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "Cache-Control": "no-cache",
+        }
+
+
+class FeatureImportanceCache:
+    def __init__(self) -> None:
+        self._entries: Dict[Path, Tuple[Tuple[int, int], FeatureImportanceEntry]] = {}
+        self._lock = Lock()
+
+    def get(self, path: Path) -> Optional[FeatureImportanceEntry]:
+        """
+        Retorna la entrada cacheada de `path`, o None si el archivo no existe.
+        Lanza json.JSONDecodeError si el archivo no es un JSON válido.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            )
+            entry = FeatureImportanceEntry(body, stat.st_mtime)
+            self._entries[path] = (key, entry)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+feature_importance_cache = FeatureImportanceCache()
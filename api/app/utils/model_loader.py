@@ -1,11 +1,33 @@
+from __future__ import annotations
+
 import json
 import re
+from collections import OrderedDict
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
-
-import numpy as np
-import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+from dropout_common.lazy_imports import lazy_import
+from dropout_common.onnx_model import ONNX_FILE_NAME, OnnxModel, load_onnx_model
+from loguru import logger
+
+from app.utils.calibration import (
+    CALIBRATION_FILE,
+    DEFAULT_DECISION_THRESHOLD,
+    Calibrator,
+    load_calibrator,
+)
+from app.utils.compiled_model import (
+    COMPILED_DIR_NAME,
+    CompiledEnsemble,
+    read_compiled_meta,
+)
+from app.utils.dedup import dedup_stats, unique_rows
+from app.utils.drift import DRIFT_REFERENCE_FILE, DriftMonitor, load_drift_monitor
+from app.utils.preprocessing import MODEL_FEATURES, to_model_matrix
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 LOCAL_MODEL_DIR = Path(__file__).resolve().parent.parent / "model"
 
@@ -29,22 +51,34 @@ def _resolve_model_dir() -> tuple[Path, str]:
 
 MODEL_DIR, model_source = _resolve_model_dir()
 MLMODEL_PATH = MODEL_DIR / "MLmodel"
+COMPILED_MODEL_DIR = MODEL_DIR / COMPILED_DIR_NAME
+CALIBRATION_PATH = MODEL_DIR / CALIBRATION_FILE
+DRIFT_REFERENCE_PATH = MODEL_DIR / DRIFT_REFERENCE_FILE
+ONNX_MODEL_PATH = MODEL_DIR / ONNX_FILE_NAME
 
+# MODEL_BACKEND: "native" (MLflow; "auto" es un alias), "compiled" (árboles con
+# memory-map: menos memoria por worker, ~4x más lento que XGBoost nativo) u
+# "onnx" (ONNX Runtime). Si el artefacto elegido no está, se usa MLflow.
+MODEL_BACKENDS = ("auto", "native", "compiled", "onnx")
 
-def _read_mlmodel_value(key: str, default: str = "local-model") -> str:
+
+@lru_cache(maxsize=1)
+def _read_mlmodel_values() -> Dict[str, str]:
+    """Pares `llave: valor` del MLmodel, leídos una sola vez por proceso."""
     if not MLMODEL_PATH.exists():
-        return default
+        return {}
 
     try:
         lines = MLMODEL_PATH.read_text(encoding="utf-8").splitlines()
     except OSError:
-        return default
+        return {}
 
+    values: Dict[str, str] = {}
     for line in lines:
-        stripped = line.strip()
-        if stripped.startswith(f"{key}:"):
-            return stripped.split(":", 1)[1].strip().strip("'\"")
-    return default
+        key, sep, value = line.strip().partition(":")
+        if sep and key not in values:
+            values[key] = value.strip().strip("'\"")
+    return values
 
 
 def _detect_model_flavor() -> str:
@@ -71,7 +105,8 @@ def _detect_model_flavor() -> str:
 
 def get_model_version() -> str:
     # Prioriza model_id del artefacto exportado para trazabilidad.
-    return _read_mlmodel_value("model_id", _read_mlmodel_value("run_id", "local-model"))
+    values = _read_mlmodel_values()
+    return values.get("model_id") or values.get("run_id") or "local-model"
 
 
 model_version = get_model_version()
@@ -105,22 +140,306 @@ def _load_model() -> Any:
     raise ValueError(f"Unsupported MLflow model flavor in MLmodel: {flavor}")
 
 
-def make_prediction(input_data: pd.DataFrame) -> Dict[str, Any]:
+@lru_cache(maxsize=1)
+def _load_compiled_model() -> Optional[CompiledEnsemble]:
+    """
+    Ensamble compilado (arreglos con memory-map) de la versión cargada, si existe.
+    Un artefacto de otra versión se ignora para no servir árboles desactualizados.
+    """
+    meta = read_compiled_meta(COMPILED_MODEL_DIR)
+    if not meta:
+        return None
+    if meta.get("model_version") != model_version:
+        logger.warning(
+            f"Ignoring compiled model for version {meta.get('model_version')} "
+            f"(loaded model is {model_version})"
+        )
+        return None
+    return CompiledEnsemble(COMPILED_MODEL_DIR)
+
+
+def _model_backend() -> str:
+    from app.config import settings
+
+    backend = str(getattr(settings, "MODEL_BACKEND", "native") or "native").lower()
+    if backend not in MODEL_BACKENDS:
+        logger.warning(f"Unknown MODEL_BACKEND '{backend}', using 'native'")
+        return "native"
+    return "native" if backend == "auto" else backend
+
+
+@lru_cache(maxsize=1)
+def _load_onnx_model() -> Optional[OnnxModel]:
+    """
+    Sesión de ONNX Runtime de la versión cargada, si existe. Igual que con el
+    compilado, un model.onnx de otra versión se ignora.
+    """
+    from app.config import settings
+
+    try:
+        model = load_onnx_model(
+            ONNX_MODEL_PATH, int(getattr(settings, "ONNX_INTRA_OP_THREADS", 0) or 0)
+        )
+    except ImportError as exc:
+        logger.warning(
+            f"onnxruntime is not available ({exc}); falling back to the MLflow model"
+        )
+        return None
+    if model is None:
+        logger.warning(f"{ONNX_MODEL_PATH} not found; falling back to the MLflow model")
+        return None
+    if model.version != model_version:
+        logger.warning(
+            f"Ignoring ONNX model for version {model.version} "
+            f"(loaded model is {model_version})"
+        )
+        return None
+    return model
+
+
+def _load_serving_model() -> Any:
+    """
+    Modelo para puntuar según MODEL_BACKEND: la sesión ONNX o el compilado
+    solo si se eligieron y están disponibles; si no, el de MLflow.
+    """
+    backend = _model_backend()
+    if backend == "onnx":
+        onnx_model = _load_onnx_model()
+        if onnx_model is not None:
+            return onnx_model
+    elif backend == "compiled":
+        compiled = _load_compiled_model()
+        if compiled is not None:
+            return compiled
+        logger.warning(
+            f"No compiled model in {COMPILED_MODEL_DIR}; "
+            "falling back to the MLflow model"
+        )
+    return _load_model()
+
+
+@lru_cache(maxsize=1)
+def _load_calibrator() -> Optional[Calibrator]:
+    """Calibración exportada junto al modelo; sin ella se sirven los scores crudos."""
+    try:
+        return load_calibrator(CALIBRATION_PATH)
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning(
+            f"Ignoring invalid calibration artifact {CALIBRATION_PATH}: {exc}"
+        )
+        return None
+
+
+def decision_threshold() -> float:
+    """Umbral de `risk_score` a partir del cual el outcome es Dropout."""
+    calibrator = _load_calibrator()
+    return (
+        calibrator.decision_threshold
+        if calibrator is not None
+        else DEFAULT_DECISION_THRESHOLD
+    )
+
+
+@lru_cache(maxsize=1)
+def drift_monitor() -> Optional[DriftMonitor]:
+    """
+    Monitor de drift del proceso; None si el modelo exportado no trae referencia.
+    Con DRIFT_STATE_DIR sus conteos se guardan periódicamente desde un hilo.
+    """
+    from app.config import settings
+
     try:
-        model = _load_model()
-        probabilities = model.predict_proba(input_data)
-        probabilities = np.asarray(probabilities)
+        monitor = load_drift_monitor(DRIFT_REFERENCE_PATH)
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning(
+            f"Ignoring invalid drift reference {DRIFT_REFERENCE_PATH}: {exc}"
+        )
+        return None
+    state_dir = drift_state_dir()
+    if monitor is not None and state_dir is not None:
+        try:
+            monitor.start_autosave(
+                state_dir, float(getattr(settings, "DRIFT_SAVE_INTERVAL", 5.0))
+            )
+        except OSError as exc:
+            logger.warning(
+                f"Drift counts will not be shared, {state_dir} unusable: {exc}"
+            )
+    return monitor
+
+
+def drift_state_dir() -> Optional[Path]:
+    """Directorio de conteos de drift compartido por los workers, o None."""
+    from app.config import settings
+
+    directory = str(getattr(settings, "DRIFT_STATE_DIR", "") or "")
+    return Path(directory) if directory else None
+
+
+def set_model_threads(n_threads: int) -> None:
+    """
+    Limita los hilos de inferencia del modelo cargado. Con varios workers cada
+    proceso debe usar núcleos / workers hilos para no sobre-suscribir la CPU.
+    """
+    model = _load_serving_model()
+    if isinstance(model, OnnxModel):
+        model.set_threads(n_threads)
+    if hasattr(model, "get_booster"):
+        model.get_booster().set_param({"nthread": n_threads})
+    if hasattr(model, "n_jobs"):
+        model.set_params(n_jobs=n_threads)
+
+
+# Contribución explicada por feature: lista de {"feature", "contribution"} por fila.
+Explanation = List[Dict[str, Any]]
+
+EXPLANATION_TOP_K = 3
+EXPLANATION_CACHE_SIZE = 100_000
+
+
+class _ExplanationCache:
+    """
+    LRU acotado con (probabilidad, contribuciones) por vector de variables.
 
-        if probabilities.ndim == 2 and probabilities.shape[1] > 1:
-            risk_probs = probabilities[:, 1]
+    La llave son los bytes float32 de la fila más la versión del modelo, de
+    modo que un estudiante ya explicado no vuelve a pasar por TreeSHAP.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, Tuple[float, np.ndarray]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[Tuple[float, np.ndarray]]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: Tuple[float, np.ndarray]) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+explanation_cache = _ExplanationCache(EXPLANATION_CACHE_SIZE)
+
+
+def _row_keys(values: np.ndarray) -> List[bytes]:
+    """Bytes de cada fila (vista np.void, sin bucle Python por columna)."""
+    row_view = np.ascontiguousarray(values).view(
+        np.dtype((np.void, values.dtype.itemsize * values.shape[1]))
+    )
+    prefix = model_version.encode()
+    return [prefix + key for key in row_view.ravel().tolist()]
+
+
+def _top_contributions(contribs: np.ndarray, top_k: int) -> List[Explanation]:
+    """Top-k features por |contribución| (sin el término de sesgo) para cada fila."""
+    k = min(top_k, contribs.shape[1])
+    order = np.argsort(-np.abs(contribs), axis=1, kind="stable")[:, :k]
+    top_values = np.take_along_axis(contribs, order, axis=1)
+    return [
+        [
+            {"feature": MODEL_FEATURES[j], "contribution": round(float(v), 4)}
+            for j, v in zip(idx_row, val_row)
+        ]
+        for idx_row, val_row in zip(order.tolist(), top_values.tolist())
+    ]
+
+
+def predict_with_contributions(
+    model: Any,
+    matrix: pd.DataFrame,
+    top_k: int = EXPLANATION_TOP_K,
+) -> Tuple[np.ndarray, List[Explanation]]:
+    """
+    Probabilidad de abandono y contribuciones TreeSHAP (`pred_contribs`) en una
+    sola pasada sobre el mismo DMatrix. Solo se calculan las filas que no estén
+    en `explanation_cache`.
+    """
+    import xgboost as xgb
+
+    values = matrix.to_numpy(dtype=np.float32)
+    keys = _row_keys(values)
+    probabilities = np.empty(len(values), dtype=np.float64)
+    contributions = np.empty((len(values), values.shape[1]), dtype=np.float32)
+
+    misses = []
+    for i, key in enumerate(keys):
+        cached = explanation_cache.get(key)
+        if cached is None:
+            misses.append(i)
         else:
-            risk_probs = probabilities.reshape(-1)
+            probabilities[i], contributions[i] = cached
+
+    if misses:
+        booster = model.get_booster()
+        dmatrix = xgb.DMatrix(values[misses], feature_names=list(matrix.columns))
+        miss_probs = booster.predict(dmatrix)
+        # La última columna de pred_contribs es el sesgo (valor esperado).
+        miss_contribs = booster.predict(dmatrix, pred_contribs=True)[:, :-1]
+        probabilities[misses] = miss_probs
+        contributions[misses] = miss_contribs
+        for i, prob, contrib in zip(misses, miss_probs.tolist(), miss_contribs):
+            explanation_cache.put(keys[i], (prob, contrib))
+
+    return probabilities, _top_contributions(contributions, top_k)
+
+
+def make_prediction(
+    input_data: pd.DataFrame,
+    explain: bool = False,
+    top_k: int = EXPLANATION_TOP_K,
+) -> Dict[str, Any]:
+    try:
+        # TreeSHAP necesita el booster nativo; las probabilidades, solo los
+        # árboles compilados
+        model = _load_model() if explain else _load_serving_model()
+        matrix = to_model_matrix(input_data)
+        contributions = None
+
+        # Filas idénticas se puntúan una sola vez y el resultado se reparte
+        groups = unique_rows(matrix)
+        dedup_stats.record(groups)
+        unique_matrix = matrix if groups.is_identity else matrix.iloc[groups.first]
+
+        if explain and hasattr(model, "get_booster"):
+            risk_probs, contributions = predict_with_contributions(
+                model, unique_matrix, top_k
+            )
+            contributions = groups.scatter(contributions)
+        else:
+            probabilities = np.asarray(model.predict_proba(unique_matrix))
+            if probabilities.ndim == 2 and probabilities.shape[1] > 1:
+                risk_probs = probabilities[:, 1]
+            else:
+                risk_probs = probabilities.reshape(-1)
+
+        calibrator = _load_calibrator()
+        if calibrator is not None:
+            risk_probs = calibrator.apply(risk_probs)
+        risk_probs = groups.scatter(risk_probs)
+
+        monitor = drift_monitor()
+        if monitor is not None:
+            try:
+                monitor.update(matrix, risk_probs)
+            except Exception as exc:
+                logger.warning(f"Drift monitor update failed: {exc}")
 
         predictions = [float(x) for x in risk_probs.tolist()]
         return {
             "errors": None,
             "version": model_version,
             "predictions": predictions,
+            "contributions": contributions,
+            "decision_threshold": decision_threshold(),
+            "rows_unique": groups.n_unique,
+            "dedup_ratio": round(groups.ratio, 4),
         }
     except Exception as exc:  # pragma: no cover - defensive path
         return {
@@ -128,4 +447,3 @@ def make_prediction(input_data: pd.DataFrame) -> Dict[str, Any]:
             "version": model_version,
             "predictions": None,
         }
-
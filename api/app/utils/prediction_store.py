@@ -0,0 +1,622 @@
+"""
+Persistencia de predicciones en el servidor con escritura diferida (write-behind).
+
+Los endpoints solo encolan el lote ya puntuado; un hilo en segundo plano arma
+las filas y las escribe en bloque en el backend configurado:
+
+- sqlite:///ruta/predictions.db  -> SQLite (tests / despliegues de un nodo)
+- postgresql://usuario@host/db   -> Postgres con pool de conexiones y COPY
+- parquet:///ruta/directorio     -> un archivo Parquet por flush, consultado con DuckDB
+
+La tabla replica `public.predictions` de la migración de Supabase, con índices
+sobre batch_id, student_id y created_at.
+"""
+
+from __future__ import annotations
+
+import abc
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from dropout_common.lazy_imports import lazy_import
+from loguru import logger
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# (columna en la tabla, columna en el DataFrame de entrada, tipo SQLite, tipo Postgres)
+FEATURE_COLUMNS: Tuple[Tuple[str, str, str, str], ...] = (
+    ("age_at_enrollment", "age_at_enrollment", "INTEGER", "INT"),
+    ("gender", "gender", "INTEGER", "INT"),
+    ("displaced", "displaced", "INTEGER", "INT"),
+    ("debtor", "debtor", "INTEGER", "INT"),
+    ("tuition_fees_up_to_date", "tuition_fees_up_to_date", "INTEGER", "INT"),
+    ("scholarship_holder", "scholarship_holder", "INTEGER", "INT"),
+    ("cu_1st_sem_enrolled", "curricular_units_1st_sem_enrolled", "INTEGER", "INT"),
+    ("cu_1st_sem_approved", "curricular_units_1st_sem_approved", "INTEGER", "INT"),
+    ("cu_1st_sem_grade", "curricular_units_1st_sem_grade", "REAL", "NUMERIC"),
+    ("cu_2nd_sem_enrolled", "curricular_units_2nd_sem_enrolled", "INTEGER", "INT"),
+    ("cu_2nd_sem_approved", "curricular_units_2nd_sem_approved", "INTEGER", "INT"),
+    ("cu_2nd_sem_grade", "curricular_units_2nd_sem_grade", "REAL", "NUMERIC"),
+)
+
+# (columna, tipo SQLite, tipo Postgres) en el orden de escritura
+PREDICTION_COLUMNS: Tuple[Tuple[str, str, str], ...] = (
+    ("id", "TEXT PRIMARY KEY", "UUID PRIMARY KEY"),
+    ("created_at", "TEXT NOT NULL", "TIMESTAMPTZ NOT NULL"),
+    ("batch_id", "TEXT", "TEXT"),
+    ("student_id", "TEXT", "TEXT"),
+    ("student_name", "TEXT", "TEXT"),
+    ("course", "TEXT", "TEXT"),
+    ("semester", "INTEGER", "INT"),
+    *(
+        (name, sqlite_type, pg_type)
+        for name, _, sqlite_type, pg_type in FEATURE_COLUMNS
+    ),
+    ("outcome", "TEXT", "TEXT"),
+    ("risk_score", "REAL", "NUMERIC"),
+    ("risk_level", "TEXT", "TEXT"),
+    ("dropout_prob", "REAL", "NUMERIC"),
+    ("graduate_prob", "REAL", "NUMERIC"),
+    ("recommendation", "TEXT", "TEXT"),
+    ("intervention", "TEXT", "TEXT"),
+    ("categoria", "TEXT", "TEXT"),
+    ("model_version", "TEXT", "TEXT"),
+    ("feature_fingerprint", "TEXT", "TEXT"),
+    ("prediction", "REAL", "DOUBLE PRECISION"),
+)
+COLUMN_NAMES: Tuple[str, ...] = tuple(name for name, _, _ in PREDICTION_COLUMNS)
+# Columnas con restricciones, presentes desde el primer esquema: el resto se
+# agrega con ALTER TABLE a las tablas creadas por versiones anteriores
+KEY_COLUMNS = ("id", "created_at")
+INDEXED_COLUMNS = ("batch_id", "student_id", "created_at")
+LATEST_COLUMNS = ("student_id", "feature_fingerprint", "prediction", "created_at")
+SQLITE_MAX_PARAMS = 900
+# Conteos por cohorte para la analítica (`read_cohort_counts`); {source} es la
+# tabla o los Parquet
+COHORT_COUNT_KEYS = (
+    "batch_id",
+    "course",
+    "semester",
+    "risk_score",
+    "risk_level",
+    "categoria",
+)
+COHORT_COUNTS_QUERY = (
+    "SELECT batch_id, course, semester, ROUND(risk_score, 2) AS risk_score, "
+    "risk_level, categoria, COUNT(*) AS n FROM {source} "
+    "WHERE risk_score IS NOT NULL "
+    "GROUP BY batch_id, course, semester, ROUND(risk_score, 2), risk_level, categoria"
+)
+
+Row = Tuple[Any, ...]
+
+
+class PredictionStoreBackend(abc.ABC):
+    """Interfaz de los backends: crear esquema, escribir en bloque y leer."""
+
+    @abc.abstractmethod
+    def write_many(self, rows: Sequence[Row]) -> None:
+        """Inserta filas en bloque, con columnas en el orden de `PREDICTION_COLUMNS`."""
+
+    @abc.abstractmethod
+    def read_frame(self, columns: Sequence[str]) -> pd.DataFrame:
+        """Las columnas pedidas de todas las filas guardadas."""
+
+    @abc.abstractmethod
+    def read_latest(
+        self, student_ids: Sequence[str], model_version: str
+    ) -> pd.DataFrame:
+        """Última fila (`LATEST_COLUMNS`) por estudiante y versión."""
+
+    def read_cohort_counts(self) -> pd.DataFrame:
+        """
+        Filas por (cohorte, risk_score, nivel, categoría) en la columna `n`. Por
+        defecto agrupa en pandas; los backends con SQL agrupan en la base.
+        """
+        df = self.read_frame(COHORT_COUNT_KEYS)
+        df = df[df["risk_score"].notna()]
+        return (
+            df.groupby(list(COHORT_COUNT_KEYS), dropna=False)
+            .size()
+            .rename("n")
+            .reset_index()
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(PredictionStoreBackend):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(
+            f"{name} {sqlite_type}" for name, sqlite_type, _ in PREDICTION_COLUMNS
+        )
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS predictions ({columns})")
+            existing = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(predictions)")
+            }
+            for name, sqlite_type, _ in PREDICTION_COLUMNS:
+                if name not in existing and name not in KEY_COLUMNS:
+                    self._conn.execute(
+                        f"ALTER TABLE predictions ADD COLUMN {name} {sqlite_type}"
+                    )
+            for column in INDEXED_COLUMNS:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_predictions_{column} "
+                    f"ON predictions ({column})"
+                )
+        placeholders = ", ".join("?" for _ in COLUMN_NAMES)
+        self._insert = (
+            f"INSERT INTO predictions ({', '.join(COLUMN_NAMES)}) "
+            f"VALUES ({placeholders})"
+        )
+
+    def write_many(self, rows: Sequence[Row]) -> None:
+        # Una sola transacción por lote: el equivalente en SQLite a un COPY.
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+
+    def read_frame(self, columns: Sequence[str]) -> pd.DataFrame:
+        return pd.read_sql_query(
+            f"SELECT {', '.join(columns)} FROM predictions", self._conn
+        )
+
+    def read_cohort_counts(self) -> pd.DataFrame:
+        return pd.read_sql_query(
+            COHORT_COUNTS_QUERY.format(source="predictions"), self._conn
+        )
+
+    def read_latest(
+        self, student_ids: Sequence[str], model_version: str
+    ) -> pd.DataFrame:
+        ids = list(dict.fromkeys(student_ids))
+        frames = []
+        # SQLite limita la cantidad de parámetros por sentencia
+        for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[start : start + SQLITE_MAX_PARAMS]
+            in_list = ", ".join("?" for _ in chunk)
+            frames.append(
+                pd.read_sql_query(
+                    f"SELECT {', '.join(LATEST_COLUMNS)} FROM predictions "
+                    f"WHERE model_version = ? AND student_id IN ({in_list})",
+                    self._conn,
+                    params=[model_version, *chunk],
+                )
+            )
+        return _latest_per_student(frames)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class PostgresBackend(PredictionStoreBackend):
+    """Backend Postgres con pool de conexiones (psycopg 3) y COPY ... FROM STDIN."""
+
+    def __init__(self, dsn: str, pool_size: int = 4) -> None:
+        from psycopg_pool import ConnectionPool
+
+        self._pool = ConnectionPool(dsn, min_size=1, max_size=pool_size, open=True)
+        columns = ", ".join(
+            f"{name} {pg_type}" for name, _, pg_type in PREDICTION_COLUMNS
+        )
+        with self._pool.connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS predictions ({columns})")
+            for name, _, pg_type in PREDICTION_COLUMNS:
+                if name not in KEY_COLUMNS:
+                    conn.execute(
+                        "ALTER TABLE predictions "
+                        f"ADD COLUMN IF NOT EXISTS {name} {pg_type}"
+                    )
+            for column in INDEXED_COLUMNS:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_predictions_{column} "
+                    f"ON predictions ({column})"
+                )
+        self._copy = f"COPY predictions ({', '.join(COLUMN_NAMES)}) FROM STDIN"
+
+    def write_many(self, rows: Sequence[Row]) -> None:
+        with self._pool.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy(self._copy) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+
+    def read_frame(self, columns: Sequence[str]) -> pd.DataFrame:
+        with self._pool.connection() as conn:
+            cur = conn.execute(f"SELECT {', '.join(columns)} FROM predictions")
+            return pd.DataFrame(cur.fetchall(), columns=list(columns))
+
+    def read_cohort_counts(self) -> pd.DataFrame:
+        with self._pool.connection() as conn:
+            cur = conn.execute(COHORT_COUNTS_QUERY.format(source="predictions"))
+            return pd.DataFrame(cur.fetchall(), columns=[*COHORT_COUNT_KEYS, "n"])
+
+    def read_latest(
+        self, student_ids: Sequence[str], model_version: str
+    ) -> pd.DataFrame:
+        with self._pool.connection() as conn:
+            cur = conn.execute(
+                "SELECT DISTINCT ON (student_id) "
+                f"{', '.join(LATEST_COLUMNS)} FROM predictions "
+                "WHERE model_version = %s AND student_id = ANY(%s) "
+                "ORDER BY student_id, created_at DESC",
+                (model_version, list(set(student_ids))),
+            )
+            return _latest_per_student(
+                [pd.DataFrame(cur.fetchall(), columns=list(LATEST_COLUMNS))]
+            )
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class ParquetBackend(PredictionStoreBackend):
+    """
+    Escribe cada flush como un archivo Parquet inmutable en `directory`. Las
+    lecturas usan DuckDB sobre los archivos cuando está instalado (proyección
+    de columnas sin materializar el resto) y pyarrow.dataset en caso contrario.
+    """
+
+    def __init__(self, directory: str) -> None:
+        import pyarrow as pa
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+        self._schema = pa.schema(
+            [
+                (name, types.get(sqlite_type, pa.string()))
+                for name, sqlite_type, _ in PREDICTION_COLUMNS
+            ]
+        )
+
+    def write_many(self, rows: Sequence[Row]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [
+                pa.array(values, type=field.type)
+                for values, field in zip(columns, self._schema)
+            ],
+            schema=self._schema,
+        )
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = self.directory / f"predictions-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path)
+        tmp_path.replace(path)
+
+    def read_frame(self, columns: Sequence[str]) -> pd.DataFrame:
+        if not any(self.directory.glob("*.parquet")):
+            return pd.DataFrame(columns=list(columns))
+        try:
+            import duckdb
+        except ImportError:
+            import pyarrow.dataset as ds
+
+            dataset = ds.dataset(
+                str(self.directory), format="parquet", schema=self._schema
+            )
+            return dataset.to_table(columns=list(columns)).to_pandas()
+
+        pattern = str(self.directory / "*.parquet")
+        with duckdb.connect() as conn:
+            return conn.execute(
+                # union_by_name: los archivos de versiones anteriores no tienen
+                # las columnas nuevas
+                f"SELECT {', '.join(columns)} "
+                "FROM read_parquet(?, union_by_name = true)",
+                [pattern],
+            ).df()
+
+    def read_cohort_counts(self) -> pd.DataFrame:
+        try:
+            import duckdb
+        except ImportError:
+            return super().read_cohort_counts()
+        if not any(self.directory.glob("*.parquet")):
+            return pd.DataFrame(columns=[*COHORT_COUNT_KEYS, "n"])
+
+        source = "read_parquet(?, union_by_name = true)"
+        with duckdb.connect() as conn:
+            return conn.execute(
+                COHORT_COUNTS_QUERY.format(source=source),
+                [str(self.directory / "*.parquet")],
+            ).df()
+
+    def read_latest(
+        self, student_ids: Sequence[str], model_version: str
+    ) -> pd.DataFrame:
+        if not any(self.directory.glob("*.parquet")):
+            return _latest_per_student([])
+        import pyarrow.dataset as ds
+
+        # El filtro se empuja a la lectura: se descartan row groups por estadísticas
+        dataset = ds.dataset(str(self.directory), format="parquet", schema=self._schema)
+        table = dataset.to_table(
+            columns=list(LATEST_COLUMNS),
+            filter=(ds.field("model_version") == model_version)
+            & ds.field("student_id").isin(list(set(student_ids))),
+        )
+        return _latest_per_student([table.to_pandas()])
+
+
+def _latest_per_student(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=list(LATEST_COLUMNS))
+    df = pd.concat(frames, ignore_index=True)
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    return df.sort_values("created_at").drop_duplicates("student_id", keep="last")
+
+
+def create_backend(url: str) -> PredictionStoreBackend:
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///") :])
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresBackend(url)
+    if url.startswith("parquet:///"):
+        return ParquetBackend(url[len("parquet:///") :])
+    raise ValueError(f"Unsupported prediction store URL: {url}")
+
+
+def feature_fingerprints(input_df: pd.DataFrame) -> List[Optional[str]]:
+    """
+    Huella de las variables de entrada (StudentFeatures) por fila. Se calcula
+    sobre float64 para que no dependa del dtype con que llegó cada columna.
+    """
+    sources = [source for _, source, _, _ in FEATURE_COLUMNS]
+    if not set(sources) <= set(input_df.columns):
+        return [None] * len(input_df)
+    values = input_df[sources].astype("float64")
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return [f"{h:016x}" for h in hashes.tolist()]
+
+
+def match_previous_scores(
+    backend: PredictionStoreBackend,
+    input_df: pd.DataFrame,
+    student_ids: Sequence[str],
+    model_version: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compara las huellas del lote con la última predicción guardada de cada
+    estudiante para `model_version`. Retorna (máscara de filas sin cambios,
+    predicción guardada por fila; NaN donde hay que volver a puntuar).
+    """
+    previous = backend.read_latest(student_ids, model_version)
+    stored = dict(
+        zip(
+            previous["student_id"],
+            zip(previous["feature_fingerprint"], previous["prediction"]),
+        )
+    )
+    reused = np.zeros(len(student_ids), dtype=bool)
+    scores = np.full(len(student_ids), np.nan)
+    for i, (student_id, fingerprint) in enumerate(
+        zip(student_ids, feature_fingerprints(input_df))
+    ):
+        match = stored.get(student_id)
+        if match is not None and fingerprint is not None and match[0] == fingerprint:
+            if match[1] is not None and not pd.isna(match[1]):
+                reused[i] = True
+                scores[i] = match[1]
+    return reused, scores
+
+
+def _column_values(df: Optional[pd.DataFrame], column: str, n_rows: int) -> List[Any]:
+    if df is None or column not in df.columns:
+        return [None] * n_rows
+    return df[column].astype(object).where(df[column].notna(), None).tolist()
+
+
+def build_prediction_rows(
+    input_df: pd.DataFrame,
+    details: Sequence[Any],
+    context: Optional[pd.DataFrame],
+    model_version: str,
+    created_at: str,
+    predictions: Optional[Sequence[float]] = None,
+) -> List[Row]:
+    """Arma las filas de la tabla `predictions` para un lote puntuado."""
+    details = [d if isinstance(d, dict) else d.model_dump() for d in details]
+    n_rows = len(details)
+    columns: List[Iterable[Any]] = [
+        (str(uuid.uuid4()) for _ in range(n_rows)),
+        [created_at] * n_rows,
+        _column_values(context, "batch_id", n_rows),
+        [d.get("student_id") for d in details],
+        _column_values(context, "name", n_rows),
+        _column_values(context, "course", n_rows),
+        _column_values(context, "semester", n_rows),
+    ]
+    for _, source, _, _ in FEATURE_COLUMNS:
+        columns.append(_column_values(input_df, source, n_rows))
+    probabilities = [d.get("class_probabilities") or {} for d in details]
+    columns.extend(
+        [
+            [d.get("outcome") for d in details],
+            [d.get("risk_score") for d in details],
+            [d.get("risk_level") for d in details],
+            [p.get("Dropout") for p in probabilities],
+            [p.get("Graduate") for p in probabilities],
+            [d.get("recommendation") for d in details],
+            [d.get("intervention_steps") for d in details],
+            [d.get("categoria") for d in details],
+            [model_version] * n_rows,
+            feature_fingerprints(input_df)
+            if len(input_df) == n_rows
+            else [None] * n_rows,
+            list(predictions) if predictions is not None else [None] * n_rows,
+        ]
+    )
+    return list(zip(*columns))
+
+
+class PredictionWriter:
+    """
+    Cola write-behind: `submit` nunca bloquea al request (los detalles pueden
+    ser dicts o PredictionDetail; la conversión a filas ocurre en el hilo
+    escritor). Un hilo agrupa los
+    lotes encolados y los escribe en bloques de hasta `flush_rows` filas o
+    cada `flush_interval` segundos. Si la cola se llena, el lote se descarta
+    y se contabiliza en `stats`.
+    """
+
+    def __init__(
+        self,
+        backend: PredictionStoreBackend,
+        max_queue: int = 1_000,
+        flush_rows: int = 5_000,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.backend = backend
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "failed": 0}
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="prediction-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        input_df: pd.DataFrame,
+        details: Sequence[Any],
+        context: Optional[pd.DataFrame] = None,
+        model_version: str = "",
+        predictions: Optional[Sequence[float]] = None,
+    ) -> bool:
+        if self._closed:
+            return False
+        created_at = datetime.now(timezone.utc).isoformat()
+        job = (input_df, list(details), context, model_version, created_at, predictions)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.stats["dropped"] += len(details)
+            logger.warning(f"Prediction store queue full, dropping {len(details)} rows")
+            return False
+        self.stats["submitted"] += len(details)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que lo encolado quede escrito; False si vence `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.backend.close()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+
+            jobs = [job]
+            pending = len(job[1])
+            deadline = time.monotonic() + self.flush_interval
+            while pending < self.flush_rows:
+                try:
+                    job = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                jobs.append(job)
+                pending += len(job[1])
+
+            try:
+                self._write(jobs)
+            finally:
+                # Sin task_done pendiente `flush` esperaría para siempre
+                for _ in jobs:
+                    self._queue.task_done()
+
+    def _write(self, jobs: List[Any]) -> None:
+        rows: List[Row] = []
+        for input_df, details, context, model_version, created_at, predictions in jobs:
+            try:
+                rows.extend(
+                    build_prediction_rows(
+                        input_df,
+                        details,
+                        context,
+                        model_version,
+                        created_at,
+                        predictions,
+                    )
+                )
+            except Exception as exc:
+                # Un lote mal formado se descarta sin perder el resto del bloque
+                self.stats["failed"] += len(details)
+                logger.warning(
+                    f"Prediction store rows not built ({len(details)} rows): {exc}"
+                )
+        if not rows:
+            return
+        try:
+            self.backend.write_many(rows)
+            self.stats["written"] += len(rows)
+        except Exception as exc:
+            self.stats["failed"] += len(rows)
+            logger.warning(f"Prediction store write failed ({len(rows)} rows): {exc}")
+
+
+_writer: Optional[PredictionWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_prediction_writer() -> Optional[PredictionWriter]:
+    """Writer global según `PREDICTION_STORE_URL`; None sin persistencia."""
+    global _writer
+    if _writer is not None:
+        return _writer
+
+    from app.config import settings
+
+    url = getattr(settings, "PREDICTION_STORE_URL", None)
+    if not url:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = PredictionWriter(create_backend(url))
+    return _writer
+
+
+def close_prediction_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
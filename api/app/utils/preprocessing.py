@@ -3,13 +3,71 @@ Preprocesamiento de datos para predicción.
 Replica la lógica de src/data_processor.py para las variables derivadas.
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import csv
+import io
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any, Dict, List, Sequence, Tuple
+
+from dropout_common.lazy_imports import lazy_import
+from loguru import logger
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Esquema compacto de tipos (espejo de FEATURE_DTYPES en src/config.py).
+# El orden de las llaves es el orden de columnas con el que se entrenó el modelo.
+FEATURE_DTYPES: Dict[str, str] = {
+    "age_at_enrollment": "int8",
+    "gender": "int8",
+    "displaced": "int8",
+    "debtor": "int8",
+    "tuition_fees_up_to_date": "int8",
+    "scholarship_holder": "int8",
+    "curricular_units_1st_sem_enrolled": "int8",
+    "curricular_units_1st_sem_approved": "int8",
+    "curricular_units_1st_sem_grade": "float32",
+    "curricular_units_2nd_sem_enrolled": "int8",
+    "curricular_units_2nd_sem_approved": "int8",
+    "curricular_units_2nd_sem_grade": "float32",
+    "total_approved": "int8",
+    "total_enrolled": "int8",
+    "efficiency_ratio": "float32",
+    "grade_trend": "float32",
+}
+ENGINEERED_FEATURES: Tuple[str, ...] = (
+    "total_approved",
+    "total_enrolled",
+    "efficiency_ratio",
+    "grade_trend",
+)
+MODEL_FEATURES: Tuple[str, ...] = tuple(FEATURE_DTYPES)
+
+# Tipos declarados para la lectura de CSV. Los enteros se leen como float32
+# (exacto para estos rangos y tolerante a celdas vacías, que luego valida
+# pydantic) y las notas como float64 para no perder precisión antes del
+# feature engineering.
+CSV_READ_DTYPES: Dict[str, Any] = {
+    "student_id": str,
+    "name": str,
+    "semester": "float32",
+    "batch_id": str,
+    "course": str,
+    **{
+        col: ("float64" if dtype.startswith("float") else "float32")
+        for col, dtype in FEATURE_DTYPES.items()
+        if col not in ENGINEERED_FEATURES
+    },
+}
 
 
 def _normalize_column_name(col: str) -> str:
     """Normaliza nombres de columnas como en data_processor.py."""
     return (
-        str(col).strip()
+        str(col)
+        .strip()
         .replace(" ", "_")
         .replace("(", "")
         .replace(")", "")
@@ -31,9 +89,129 @@ def normalize_input_columns(df: pd.DataFrame) -> pd.DataFrame:
     return _normalize_dataframe_columns(df)
 
 
+@lru_cache(maxsize=1)
+def _pyarrow_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+def _read_csv_header(contents: bytes) -> List[str]:
+    """Lee solo la primera línea del CSV (respetando comillas y BOM)."""
+    first_line = contents.split(b"\n", 1)[0].decode("utf-8-sig").rstrip("\r")
+    return next(csv.reader([first_line]), [])
+
+
+def read_csv_columns(contents: bytes, columns: Sequence[str]) -> pd.DataFrame:
+    """
+    Lee de un CSV solo las columnas requeridas, con tipos declarados.
+
+    Los encabezados se normalizan una sola vez antes de parsear, de modo que
+    `usecols` y `dtype` se expresan con los nombres normalizados y el resto de
+    columnas (p. ej. ocupación de los padres, GDP, Target) nunca se convierte.
+    Usa el motor multihilo de pyarrow si está instalado y vuelve al motor C
+    cuando el archivo no es compatible con él (p. ej. espacios tras las comas).
+    """
+    header = _read_csv_header(contents)
+    if not any(col.strip() for col in header):
+        raise ValueError("CSV sin encabezados")
+
+    names = [_normalize_column_name(col) for col in header]
+    wanted = set(columns)
+    usecols = [name for name in names if name in wanted]
+    dtypes = {name: CSV_READ_DTYPES.get(name, str) for name in usecols}
+
+    if _pyarrow_available():
+        try:
+            return _read_csv_pyarrow(contents, names, usecols, dtypes)
+        except Exception as exc:
+            logger.debug(f"pyarrow CSV engine failed, falling back to C engine: {exc}")
+
+    return pd.read_csv(
+        io.BytesIO(contents),
+        header=0,
+        names=names,
+        usecols=usecols,
+        dtype=dtypes,
+        skipinitialspace=True,
+    )
+
+
+def _read_csv_pyarrow(
+    contents: bytes,
+    names: List[str],
+    usecols: List[str],
+    dtypes: Dict[str, Any],
+) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+
+    column_types = {
+        name: pa.string() if dtype is str else pa.from_numpy_dtype(np.dtype(dtype))
+        for name, dtype in dtypes.items()
+    }
+    table = pa_csv.read_csv(
+        pa.py_buffer(contents),
+        read_options=pa_csv.ReadOptions(
+            column_names=names, skip_rows=1, use_threads=True
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types=column_types,
+            strings_can_be_null=True,
+        ),
+    )
+    # Igual que skipinitialspace=True en el motor C: se quitan los espacios iniciales
+    # de los campos de texto (los numéricos ya los tolera el parser de Arrow).
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type):
+            table = table.set_column(
+                i, field.name, pc.utf8_ltrim_whitespace(table.column(i))
+            )
+    return table.to_pandas()
+
+
+def cast_feature_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las columnas presentes del esquema a sus tipos compactos.
+
+    Valida el rango antes de reducir enteros para evitar desbordes silenciosos
+    (p. ej. 200 como int8).
+    """
+    converted = {}
+    for col, dtype in FEATURE_DTYPES.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        values = pd.to_numeric(df[col])
+        if values.isna().any():
+            raise ValueError(f"La columna {col} contiene valores vacíos")
+        if np.dtype(dtype).kind == "i":
+            info = np.iinfo(dtype)
+            if values.min() < info.min or values.max() > info.max:
+                raise ValueError(
+                    f"La columna {col} tiene valores fuera de rango "
+                    f"[{info.min}, {info.max}]"
+                )
+        converted[col] = values.astype(dtype)
+    return df.assign(**converted) if converted else df
+
+
+def to_model_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Retorna las columnas del modelo como un único bloque float32 contiguo,
+    en el orden de entrenamiento. Es el formato con el que puntúan
+    XGBoost y RandomForest internamente, así que se evita una conversión extra.
+    """
+    values = np.ascontiguousarray(
+        df.loc[:, list(MODEL_FEATURES)].to_numpy(dtype=np.float32)
+    )
+    return pd.DataFrame(
+        values, columns=list(MODEL_FEATURES), index=df.index, copy=False
+    )
+
+
 def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Aplica el feature engineering de data_processor.py (líneas 25-28).
+    Aplica el feature engineering de data_processor.py (add_engineered_features).
 
     Añade las variables derivadas requeridas por el modelo:
     - total_approved
@@ -60,27 +238,36 @@ def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     }
     missing = required - set(df.columns)
     if missing:
-        raise ValueError(f"Faltan columnas requeridas para el feature engineering: {missing}")
+        raise ValueError(
+            f"Faltan columnas requeridas para el feature engineering: {missing}"
+        )
 
-    df["total_approved"] = (
-        df[cols_1st_approved].astype(float) + df[cols_2nd_approved].astype(float)
-    )
-    df["total_enrolled"] = (
-        df[cols_1st_enrolled].astype(float) + df[cols_2nd_enrolled].astype(float)
-    )
+    # grade_trend se calcula con las notas en float64 antes de compactarlas, para
+    # reproducir exactamente los valores de entrenamiento (los cortes de XGBoost
+    # caen sobre valores observados y un ulp de diferencia cambia la rama).
+    grade_1st = pd.to_numeric(df[cols_1st_grade]).astype("float64")
+    grade_2nd = pd.to_numeric(df[cols_2nd_grade]).astype("float64")
+    df = cast_feature_dtypes(df)
+
+    # Las sumas se calculan en int16 para validar el rango antes de volver a int8.
+    df["total_approved"] = df[cols_1st_approved].astype("int16") + df[
+        cols_2nd_approved
+    ].astype("int16")
+    df["total_enrolled"] = df[cols_1st_enrolled].astype("int16") + df[
+        cols_2nd_enrolled
+    ].astype("int16")
     df["efficiency_ratio"] = df["total_approved"] / (df["total_enrolled"] + 1e-5)
-    df["grade_trend"] = (
-        df[cols_2nd_grade].astype(float) - df[cols_1st_grade].astype(float)
-    )
+    df["grade_trend"] = grade_2nd - grade_1st
 
-    return df
+    return cast_feature_dtypes(df)
 
 
 def prepare_model_input(df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepara el DataFrame para el modelo: normaliza columnas y añade features derivadas.
 
-    - Normaliza nombres de columnas (spaces, parens, etc.) para coincidir con data_processor
+    - Normaliza nombres de columnas (spaces, parens, etc.) para coincidir con
+      data_processor
     - Añade total_approved, total_enrolled, efficiency_ratio, grade_trend
     """
     df = _normalize_dataframe_columns(df)
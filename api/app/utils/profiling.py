@@ -0,0 +1,277 @@
+"""
+Perfilado bajo demanda de peticiones de predicción.
+
+Deshabilitado por defecto (`PROFILING_DIR` vacío): el endpoint solo consulta
+un atributo y los checkpoints de etapa retornan de inmediato. Habilitado, una
+petición se perfila con cProfile si trae `X-Profile: <PROFILING_TOKEN>` o si
+cae en la fracción muestreada (`PROFILING_SAMPLE_RATE`, ajustable en caliente
+con `PUT /admin/profiling`). El valor ajustado se guarda en
+`<PROFILING_DIR>/.sample_rate` y cada worker lo relee como mucho una vez por
+segundo, así que el cambio aplica a todos los workers de gunicorn, no solo al
+que atendió el PUT. Cada perfil deja en el directorio:
+
+  * `<id>.prof`: estadísticas de cProfile (pstats, snakeviz);
+  * `<id>.txt`: las funciones con más tiempo acumulado;
+  * `<id>.json`: endpoint, tamaño del lote, tiempos por etapa y origen.
+
+Se perfila una sola petición a la vez por proceso (cProfile no admite perfiles
+simultáneos en el mismo hilo); las demás se atienden sin perfilar. El perfil
+incluye lo que el event loop ejecute mientras el endpoint espera, como la
+lectura del archivo subido.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from loguru import logger
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+MAX_PROFILES = 200
+TOP_FUNCTIONS = 40
+# Fracción muestreada compartida por los workers (sin sufijo .json: `_prune` no la toca)
+SAMPLE_RATE_FILE = ".sample_rate"
+SAMPLE_RATE_CHECK_INTERVAL = 1.0
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+# Desempate de ids creados en el mismo microsegundo dentro del proceso
+_sequence = itertools.count()
+
+
+class RequestProfile:
+    """Perfil de una petición: cProfile más tiempos por etapa y atributos del lote."""
+
+    def __init__(self, profiler: "Profiler", endpoint: str, trigger: str) -> None:
+        self.profiler = profiler
+        self.endpoint = endpoint
+        self.trigger = trigger
+        # Prefijo ordenable (fecha al microsegundo + secuencia): `_prune` ordena por id
+        self.profile_id = (
+            f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{next(_sequence):06d}"
+            f"-{endpoint}-{uuid.uuid4().hex[:8]}"
+        )
+        self.stages_ms: Dict[str, float] = {}
+        self.attributes: Dict[str, Any] = {}
+        self._profile = cProfile.Profile()
+        self._token = None
+        self._start = 0.0
+        self._last = 0.0
+
+    def __enter__(self) -> "RequestProfile":
+        self._token = _current.set(self)
+        self._start = self._last = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, _tb) -> None:
+        self._profile.disable()
+        total_ms = (time.perf_counter() - self._start) * 1000
+        _current.reset(self._token)
+        status_code = 200 if exc is None else getattr(exc, "status_code", 500)
+        try:
+            self.profiler.save(self, total_ms, status_code)
+        finally:
+            self.profiler.release()
+
+    def checkpoint(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages_ms[stage] = (
+            self.stages_ms.get(stage, 0.0) + (now - self._last) * 1000
+        )
+        self._last = now
+
+
+class Profiler:
+    """Decide qué peticiones perfilar y guarda sus artefactos en disco."""
+
+    def __init__(
+        self,
+        directory: Optional[Path],
+        sample_rate: float = 0.0,
+        token: str = "",
+        max_profiles: int = MAX_PROFILES,
+        rate_check_interval: float = SAMPLE_RATE_CHECK_INTERVAL,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.token = token
+        self.max_profiles = max_profiles
+        self.rate_check_interval = rate_check_interval
+        self._sample_rate = sample_rate
+        self._rate_checked_at = float("-inf")
+        self.profiles_written = 0
+        self.skipped_busy = 0
+        self.last_profile: Optional[str] = None
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    @property
+    def sample_rate(self) -> float:
+        """Fracción vigente: la última fijada por algún worker o la configurada."""
+        now = time.monotonic()
+        if (
+            self.directory is not None
+            and now - self._rate_checked_at >= self.rate_check_interval
+        ):
+            self._rate_checked_at = now
+            try:
+                text = (self.directory / SAMPLE_RATE_FILE).read_text(encoding="utf-8")
+                self._sample_rate = float(text)
+            except (OSError, ValueError):
+                pass
+        return self._sample_rate
+
+    def set_sample_rate(self, sample_rate: float) -> None:
+        """Fija la fracción para todos los workers que comparten `directory`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / SAMPLE_RATE_FILE
+        tmp = path.with_name(f"{SAMPLE_RATE_FILE}.{os.getpid()}.tmp")
+        tmp.write_text(repr(float(sample_rate)), encoding="utf-8")
+        os.replace(tmp, path)
+        self._sample_rate = sample_rate
+        self._rate_checked_at = time.monotonic()
+
+    def clear_sample_rate(self) -> None:
+        """Descarta la fracción fijada en una ejecución anterior (el maestro)."""
+        if self.directory is not None:
+            (self.directory / SAMPLE_RATE_FILE).unlink(missing_ok=True)
+
+    def authorized(self, value: Optional[str]) -> bool:
+        """True si `value` coincide con `PROFILING_TOKEN` (nunca si no hay token)."""
+        return (
+            bool(self.token)
+            and value is not None
+            and hmac.compare_digest(value, self.token)
+        )
+
+    def start(
+        self, headers: Mapping[str, str], endpoint: str
+    ) -> Optional[RequestProfile]:
+        """Perfil para esta petición, o None si no corresponde perfilarla."""
+        if self.directory is None:
+            return None
+        if self.authorized(headers.get(PROFILE_HEADER)):
+            trigger = "header"
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trigger = "sample"
+        else:
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        return RequestProfile(self, endpoint, trigger)
+
+    def release(self) -> None:
+        self._busy.release()
+
+    def save(self, profile: RequestProfile, total_ms: float, status_code: int) -> None:
+        """Escribe .prof, .txt y .json; un error de disco no afecta la respuesta."""
+        base = self.directory / profile.profile_id
+        metadata = {
+            "profile_id": profile.profile_id,
+            "endpoint": profile.endpoint,
+            "trigger": profile.trigger,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "status_code": status_code,
+            "batch_size": profile.attributes.get("batch_size"),
+            "attributes": profile.attributes,
+            "total_ms": round(total_ms, 3),
+            "stages_ms": {k: round(v, 3) for k, v in profile.stages_ms.items()},
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profile._profile.dump_stats(str(base.with_suffix(".prof")))
+            summary = io.StringIO()
+            pstats.Stats(profile._profile, stream=summary).sort_stats(
+                "cumulative"
+            ).print_stats(TOP_FUNCTIONS)
+            base.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+            base.with_suffix(".json").write_text(
+                json.dumps(metadata, indent=2), encoding="utf-8"
+            )
+            self._prune()
+        except OSError as exc:
+            logger.warning(f"Could not write profile {profile.profile_id}: {exc}")
+            return
+        self.profiles_written += 1
+        self.last_profile = profile.profile_id
+        logger.info(
+            f"Profiled {profile.endpoint} ({profile.trigger}, {total_ms:.1f} ms): "
+            f"{base}.prof"
+        )
+
+    def _prune(self) -> None:
+        """
+        Conserva solo los `max_profiles` perfiles más recientes (el id empieza
+        con la fecha y la secuencia).
+        """
+        stale = sorted(self.directory.glob("*.json"))[: -self.max_profiles or None]
+        for path in stale:
+            for suffix in (".json", ".prof", ".txt"):
+                path.with_suffix(suffix).unlink(missing_ok=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": str(self.directory) if self.directory else None,
+            "sample_rate": self.sample_rate,
+            "profiles_written": self.profiles_written,
+            "skipped_busy": self.skipped_busy,
+            "last_profile": self.last_profile,
+        }
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """
+    Profiler global configurado con `PROFILING_DIR`, `PROFILING_SAMPLE_RATE` y
+    `PROFILING_TOKEN`.
+    """
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+
+    from app.config import settings
+
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler(
+                getattr(settings, "PROFILING_DIR", "") or None,
+                sample_rate=float(getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)),
+                token=getattr(settings, "PROFILING_TOKEN", ""),
+            )
+    return _profiler
+
+
+def checkpoint(stage: str) -> None:
+    """Cierra la etapa `stage` del perfil activo (tiempo desde el último checkpoint)."""
+    profile = _current.get()
+    if profile is not None:
+        profile.checkpoint(stage)
+
+
+def annotate(**attributes: Any) -> None:
+    """Agrega atributos (p. ej. `batch_size`) al perfil activo, si lo hay."""
+    profile = _current.get()
+    if profile is not None:
+        profile.attributes.update(attributes)
@@ -1,101 +1,52 @@
 """
-Diccionario de reglas de riesgo para evaluación según predicción y datos del estudiante.
+Reglas de riesgo para evaluación según predicción y datos del estudiante.
 
 Mapea disparadores de negocio con categorías, niveles de riesgo, recomendaciones
-y pasos de intervención para tutores.
+y pasos de intervención para tutores. Las reglas viven en `app/risk_rules.json`
+(o en el archivo indicado por `RISK_RULES_PATH`) y se compilan con
+`dropout_common.rule_engine` (compartido con `src.predict`) a predicados
+vectorizados que se evalúan sobre el lote completo. El archivo se recarga en
+caliente cuando cambia.
 """
 
-from typing import Any, Dict, List
-
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
-
-# Mapeo de nombres de columnas del dataset a nombres usados en las reglas
-COLUMN_ALIASES = {
-    "Tuition fees up to date": "tuition_fees_up_to_date",
-    "Scholarship holder": "scholarship_holder",
-}
-
-# Diccionario de reglas de riesgo
-# Orden de evaluación: primero reglas de alto riesgo, luego medio, luego bajo
-RISK_RULES: List[Dict[str, Any]] = [
-    {
-        "categoria": "Financiero",
-        "nivel_riesgo": "Alto",
-        "disparador": "Tuition_fees_up_to_date == 0 OR Debtor == 1",
-        "eval_func": lambda row, risk_score: (
-            row.get("tuition_fees_up_to_date", 1) == 0
-            or row.get("debtor",0) == 1
-        ),
-        "recommendation": "RIESGO FINANCIERO DETECTADO - El estudiante presenta deudas que bloquean su permanencia.",
-        "intervention_steps": "Verificar estado de pagos. Informar fecha límite. Remitir a Oficina de Becas.",
-    },
-    {
-        "categoria": "Académico",
-        "nivel_riesgo": "Alto",
-        "disparador": "efficiency_ratio < 0.5",
-        "eval_func": lambda row, risk_score: row.get("efficiency_ratio", 0) < 0.5
-        if _has_enrollment_data(row)
-        else False,
-        "recommendation": "CRISIS ACADÉMICA - El estudiante aprueba menos de la mitad de su carga académica.",
-        "intervention_steps": "Cita para análisis de materias. Taller de hábitos de estudio. Evaluar reducción de carga.",
-    },
-    {
-        "categoria": "Rendimiento",
-        "nivel_riesgo": "Medio",
-        "disparador": "grade_trend < -2",
-        "eval_func": lambda row, risk_score: row.get("grade_trend", 0) < -2
-        if _has_grade_data(row)
-        else False,
-        "recommendation": "ALERTA POR CAÍDA DE RENDIMIENTO - Descenso atípico en el promedio semestral.",
-        "intervention_steps": "Evaluación de salud mental. Entrevista de factores personales. Mentoría de refuerzo.",
-    },
-    {
-        "categoria": "Socioeconómico",
-        "nivel_riesgo": "Medio",
-        "disparador": "Scholarship_holder == 0 AND risk_score > 0.4",
-        "eval_func": lambda row, risk_score: (
-            row.get("scholarship_holder", row.get("Scholarship holder", 1)) == 0
-            and (risk_score is not None and risk_score > 0.4)
-        ),
-        "recommendation": "RIESGO POR FALTA DE APOYO - Estudiante vulnerable sin subsidio institucional.",
-        "intervention_steps": "Validar requisitos para becas. Asignar 'Mentor Par'. Evaluar flexibilidad de horario.",
-    },
-    {
-        "categoria": "Bajo Riesgo",
-        "nivel_riesgo": "Bajo",
-        "disparador": "risk_score < 0.35",
-        "eval_func": lambda row, risk_score: (
-            risk_score is not None and risk_score < 0.35
-        ),
-        "recommendation": "SEGUIMIENTO PREVENTIVO - Estudiante con perfil de graduación exitosa.",
-        "intervention_steps": "Mensaje de felicitación. Recordar fechas de inscripción. Monitorear notas finales.",
-    },
-]
-
-
-def _get_val(row: Dict, *keys: str, default: Any = None) -> Any:
-    """Obtiene valor de row usando múltiples posibles nombres de columna."""
-    for key in keys:
-        if key in row:
-            return row[key]
-    return default
-
-
-def _has_enrollment_data(row: Dict) -> bool:
-    enrolled_1 = _get_val(row, "curricular_units_1st_sem_enrolled", "Curricular units 1st sem (enrolled)", default=0) or 0
-    enrolled_2 = _get_val(row, "curricular_units_2nd_sem_enrolled", "Curricular units 2nd sem (enrolled)", default=0) or 0
-    return (enrolled_1 + enrolled_2) > 0
-
-
-def _has_grade_data(row: Dict) -> bool:
-    grade_1 = _get_val(row, "curricular_units_1st_sem_grade", "Curricular units 1st sem (grade)")
-    grade_2 = _get_val(row, "curricular_units_2nd_sem_grade", "Curricular units 2nd sem (grade)")
-    return grade_1 is not None and grade_2 is not None
+from __future__ import annotations
 
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
+from dropout_common.lazy_imports import lazy_import
+from dropout_common.rule_engine import RuleSet, RuleSetLoader
+
+from app.utils.dedup import RowGroups, unique_rows
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+RISK_RULES_PATH = Path(__file__).resolve().parent.parent / "risk_rules.json"
+
+_loader: Optional[RuleSetLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_rules_loader() -> RuleSetLoader:
+    """Loader global del archivo de reglas (`RISK_RULES_PATH` o el de la app)."""
+    global _loader
+    if _loader is not None:
+        return _loader
+
+    from app.config import settings
+
+    path = getattr(settings, "RISK_RULES_PATH", None) or RISK_RULES_PATH
+    with _loader_lock:
+        if _loader is None:
+            _loader = RuleSetLoader(Path(path))
+    return _loader
+
+
+def get_risk_rules() -> RuleSet:
+    """Reglas compiladas vigentes (recompiladas si el archivo cambió)."""
+    return get_rules_loader().get()
 
 
 def evaluate_risk_rules(
@@ -113,36 +64,22 @@ def evaluate_risk_rules(
         stop_on_first: Si True, retorna solo la primera regla que se cumple.
 
     Returns:
-        Lista de reglas que aplican, con categoria, nivel_riesgo, recommendation, intervention_steps.
+        Lista de reglas que aplican, con categoria, nivel_riesgo, recommendation e
+        intervention_steps.
     """
     # Normalizar row: aceptar tanto dict como objeto con atributos
     if hasattr(row, "to_dict"):
         row = row.to_dict()
-    row = dict(row)
-
-    matched: List[Dict[str, Any]] = []
-    for rule in RISK_RULES:
-        try:
-            if rule["eval_func"](row, risk_score):
-                matched.append({
-                    "categoria": rule["categoria"],
-                    "nivel_riesgo": rule["nivel_riesgo"],
-                    "recommendation": rule["recommendation"],
-                    "intervention_steps": rule["intervention_steps"],
-                })
-                if stop_on_first:
-                    break
-        except (KeyError, TypeError, ZeroDivisionError):
-            continue
-
-    if not matched and stop_on_first:
-        matched = [{
-            "categoria": "Sin clasificación específica",
-            "nivel_riesgo": "Medio",
-            "recommendation": "SEGUIMIENTO RUTINARIO - Evaluar caso según contexto.",
-            "intervention_steps": "Revisar historial académico. Monitorear próximas calificaciones. Mantener contacto con el estudiante."
-        }]
-
+    rule_set = get_risk_rules()
+    masks = rule_set.evaluate(
+        pd.DataFrame([dict(row)]), [np.nan if risk_score is None else risk_score]
+    )
+
+    matched = [
+        dict(rule.payload) for rule, hit in zip(rule_set.rules, masks[:, 0]) if hit
+    ]
+    if stop_on_first:
+        matched = matched[:1] or [dict(rule_set.default)]
     return matched
 
 
@@ -155,27 +92,89 @@ def get_risk_score(pred: Any) -> Any:
     return float(pred)
 
 
-def build_risk_details_dicts(input_df, predictions: list) -> List[Dict[str, Any]]:
+def _rule_input_groups(input_df, scores: List[Any]) -> Optional[RowGroups]:
+    """
+    Filas con las mismas variables y el mismo score (las reglas solo ven eso);
+    None si hay columnas no numéricas.
+    """
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in input_df.dtypes):
+        return None
+    keys = np.column_stack(
+        [
+            input_df.to_numpy(dtype=np.float64, na_value=np.nan),
+            np.array([np.nan if s is None else s for s in scores], dtype=np.float64),
+        ]
+    )
+    return unique_rows(keys)
+
+
+def build_risk_details_dicts(
+    input_df,
+    predictions: list,
+    decision_threshold: float = 0.5,
+) -> List[Dict[str, Any]]:
     """
     Evalúa reglas de riesgo por cada fila y su predicción.
     Retorna lista de dicts con detalles de reglas y datos de predicción:
     outcome, risk_score, risk_level y class_probabilities.
+
+    Todas las reglas se evalúan en una sola pasada vectorizada y se guardan
+    como un bitset por estudiante: la regla principal (categoria,
+    recomendación) es la de mayor prioridad y `matched_categories` lista
+    todas las que cumple, en orden de prioridad. Las filas con las mismas
+    variables y el mismo score se evalúan una sola vez, y cada bitset distinto
+    se decodifica una sola vez por lote.
+
+    El outcome es Dropout cuando risk_score > decision_threshold (el umbral
+    elegido al calibrar el modelo exportado; 0.5 si no hay calibración).
     """
-    if pd is None or not hasattr(input_df, "iterrows"):
+    if not hasattr(input_df, "columns"):
         return []
+    pred_list = list(predictions or [])[: len(input_df)]
+    scores = [get_risk_score(pred) for pred in pred_list]
+    scores += [None] * (len(input_df) - len(scores))
+
+    groups = _rule_input_groups(input_df, scores)
+    if groups is not None and groups.is_identity:
+        groups = None
+    rule_input, rule_scores = input_df, scores
+    if groups is not None:
+        first = groups.first.tolist()
+        rule_input = input_df.iloc[first].reset_index(drop=True)
+        rule_scores = [scores[i] for i in first]
+
+    rule_set = get_risk_rules()
+    masks = rule_set.evaluate(
+        rule_input, [np.nan if s is None else s for s in rule_scores]
+    )
+    unique_bitsets, inverse = np.unique(rule_set.bitsets(masks), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    if groups is not None:
+        inverse = groups.scatter(inverse)
+    decoded = [rule_set.decode(bitset) for bitset in unique_bitsets.tolist()]
+    labels = [
+        (
+            rules[0].payload if rules else rule_set.default,
+            [r.payload["categoria"] for r in rules],
+        )
+        for rules in decoded
+    ]
+
     risk_details = []
-    pred_list = predictions or []
-    for i, row in input_df.iterrows():
-        pred = pred_list[i] if i < len(pred_list) else None
-        risk_score = get_risk_score(pred)
-        matched = evaluate_risk_rules(row.to_dict(), risk_score, stop_on_first=True)
-        detail = matched[0] if matched else {}
+    for risk_score, label_index in zip(scores, inverse.tolist()):
+        payload, categories = labels[label_index]
+        detail: Dict[str, Any] = dict(payload)
+        detail["matched_categories"] = list(categories)
         rounded_risk_score = round(risk_score, 2) if risk_score is not None else None
-        rounded_grad_score = round(1.0 - risk_score, 2) if risk_score is not None else None
+        rounded_grad_score = (
+            round(1.0 - risk_score, 2) if risk_score is not None else None
+        )
         detail["risk_level"] = detail.get("nivel_riesgo", "Medio")
         detail["risk_score"] = rounded_risk_score
         detail["outcome"] = (
-            "Dropout" if risk_score is not None and risk_score > 0.5 else "Graduate"
+            "Dropout"
+            if risk_score is not None and risk_score > decision_threshold
+            else "Graduate"
         )
         detail["class_probabilities"] = (
             {
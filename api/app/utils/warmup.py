@@ -0,0 +1,62 @@
+"""
+Calentamiento en segundo plano después del arranque.
+
+El servidor empieza a aceptar conexiones apenas se registran las rutas, de
+modo que `/health` responde en milisegundos; las dependencias pesadas
+(numpy, pandas), las reglas, el store de predicciones y el modelo se cargan
+en un hilo aparte. Una petición que llegue antes simplemente hace esa carga
+por su cuenta (todas las cargas son perezosas e idempotentes).
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+_ready = threading.Event()
+_thread: Optional[threading.Thread] = None
+stage_seconds: Dict[str, float] = {}
+
+
+def _warm_up() -> None:
+    from dropout_common.lazy_imports import load_lazy_modules
+
+    from app.utils.model_loader import _load_serving_model
+    from app.utils.prediction_store import get_prediction_writer
+    from app.utils.risk_rules import get_risk_rules
+
+    stages = (
+        ("imports", load_lazy_modules),
+        ("risk_rules", get_risk_rules),
+        ("prediction_store", get_prediction_writer),
+        ("model", _load_serving_model),
+    )
+    try:
+        for name, load in stages:
+            start = time.perf_counter()
+            load()
+            stage_seconds[name] = time.perf_counter() - start
+        logger.info(
+            f"Warm-up completed: { {k: round(v, 3) for k, v in stage_seconds.items()} }"
+        )
+    except Exception as exc:
+        logger.warning(f"Warm-up incomplete, loading on first request instead: {exc}")
+    finally:
+        _ready.set()
+
+
+def start_warm_up() -> None:
+    """Lanza el calentamiento una sola vez por proceso."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+        _thread.start()
+
+
+def is_warm() -> bool:
+    return _ready.is_set()
+
+
+def wait_warm(timeout: Optional[float] = None) -> bool:
+    return _ready.wait(timeout)
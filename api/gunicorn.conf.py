@@ -0,0 +1,63 @@
+"""
+Configuración de gunicorn para producción: N workers uvicorn con la app y el
+modelo precargados en el proceso maestro, de modo que la memoria del modelo
+se comparte copy-on-write entre workers después del fork.
+
+Variables de entorno:
+- PORT: puerto de escucha (8080 por defecto)
+- WEB_CONCURRENCY: cantidad de workers (núcleos disponibles por defecto)
+- MODEL_NTHREAD: hilos de inferencia por worker (XGBoost o intra-op de ONNX
+  Runtime; núcleos / workers por defecto)
+- DRIFT_STATE_DIR: directorio donde los workers comparten sus conteos de drift
+"""
+
+import gc
+import os
+
+from loguru import logger
+
+if hasattr(os, "sched_getaffinity"):
+    cpu_count = len(os.sched_getaffinity(0))
+else:
+    cpu_count = os.cpu_count() or 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("WORKER_TIMEOUT", "120"))
+model_threads = int(os.environ.get("MODEL_NTHREAD", max(1, cpu_count // workers)))
+
+
+def when_ready(server):
+    # Se ejecuta en el maestro antes de crear workers. Solo se carga el modelo
+    # (con MODEL_BACKEND=compiled queda mapeado en memoria y compartido por el page cache):
+    # predecir aquí iniciaría el pool de OpenMP, que no sobrevive al fork.
+    from app.utils.model_loader import _load_serving_model
+
+    try:
+        _load_serving_model()
+    except FileNotFoundError as exc:
+        logger.warning(f"Model not preloaded: {exc}")
+    # Los conteos de drift de una ejecución anterior no cuentan para esta
+    from app.utils.drift import clear_drift_state
+    from app.utils.model_loader import drift_state_dir
+
+    state_dir = drift_state_dir()
+    if state_dir is not None:
+        clear_drift_state(state_dir)
+    # Tampoco la fracción de perfilado fijada con PUT /admin/profiling
+    from app.utils.profiling import get_profiler
+
+    get_profiler().clear_sample_rate()
+    # Saca los objetos ya creados del GC para que sus páginas no se copien al recorrerlas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.utils.model_loader import set_model_threads
+
+    try:
+        set_model_threads(model_threads)
+    except FileNotFoundError:
+        pass
@@ -1 +1 @@
-uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8080}
\ No newline at end of file
+gunicorn -c gunicorn.conf.py app.main:app
\ No newline at end of file
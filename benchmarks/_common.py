@@ -0,0 +1,170 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Los scripts se ejecutan desde la raíz del repositorio, p. ej.:
+
+    python benchmarks/bench_memory.py
+
+y necesitan tanto `src` (entrenamiento) como `app` (API) en el path.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+API_DIR = ROOT_DIR / "api"
+
+for _path in (ROOT_DIR, API_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+API_FEATURES: List[str] = [
+    "age_at_enrollment",
+    "gender",
+    "displaced",
+    "debtor",
+    "tuition_fees_up_to_date",
+    "scholarship_holder",
+    "curricular_units_1st_sem_enrolled",
+    "curricular_units_1st_sem_approved",
+    "curricular_units_1st_sem_grade",
+    "curricular_units_2nd_sem_enrolled",
+    "curricular_units_2nd_sem_approved",
+    "curricular_units_2nd_sem_grade",
+]
+
+# Esquema completo del CSV del frontend (36 columnas del dataset original).
+FRONTEND_CSV_COLUMNS: List[str] = [
+    "Marital status",
+    "Application mode",
+    "Application order",
+    "Course",
+    "Daytime/evening attendance",
+    "Previous qualification",
+    "Previous qualification (grade)",
+    "Nacionality",
+    "Mother's qualification",
+    "Father's qualification",
+    "Mother's occupation",
+    "Father's occupation",
+    "Admission grade",
+    "Displaced",
+    "Educational special needs",
+    "Debtor",
+    "Tuition fees up to date",
+    "Gender",
+    "Scholarship holder",
+    "Age at enrollment",
+    "International",
+    "Curricular units 1st sem (credited)",
+    "Curricular units 1st sem (enrolled)",
+    "Curricular units 1st sem (evaluations)",
+    "Curricular units 1st sem (approved)",
+    "Curricular units 1st sem (grade)",
+    "Curricular units 1st sem (without evaluations)",
+    "Curricular units 2nd sem (credited)",
+    "Curricular units 2nd sem (enrolled)",
+    "Curricular units 2nd sem (evaluations)",
+    "Curricular units 2nd sem (approved)",
+    "Curricular units 2nd sem (grade)",
+    "Curricular units 2nd sem (without evaluations)",
+    "Unemployment rate",
+    "Inflation rate",
+    "GDP",
+]
+
+
+@lru_cache(maxsize=1)
+def population():
+    """
+    Generador de `src.synthetic`: con el modelo exportado (SYNTHETIC_SPEC_PATH)
+    o, si no existe, ajustado sobre el dataset real; sin dataset (DVC sin
+    descargar) se ajusta sobre filas uniformes de relleno.
+    """
+    from src.config import DATA_PATH, SYNTHETIC_SPEC_PATH
+    from src.synthetic import (
+        PopulationGenerator,
+        fit_population,
+        load_population_spec,
+        placeholder_population,
+    )
+
+    if SYNTHETIC_SPEC_PATH.exists():
+        return PopulationGenerator(load_population_spec(SYNTHETIC_SPEC_PATH))
+    if DATA_PATH.exists():
+        from src.data_processor import load_and_prep_data
+
+        return PopulationGenerator(fit_population(*load_and_prep_data()))
+    print(f"(sin {SYNTHETIC_SPEC_PATH.name} ni dataset: población ajustada sobre filas uniformes)")
+    return PopulationGenerator(placeholder_population())
+
+
+def synthetic_population(n_rows: int, seed: int = 42):
+    """(X, y) sintéticos: las 12 variables del API (int64/float64) y el target binario."""
+    return population().sample(n_rows, seed)
+
+
+def synthetic_features(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Filas sintéticas con las 12 variables del API en tipos por defecto (int64/float64)."""
+    return synthetic_population(n_rows, seed)[0]
+
+
+@contextmanager
+def timer(results: Dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def print_table(title: str, rows: List[Dict[str, object]]) -> None:
+    print(f"\n== {title} ==")
+    if not rows:
+        return
+    headers = list(rows[0])
+    widths = [max(len(str(h)), *(len(str(r[h])) for r in rows)) for h in headers]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(headers, widths)))
+
+
+def synthetic_frontend_csv(n_rows: int, seed: int = 42) -> bytes:
+    """CSV con identificación del estudiante + las 36 columnas del frontend + Target."""
+    return synthetic_frontend_frame(n_rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def synthetic_frontend_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Frame con identificación del estudiante + las 36 columnas del frontend + Target."""
+    from src.synthetic import TARGET_NAMES
+
+    rng = np.random.default_rng(seed)
+    features, target = synthetic_population(n_rows, seed)
+    df = pd.DataFrame(
+        {
+            "student_id": [f"ST-{i:07d}" for i in range(n_rows)],
+            "name": [f"Student {i}" for i in range(n_rows)],
+            "semester": rng.integers(1, 11, n_rows),
+            "batch_id": "2026-01-MAIA",
+        }
+    )
+    for col in FRONTEND_CSV_COLUMNS:
+        normalized = (
+            col.replace(" ", "_").replace("(", "").replace(")", "")
+            .replace("/", "_").replace("'", "").lower()
+        )
+        if normalized in features.columns:
+            df[col] = features[normalized].to_numpy()
+        elif col in ("Admission grade", "Previous qualification (grade)"):
+            df[col] = np.round(rng.uniform(95, 190, n_rows), 1)
+        elif col in ("Unemployment rate", "Inflation rate", "GDP"):
+            df[col] = np.round(rng.normal(5, 3, n_rows), 2)
+        else:
+            df[col] = rng.integers(0, 20, n_rows)
+    df["Target"] = target.map(TARGET_NAMES).to_numpy()
+    return df
@@ -0,0 +1,75 @@
+"""
+Lectura del CSV de /predict/csv: lector anterior frente al lector con
+columnas/tipos declarados (motor C y pyarrow), con el esquema completo del
+frontend (36 columnas + identificación + Target).
+"""
+
+from _common import print_table, synthetic_frontend_csv, timer
+
+import io
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from app.api import CSV_COLUMNS
+from app.utils import preprocessing
+from app.utils.preprocessing import normalize_input_columns, read_csv_columns
+
+SIZES = (10_000, 100_000)
+REPEATS = 5
+
+
+def _legacy_read(contents: bytes) -> pd.DataFrame:
+    df = pd.read_csv(io.BytesIO(contents))
+    if "Target" in df.columns:
+        df = df.drop(columns=["Target"])
+    return normalize_input_columns(df.replace({np.nan: None}))
+
+
+def _declared_read(contents: bytes, use_pyarrow: bool) -> pd.DataFrame:
+    preprocessing._pyarrow_available.cache_clear()
+    original = preprocessing.find_spec
+    if not use_pyarrow:
+        preprocessing.find_spec = lambda _name: None  # type: ignore[assignment]
+    try:
+        return read_csv_columns(contents, CSV_COLUMNS).replace({np.nan: None})
+    finally:
+        preprocessing.find_spec = original
+        preprocessing._pyarrow_available.cache_clear()
+
+
+def _median_time(func, *args) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        results: dict = {}
+        with timer(results, "t"):
+            func(*args)
+        samples.append(results["t"])
+    return statistics.median(samples)
+
+
+def main() -> None:
+    rows = []
+    for n_rows in SIZES:
+        contents = synthetic_frontend_csv(n_rows)
+        legacy = _median_time(_legacy_read, contents)
+        c_engine = _median_time(_declared_read, contents, False)
+        rows.append(
+            {
+                "rows": n_rows,
+                "MB": round(len(contents) / 1e6, 1),
+                "legacy ms": round(legacy * 1e3, 1),
+                "declared C ms": round(c_engine * 1e3, 1),
+                "declared pyarrow ms": (
+                    round(_median_time(_declared_read, contents, True) * 1e3, 1)
+                    if preprocessing.find_spec("pyarrow") is not None
+                    else "n/a"
+                ),
+            }
+        )
+    print_table("Lectura CSV /predict/csv (mediana)", rows)
+
+
+if __name__ == "__main__":
+    main()
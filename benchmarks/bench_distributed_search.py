@@ -0,0 +1,141 @@
+"""
+Búsqueda distribuida con el backend local (pool de procesos) como sustituto
+del cluster.
+
+Para XGBoost y Random Forest (grillas reducidas) verifica que
+`distributed_grid_search` da los mismos puntajes y ranking que GridSearchCV,
+compara tiempos con 1 y N workers, y repite la búsqueda matando el proceso
+worker que evalúa el candidato más caro en su primer intento: la búsqueda
+debe reiniciar el pool, reenviar las tareas perdidas y terminar con los
+mismos resultados. Termina con código 1 si algo no coincide.
+`python benchmarks/bench_distributed_search.py [filas] [workers]`
+"""
+
+from _common import print_table, synthetic_frontend_frame
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV
+from sklearn.utils.class_weight import compute_sample_weight
+from xgboost import XGBClassifier
+
+from src.config import RF_BASE_PARAMS, XGB_BASE_PARAMS
+from src.data_processor import normalize_column_name, prep_frame
+from src.distributed_search import (
+    LocalBackend, distributed_grid_search, estimated_cost, evaluate_candidate
+)
+
+DEFAULT_ROWS = 5_000
+GRIDS = {
+    "xgboost": {"n_estimators": [50, 150], "max_depth": [3, 6], "learning_rate": [0.1]},
+    "random_forest": {"n_estimators": [50, 100], "max_depth": [None, 10], "min_samples_leaf": [1]},
+}
+
+
+class CrashOnce:
+    """Mata el proceso worker la primera vez que recibe el candidato `target`."""
+
+    def __init__(self, target: dict, marker: Path) -> None:
+        self.target = target
+        self.marker = marker
+
+    def __call__(self, model_name, params, data=None):
+        if params == self.target and not self.marker.exists():
+            self.marker.touch()
+            os._exit(1)
+        return evaluate_candidate(model_name, params, data)
+
+
+def training_frame(n_rows: int):
+    raw = synthetic_frontend_frame(n_rows)
+    raw.columns = [normalize_column_name(col) for col in raw.columns]
+    return prep_frame(raw)
+
+
+def gridsearchcv(model_name, X, y, grid) -> pd.DataFrame:
+    if model_name == "xgboost":
+        estimator = XGBClassifier(**XGB_BASE_PARAMS)
+        fit_params = {"sample_weight": compute_sample_weight(class_weight="balanced", y=y)}
+    else:
+        estimator, fit_params = RandomForestClassifier(**RF_BASE_PARAMS), {}
+    search = GridSearchCV(estimator, grid, cv=3, scoring="f1", n_jobs=-1)
+    search.fit(X, y, **fit_params)
+    return pd.DataFrame(search.cv_results_)
+
+
+def same_results(reference: pd.DataFrame, other: pd.DataFrame) -> bool:
+    diff = np.abs(reference["mean_test_score"].to_numpy() - other["mean_test_score"].to_numpy())
+    return bool(diff.max() < 1e-6 and (reference["rank_test_score"].to_numpy()
+                                       == other["rank_test_score"].to_numpy()).all())
+
+
+class CrashingBackend(LocalBackend):
+    """Backend local cuyo primer intento del candidato más caro mata al worker."""
+
+    def __init__(self, max_workers: int, target: dict, marker: Path) -> None:
+        super().__init__(max_workers)
+        self.crash = CrashOnce(target, marker)
+        self.restarts = 0
+
+    def submit(self, fn, *args):
+        return super().submit(self.crash if fn is evaluate_candidate else fn, *args)
+
+    def restart(self):
+        self.restarts += 1
+        super().restart()
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(2, os.cpu_count() or 1)
+    X, y = training_frame(n_rows)
+    ok = True
+    rows = []
+    for model_name, grid in GRIDS.items():
+        weights = compute_sample_weight(class_weight="balanced", y=y) if model_name == "xgboost" else None
+        reference = gridsearchcv(model_name, X, y, grid)
+
+        timings = {}
+        for n_workers in (1, workers):
+            start = time.perf_counter()
+            result = distributed_grid_search(
+                model_name, X, y, grid, sample_weight=weights, backend=LocalBackend(n_workers)
+            )
+            timings[n_workers] = time.perf_counter() - start
+            ok &= same_results(reference, result)
+
+        longest = max(result["params"], key=estimated_cost)
+        with tempfile.TemporaryDirectory(prefix="bench_search_") as tmp:
+            backend = CrashingBackend(workers, longest, Path(tmp) / "crashed")
+            start = time.perf_counter()
+            crashed = distributed_grid_search(
+                model_name, X, y, grid, sample_weight=weights, backend=backend
+            )
+            crash_seconds = time.perf_counter() - start
+        recovered = same_results(reference, crashed) and backend.restarts == 1
+        ok &= recovered
+
+        rows.append({
+            "modelo": model_name,
+            "candidatos": len(result),
+            "1_worker_s": round(timings[1], 2),
+            f"{workers}_workers_s": round(timings[workers], 2),
+            "con_caida_s": round(crash_seconds, 2),
+            "reinicios": backend.restarts,
+            "igual_a_gridsearchcv": same_results(reference, result),
+            "recupera_caida": recovered,
+        })
+    print_table(f"Búsqueda distribuida, backend local ({len(X)} filas, cv=3)", rows)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
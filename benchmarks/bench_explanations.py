@@ -0,0 +1,61 @@
+"""
+Costo adicional de las contribuciones TreeSHAP (`pred_contribs`) frente a
+solo probabilidades, por cada 1k filas.
+
+Entrena un XGBoost de tamaño típico del grid (200 árboles, profundidad 6)
+sobre datos sintéticos del tamaño del dataset real; TreeSHAP crece con
+profundidad², así que las configuraciones de profundidad 8 cuestan más.
+Los tamaños de lote se pueden pasar como argumentos:
+`python benchmarks/bench_explanations.py 1000 100000`.
+"""
+
+from _common import print_table, synthetic_features, timer
+
+import sys
+
+import numpy as np
+
+from app.utils import model_loader
+from app.utils.preprocessing import prepare_model_input, to_model_matrix
+
+TRAINING_ROWS = 4424
+BATCH_SIZES = (1_000, 10_000)
+
+
+def main() -> None:
+    from xgboost import XGBClassifier
+
+    train = to_model_matrix(prepare_model_input(synthetic_features(TRAINING_ROWS, seed=1)))
+    rng = np.random.default_rng(1)
+    y = (train["efficiency_ratio"] + rng.normal(0, 0.3, len(train)) < 0.6).astype(int)
+    model = XGBClassifier(
+        objective="binary:logistic", n_estimators=200, max_depth=6, learning_rate=0.05
+    ).fit(train, y)
+
+    rows = []
+    batch_sizes = [int(arg) for arg in sys.argv[1:]] or BATCH_SIZES
+    for n_rows in batch_sizes:
+        matrix = to_model_matrix(prepare_model_input(synthetic_features(n_rows, seed=2)))
+        results: dict = {}
+        with timer(results, "proba"):
+            model.predict_proba(matrix)
+        model_loader.explanation_cache.clear()
+        with timer(results, "contribs"):
+            model_loader.predict_with_contributions(model, matrix)
+        with timer(results, "cached"):
+            model_loader.predict_with_contributions(model, matrix)
+        per_k = 1_000 / n_rows
+        rows.append(
+            {
+                "rows": n_rows,
+                "proba ms/1k": round(results["proba"] * 1e3 * per_k, 2),
+                "proba+contribs ms/1k": round(results["contribs"] * 1e3 * per_k, 2),
+                "added ms/1k": round((results["contribs"] - results["proba"]) * 1e3 * per_k, 2),
+                "cached ms/1k": round(results["cached"] * 1e3 * per_k, 2),
+            }
+        )
+    print_table("Explicaciones TreeSHAP por lote", rows)
+
+
+if __name__ == "__main__":
+    main()
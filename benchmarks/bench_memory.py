@@ -0,0 +1,74 @@
+"""
+Huella de memoria del esquema compacto (int8/float32) frente a int64/float64.
+
+Mide el frame de entrenamiento (dataset real si existe, si no uno sintético del
+mismo tamaño) y un lote de scoring de 100k filas.
+"""
+
+from _common import ROOT_DIR, print_table, synthetic_features
+
+import pandas as pd
+
+from app.utils.preprocessing import MODEL_FEATURES, prepare_model_input, to_model_matrix
+
+TRAINING_ROWS = 4424
+SCORING_ROWS = 100_000
+
+
+def _legacy_model_input(df: pd.DataFrame) -> pd.DataFrame:
+    """Réplica del preprocesamiento anterior: todo en int64/float64."""
+    df = df.copy()
+    df["total_approved"] = (
+        df["curricular_units_1st_sem_approved"].astype(float)
+        + df["curricular_units_2nd_sem_approved"].astype(float)
+    )
+    df["total_enrolled"] = (
+        df["curricular_units_1st_sem_enrolled"].astype(float)
+        + df["curricular_units_2nd_sem_enrolled"].astype(float)
+    )
+    df["efficiency_ratio"] = df["total_approved"] / (df["total_enrolled"] + 1e-5)
+    df["grade_trend"] = (
+        df["curricular_units_2nd_sem_grade"].astype(float)
+        - df["curricular_units_1st_sem_grade"].astype(float)
+    )
+    return df[list(MODEL_FEATURES)]
+
+
+def _mb(df: pd.DataFrame) -> float:
+    return round(df.memory_usage(deep=True, index=False).sum() / 1e6, 3)
+
+
+def _training_frame() -> pd.DataFrame:
+    data_path = ROOT_DIR / "data" / "dropout_students.csv"
+    if data_path.exists():
+        from src.data_processor import load_and_prep_data
+
+        X, _ = load_and_prep_data()
+        return X[[c for c in X.columns if c in MODEL_FEATURES[:12]]].astype("float64")
+    return synthetic_features(TRAINING_ROWS)
+
+
+def main() -> None:
+    rows = []
+    for name, raw in (
+        ("training frame", _training_frame()),
+        (f"scoring batch {SCORING_ROWS}", synthetic_features(SCORING_ROWS)),
+    ):
+        legacy = _legacy_model_input(raw)
+        compact = prepare_model_input(raw)[list(MODEL_FEATURES)]
+        matrix = to_model_matrix(compact)
+        rows.append(
+            {
+                "frame": name,
+                "rows": len(raw),
+                "int64/float64 MB": _mb(legacy),
+                "int8/float32 MB": _mb(compact),
+                "float32 matrix MB": _mb(matrix),
+                "reduction": f"{_mb(legacy) / _mb(compact):.1f}x",
+            }
+        )
+    print_table("Memoria de las 16 variables del modelo", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Carga del modelo nativo (XGBoost .ubj al heap) frente al artefacto compilado
+con memory-map: tiempo de carga, memoria privada (anónima) que agrega cada
+copia cargada y latencia de predict_proba por 10k filas.
+
+Con varios workers o varias versiones para A/B, la memoria privada es la que
+se multiplica; las páginas del artefacto compilado viven en el page cache y
+se comparten entre procesos.
+"""
+
+from _common import print_table, synthetic_features, timer
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.compiled_model import CompiledEnsemble, compile_model
+from app.utils.preprocessing import prepare_model_input, to_model_matrix
+
+TRAINING_ROWS = 4424
+PREDICT_ROWS = 10_000
+COPIES = 4
+
+
+def _anonymous_kb() -> int:
+    """Memoria anónima (privada del proceso) según /proc/self/smaps_rollup."""
+    for line in Path("/proc/self/smaps_rollup").read_text().splitlines():
+        if line.startswith("Anonymous:"):
+            return int(line.split()[1])
+    return 0
+
+
+def main() -> None:
+    from xgboost import XGBClassifier
+
+    train = to_model_matrix(prepare_model_input(synthetic_features(TRAINING_ROWS, seed=1)))
+    rng = np.random.default_rng(1)
+    y = (train["efficiency_ratio"] + rng.normal(0, 0.3, len(train)) < 0.6).astype(int)
+    model = XGBClassifier(n_estimators=400, max_depth=8, learning_rate=0.05).fit(train, y)
+
+    workdir = Path(tempfile.mkdtemp())
+    model.save_model(workdir / "model.ubj")
+    compile_model(model, workdir / "compiled")
+    matrix = to_model_matrix(prepare_model_input(synthetic_features(PREDICT_ROWS, seed=2)))
+
+    rows = []
+    for name in ("native", "compiled"):
+        results: dict = {}
+        copies = []
+        before = _anonymous_kb()
+        with timer(results, "load"):
+            for _ in range(COPIES):
+                if name == "native":
+                    loaded = XGBClassifier()
+                    loaded.load_model(workdir / "model.ubj")
+                else:
+                    loaded = CompiledEnsemble(workdir / "compiled")
+                copies.append(loaded)
+        private_kb = (_anonymous_kb() - before) / COPIES
+        copies[0].predict_proba(matrix)  # calentamiento / primer fallo de página
+        with timer(results, "predict"):
+            copies[0].predict_proba(matrix)
+        rows.append(
+            {
+                "modelo": name,
+                "carga ms": round(results["load"] * 1e3 / COPIES, 2),
+                "privada MB/copia": round(private_kb / 1024, 2),
+                "predict ms/10k": round(results["predict"] * 1e3, 1),
+            }
+        )
+    print_table("Carga de modelo (400 árboles, profundidad 8)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Inferencia con el modelo nativo (XGBoost `predict_proba`), el artefacto
+compilado y ONNX Runtime en CPU, para lotes de 1 a 100k filas: latencia
+(mediana por llamada) y throughput (filas/s). ONNX se mide con 1 hilo
+intra-op (un worker por núcleo) y con un hilo por núcleo.
+
+Verifica además que las probabilidades de ONNX coinciden con las nativas
+(ONNX_MAX_ABS_DIFF); termina con código 1 si no.
+`python benchmarks/bench_onnx.py`
+"""
+
+from _common import print_table, synthetic_features
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.compiled_model import CompiledEnsemble, compile_model
+from app.utils.preprocessing import prepare_model_input, to_model_matrix
+from dropout_common.onnx_model import ONNX_MAX_ABS_DIFF, OnnxModel, convert_to_onnx
+
+TRAINING_ROWS = 4424
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+# Segundos mínimos de medición por backend y tamaño de lote
+MIN_SECONDS = 0.5
+
+
+def _median_latency(predict, batch) -> float:
+    predict(batch)  # calentamiento
+    timings = []
+    deadline = time.perf_counter() + MIN_SECONDS
+    while time.perf_counter() < deadline or len(timings) < 3:
+        start = time.perf_counter()
+        predict(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main() -> None:
+    from xgboost import XGBClassifier
+
+    train = to_model_matrix(prepare_model_input(synthetic_features(TRAINING_ROWS, seed=1)))
+    rng = np.random.default_rng(1)
+    y = (train["efficiency_ratio"] + rng.normal(0, 0.3, len(train)) < 0.6).astype(int)
+    model = XGBClassifier(n_estimators=400, max_depth=8, learning_rate=0.05).fit(train, y)
+    model.set_params(n_jobs=1)
+
+    workdir = Path(tempfile.mkdtemp())
+    matrix = to_model_matrix(prepare_model_input(synthetic_features(max(BATCH_SIZES), seed=2)))
+    max_diff = convert_to_onnx(
+        model, workdir / "model.onnx", list(train.columns), check_rows=matrix.head(10_000)
+    )
+    cores = os.cpu_count() or 1
+    backends = {
+        "native": model.predict_proba,
+        "compiled": CompiledEnsemble(compile_model(model, workdir / "compiled")).predict_proba,
+        "onnx_1_hilo": OnnxModel(workdir / "model.onnx", intra_op_threads=1).predict_proba,
+    }
+    if cores > 1:
+        backends[f"onnx_{cores}_hilos"] = OnnxModel(
+            workdir / "model.onnx", intra_op_threads=cores
+        ).predict_proba
+
+    rows = []
+    for batch_size in BATCH_SIZES:
+        batch = matrix.head(batch_size)
+        row = {"filas": batch_size}
+        for name, predict in backends.items():
+            latency = _median_latency(predict, batch)
+            row[f"{name}_ms"] = round(latency * 1000, 3)
+            row[f"{name}_filas_s"] = int(batch_size / latency)
+        rows.append(row)
+    print_table(f"Inferencia por backend (400 árboles, profundidad 8, {cores} núcleos)", rows)
+    print(f"\nDiferencia máxima ONNX vs nativo: {max_diff:.2e} (máximo {ONNX_MAX_ABS_DIFF:.0e})")
+    if max_diff > ONNX_MAX_ABS_DIFF:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
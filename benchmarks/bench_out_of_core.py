@@ -0,0 +1,106 @@
+"""
+Memoria pico del entrenamiento de XGBoost según el tamaño del dataset.
+
+Genera exportaciones Parquet de tamaño creciente con la población sintética
+de `src.synthetic` (escritas por chunks) y entrena en un proceso nuevo por
+caso, para medir su pico de RSS:
+
+  * pandas: el dataset completo en un DataFrame, como `load_and_prep_data`;
+  * quantile: chunks por `DataIter` a un `QuantileDMatrix` en memoria;
+  * external: chunks por `DataIter` a un `ExtMemQuantileDMatrix` en disco.
+
+Termina con código 1 si el pico del modo external crece más de
+MAX_EXTERNAL_GROWTH veces entre el dataset más chico y el más grande.
+`python benchmarks/bench_out_of_core.py [filas ...]`
+"""
+
+from _common import ROOT_DIR, population, print_table
+
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.synthetic import write_parquet
+
+DATASET_ROWS = [250_000, 500_000, 1_000_000]
+WRITE_CHUNK_ROWS = 100_000
+TRAIN_CHUNK_ROWS = 100_000
+N_ESTIMATORS = 20
+MODES = ("pandas", "quantile", "external")
+MAX_EXTERNAL_GROWTH = 1.5
+
+
+def write_dataset(path: Path, n_rows: int) -> None:
+    """Parquet de `n_rows` filas de la población sintética, escrito chunk a chunk."""
+    write_parquet(population(), path, n_rows, chunk_rows=WRITE_CHUNK_ROWS)
+
+
+def _train(mode: str, path: str) -> dict:
+    """Corre en el proceso hijo: entrena en `mode` y reporta tiempo y pico de RSS."""
+    from src.out_of_core import evaluate_streaming, parquet_files, train_booster
+
+    start = time.perf_counter()
+    paths = parquet_files(path)
+    params = {"n_estimators": N_ESTIMATORS}
+    if mode == "pandas":
+        import pandas as pd
+        import xgboost as xgb
+        from xgboost import XGBClassifier
+
+        from src.config import OOC_XGB_PARAMS, XGB_BASE_PARAMS
+        from src.data_processor import prep_frame, normalize_column_name
+
+        raw = pd.read_parquet(path)
+        raw.columns = [normalize_column_name(col) for col in raw.columns]
+        X, y = prep_frame(raw)
+        del raw
+        model = XGBClassifier(**XGB_BASE_PARAMS, **{**OOC_XGB_PARAMS, **params}, tree_method="hist")
+        model.fit(X, y)
+        booster: xgb.Booster = model.get_booster()
+    else:
+        booster = train_booster(paths, params, TRAIN_CHUNK_ROWS, external_memory=mode == "external")
+    evaluate_streaming(booster, paths, TRAIN_CHUNK_ROWS)
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def measure(mode: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(path)],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DATASET_ROWS
+    rows = []
+    peaks = {}
+    with tempfile.TemporaryDirectory(prefix="bench_ooc_") as tmp:
+        for n_rows in sizes:
+            path = Path(tmp) / f"students_{n_rows}.parquet"
+            write_dataset(path, n_rows)
+            for mode in MODES:
+                result = measure(mode, path)
+                peaks[(mode, n_rows)] = result["peak_rss_mb"]
+                rows.append({"filas": n_rows, "modo": mode, **result})
+            path.unlink()
+    print_table("Entrenamiento XGBoost: memoria pico por tamaño del dataset", rows)
+
+    growth = peaks[("external", sizes[-1])] / peaks[("external", sizes[0])]
+    print(f"\nCrecimiento del pico (external) {sizes[0]} -> {sizes[-1]} filas: {growth:.2f}x")
+    if len(sizes) > 1 and growth > MAX_EXTERNAL_GROWTH:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(_train(sys.argv[2], sys.argv[3])))
+    else:
+        main()
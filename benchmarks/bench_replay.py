@@ -0,0 +1,104 @@
+"""
+Reproduce el audit log NDJSON del API como traza de tráfico real.
+
+Lee el archivo de `AUDIT_LOG_PATH` (y sus rotaciones `.N` … `.1`, en orden
+cronológico), reenvía cada petición muestreada (las que guardaron `body`) con
+sus mismos parámetros y compara la latencia registrada en producción con la
+de la reproducción, por endpoint. Sin URL la traza se reproduce en proceso con
+el TestClient de FastAPI (requiere el modelo exportado en app/model o el
+wheel instalado); con URL, contra un servidor en ejecución.
+
+`python benchmarks/bench_replay.py ruta/requests.jsonl [http://localhost:8001]`
+"""
+
+from _common import print_table
+
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+def read_trace(path: Path) -> Iterator[dict]:
+    """Registros con cuerpo de `path` y sus rotaciones, del más antiguo al más reciente."""
+    rotated = sorted(
+        path.parent.glob(f"{path.name}.*"),
+        key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+        reverse=True,
+    )
+    for file in [*rotated, path]:
+        with open(file, encoding="utf-8") as handle:
+            for line in handle:
+                entry = json.loads(line)
+                if entry.get("body") is not None:
+                    yield entry
+
+
+def replay(client, entry: dict) -> int:
+    method, path = entry["title"].split(" ", 1)
+    params = entry.get("params") or {}
+    body = entry["body"]
+    if path.endswith("/predict/csv"):
+        files = {"file": (body["filename"] or "trace.csv", body["csv"].encode("utf-8"), "text/csv")}
+        response = client.request(method, path, params=params, files=files)
+    else:
+        response = client.request(method, path, params=params, json=body)
+    return response.status_code
+
+
+def _client(base_url: str = ""):
+    if base_url:
+        import httpx
+
+        return httpx.Client(base_url=base_url, timeout=120)
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    trace = list(read_trace(Path(sys.argv[1])))
+    if not trace:
+        sys.exit("La traza no tiene peticiones muestreadas (AUDIT_LOG_SAMPLE_RATE > 0)")
+
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    replayed: Dict[str, List[float]] = defaultdict(list)
+    rows: Dict[str, int] = defaultdict(int)
+    failures: Dict[str, int] = defaultdict(int)
+    with _client(sys.argv[2] if len(sys.argv) > 2 else "") as client:
+        for entry in trace:
+            title = entry["title"]
+            start = time.perf_counter()
+            status = replay(client, entry)
+            replayed[title].append((time.perf_counter() - start) * 1000)
+            recorded[title].append(entry["latency_ms"])
+            rows[title] += entry["rows"]
+            failures[title] += int(status != entry.get("status_code", 200))
+
+    print_table(
+        f"Reproducción de {len(trace)} peticiones",
+        [
+            {
+                "endpoint": title,
+                "peticiones": len(replayed[title]),
+                "filas": rows[title],
+                "registrada_p50_ms": round(float(np.median(recorded[title])), 1),
+                "replay_p50_ms": round(float(np.median(replayed[title])), 1),
+                "replay_p95_ms": round(float(np.percentile(replayed[title], 95)), 1),
+                "estado_distinto": failures[title],
+            }
+            for title in replayed
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Búsqueda de hiperparámetros de XGBoost: GridSearchCV vs folds cacheados.
+
+Corre XGB_PARAM_GRID (o una grilla reducida con --quick) sobre datos
+sintéticos preprocesados con `prep_frame`, con los mismos pesos balanceados
+que `train_and_log_top_experiments`, y compara:
+
+  * gridsearchcv: `GridSearchCV(XGBClassifier, cv=3, scoring='f1', n_jobs=-1)`;
+  * cached: `src.search.xgb_grid_search` (un QuantileDMatrix por fold).
+
+El tiempo se mide con la configuración de `train.py`. Aparte, ambas búsquedas
+corren en un solo hilo bajo cProfile (que no sigue otros hilos ni procesos)
+para contar las construcciones de DMatrix / QuantileDMatrix por candidato.
+Termina con código 1 si los puntajes o el ranking no coinciden.
+`python benchmarks/bench_search.py [filas] [--quick]`
+"""
+
+from _common import print_table, synthetic_frontend_frame
+
+import cProfile
+import inspect
+import pstats
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import GridSearchCV, ParameterGrid
+from sklearn.utils.class_weight import compute_sample_weight
+from xgboost import XGBClassifier
+
+from src.config import XGB_BASE_PARAMS, XGB_PARAM_GRID
+from src.data_processor import normalize_column_name, prep_frame
+from src.search import xgb_grid_search
+
+DEFAULT_ROWS = 20_000
+QUICK_GRID = {"n_estimators": [50, 100], "max_depth": [3, 5], "learning_rate": [0.1]}
+# Solo para contar construcciones: el perfil de la grilla completa no aporta más
+PROFILE_GRID = {"n_estimators": [50], "max_depth": [3, 5], "learning_rate": [0.1]}
+
+
+def training_frame(n_rows: int):
+    raw = synthetic_frontend_frame(n_rows)
+    raw.columns = [normalize_column_name(col) for col in raw.columns]
+    X, y = prep_frame(raw)
+    return X, y, compute_sample_weight(class_weight="balanced", y=y)
+
+
+def gridsearchcv(X, y, weights, grid, n_jobs=-1) -> pd.DataFrame:
+    search = GridSearchCV(XGBClassifier(**XGB_BASE_PARAMS), grid, cv=3, scoring="f1", n_jobs=n_jobs)
+    search.fit(X, y, sample_weight=weights)
+    return pd.DataFrame(search.cv_results_)
+
+
+def matrix_builds(fn) -> dict:
+    """Llamadas a DMatrix.__init__ y QuantileDMatrix.__init__ durante `fn()`."""
+    profile = cProfile.Profile()
+    profile.runcall(fn)
+    inits = {
+        (inspect.getsourcefile(cls), inspect.getsourcelines(cls.__init__)[1]): cls.__name__
+        for cls in (xgb.DMatrix, xgb.QuantileDMatrix)
+    }
+    counts = dict.fromkeys(inits.values(), 0)
+    for (filename, line, name), (_, calls, *_rest) in pstats.Stats(profile).stats.items():
+        if name == "__init__" and (filename, line) in inits:
+            counts[inits[(filename, line)]] += calls
+    return counts
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    grid = QUICK_GRID if "--quick" in sys.argv else XGB_PARAM_GRID
+    X, y, weights = training_frame(int(args[0]) if args else DEFAULT_ROWS)
+    n_candidates = len(ParameterGrid(grid))
+
+    rows, results = [], {}
+    for name, search in (
+        ("gridsearchcv", lambda: gridsearchcv(X, y, weights, grid)),
+        ("cached", lambda: xgb_grid_search(X, y, grid, sample_weight=weights)),
+    ):
+        start = time.perf_counter()
+        results[name] = search()
+        seconds = time.perf_counter() - start
+        rows.append({"busqueda": name, "candidatos": n_candidates, "segundos": round(seconds, 2)})
+    speedup = rows[0]["segundos"] / rows[1]["segundos"]
+    print_table(f"Búsqueda XGBoost ({len(X)} filas, cv=3)", rows)
+    print(f"\nAceleración cached vs GridSearchCV: {speedup:.2f}x")
+
+    profile_candidates = len(ParameterGrid(PROFILE_GRID))
+    builds = []
+    for name, search in (
+        ("gridsearchcv", lambda: gridsearchcv(X, y, weights, PROFILE_GRID, n_jobs=1)),
+        ("cached", lambda: xgb_grid_search(X, y, PROFILE_GRID, sample_weight=weights, n_threads=1)),
+    ):
+        counts = matrix_builds(search)
+        builds.append({
+            "busqueda": name,
+            **counts,
+            "total": sum(counts.values()),
+        })
+    print_table(f"Construcciones de matrices ({profile_candidates} candidatos, 3 folds)", builds)
+    print("GridSearchCV construye una por fit (+1 del refit); cached, una por fold en total.")
+
+    reference, cached = results["gridsearchcv"], results["cached"]
+    max_diff = np.abs(reference["mean_test_score"].to_numpy() - cached["mean_test_score"].to_numpy()).max()
+    same_rank = (reference["rank_test_score"].to_numpy() == cached["rank_test_score"].to_numpy()).all()
+    print(f"Máxima diferencia en mean_test_score: {max_diff:.2e} | mismo ranking: {same_rank}")
+    if max_diff > 1e-6 or not same_rank:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Tiempo de arranque del API como presupuesto de rendimiento.
+
+Mide, en procesos nuevos:
+  * `import app.main` (mínimo de varias corridas) y guarda la salida de
+    `python -X importtime` con los módulos más costosos;
+  * el tiempo desde lanzar uvicorn hasta la primera respuesta 200 de
+    `/health` y hasta el primer `/predict` exitoso (requiere el modelo
+    exportado en app/model o el wheel instalado).
+
+Termina con código 1 si alguna medición supera su presupuesto.
+`python benchmarks/bench_startup.py [directorio_de_artefactos]`
+"""
+
+from _common import API_DIR, ROOT_DIR, print_table
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+IMPORT_RUNS = 5
+TOP_IMPORTS = 12
+SERVER_TIMEOUT_S = 60.0
+POLL_INTERVAL_S = 0.005
+
+# Presupuestos en milisegundos (ajustar solo con una medición que lo justifique)
+STARTUP_BUDGETS_MS: Dict[str, float] = {
+    "import app.main": 900.0,
+    "first /health": 1_500.0,
+    "first /predict": 8_000.0,
+}
+
+PREDICT_PAYLOAD = {
+    "inputs": [
+        {
+            "student_info": {"student_id": "ST-BENCH-001", "name": "Bench"},
+            "academic_context": {"semester": 4, "batch_id": "2026-01-MAIA", "course": "CS"},
+            "features": {
+                "age_at_enrollment": 19,
+                "gender": 1,
+                "displaced": 0,
+                "debtor": 0,
+                "tuition_fees_up_to_date": 1,
+                "scholarship_holder": 1,
+                "curricular_units_1st_sem_enrolled": 6,
+                "curricular_units_1st_sem_approved": 6,
+                "curricular_units_1st_sem_grade": 14.5,
+                "curricular_units_2nd_sem_enrolled": 6,
+                "curricular_units_2nd_sem_approved": 6,
+                "curricular_units_2nd_sem_grade": 15.0,
+            },
+        }
+    ]
+}
+
+
+def _api_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(API_DIR), str(ROOT_DIR), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+def measure_import(artifacts: Path) -> Tuple[float, List[Dict[str, object]]]:
+    """Mínimo de `import app.main` en procesos nuevos y top de `-X importtime`."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(IMPORT_RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=API_DIR, env=_api_env(),
+            capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+
+    trace = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=API_DIR, env=_api_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    (artifacts / "importtime.txt").write_text(trace, encoding="utf-8")
+
+    modules = []
+    for line in trace.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    top = sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:TOP_IMPORTS]
+    return min(timings) * 1000, top
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url: str, payload: Optional[dict] = None) -> int:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except (urllib.error.URLError, ConnectionError):
+        return 0
+
+
+def measure_server(artifacts: Path) -> Dict[str, Optional[float]]:
+    """Milisegundos desde lanzar uvicorn hasta el primer /health y el primer /predict OK."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}/api/v1"
+    log = open(artifacts / "server.log", "w", encoding="utf-8")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=_api_env(), stdout=log, stderr=subprocess.STDOUT,
+    )
+    results: Dict[str, Optional[float]] = {"first /health": None, "first /predict": None}
+    try:
+        deadline = start + SERVER_TIMEOUT_S
+        while time.perf_counter() < deadline and _request(f"{base}/health") != 200:
+            if server.poll() is not None:
+                return results
+            time.sleep(POLL_INTERVAL_S)
+        else:
+            results["first /health"] = (time.perf_counter() - start) * 1000
+        while time.perf_counter() < deadline:
+            status = _request(f"{base}/predict", PREDICT_PAYLOAD)
+            if status == 200:
+                results["first /predict"] = (time.perf_counter() - start) * 1000
+                break
+            if status == 400:  # sin modelo exportado: el error es definitivo
+                break
+            time.sleep(POLL_INTERVAL_S)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        log.close()
+    return results
+
+
+def main() -> None:
+    artifacts = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(tempfile.mkdtemp(prefix="bench_startup_"))
+    artifacts.mkdir(parents=True, exist_ok=True)
+
+    import_ms, top = measure_import(artifacts)
+    print_table("Módulos más costosos al importar app.main", top)
+
+    measured = {"import app.main": import_ms, **measure_server(artifacts)}
+    rows = []
+    over_budget = False
+    for name, budget in STARTUP_BUDGETS_MS.items():
+        value = measured.get(name)
+        status = "n/a" if value is None else ("OK" if value <= budget else "OVER")
+        over_budget |= status == "OVER"
+        rows.append(
+            {
+                "medición": name,
+                "ms": "-" if value is None else round(value, 1),
+                "presupuesto_ms": budget,
+                "estado": status,
+            }
+        )
+    print_table("Presupuesto de arranque", rows)
+    (artifacts / "startup.json").write_text(json.dumps(measured, indent=2), encoding="utf-8")
+    print(f"\nArtefactos en {artifacts}")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Generador de población sintética: fidelidad, rendimiento y memoria.
+
+Ajusta `src.synthetic.fit_population` (sobre la población de `_common`) y
+reporta, para una muestra grande, la diferencia de medias y de correlaciones
+contra los datos de ajuste y las violaciones de restricciones (aprobadas >
+inscritas, notas fuera de rango). Luego escribe CSV, Parquet y payloads del
+API en un proceso nuevo por formato y tamaño, y reporta filas/s y pico de
+RSS: el pico no debe crecer con el número de filas.
+Termina con código 1 si hay violaciones o si el pico crece más de
+MAX_PEAK_GROWTH veces entre el tamaño más chico y el más grande.
+`python benchmarks/bench_synthetic.py [filas ...]`
+"""
+
+from _common import ROOT_DIR, population, print_table, synthetic_population
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SIZES = [1_000_000, 4_000_000]
+FIDELITY_ROWS = 200_000
+FORMATS = ("csv", "parquet", "api")
+MAX_PEAK_GROWTH = 1.25
+
+
+def fidelity() -> dict:
+    """Medias y correlaciones de la muestra generada vs los datos de ajuste."""
+    from src.synthetic import PopulationGenerator, SEMESTERS, fit_population
+
+    X, y = synthetic_population(20_000, seed=1)
+    sample, labels = PopulationGenerator(fit_population(X, y)).sample(FIDELITY_ROWS, 2)
+    violations = 0
+    for sem in SEMESTERS:
+        approved = sample[f"curricular_units_{sem}_sem_approved"]
+        grade = sample[f"curricular_units_{sem}_sem_grade"]
+        violations += int((approved > sample[f"curricular_units_{sem}_sem_enrolled"]).sum())
+        violations += int(((grade < 0) | (grade > 20)).sum())
+    return {
+        "filas": FIDELITY_ROWS,
+        "max_dif_media_rel": round(float(((X.mean() - sample.mean()).abs() / X.std()).max()), 4),
+        "max_dif_correlacion": round(float(np.abs(X.corr().to_numpy() - sample.corr().to_numpy()).max()), 4),
+        "dif_prior_target": round(abs(float(y.mean()) - float(labels.mean())), 4),
+        "violaciones": violations,
+    }
+
+
+def _write(fmt: str, n_rows: int, path: str) -> dict:
+    """Corre en el proceso hijo: escribe `n_rows` filas en `fmt` y mide."""
+    from src.synthetic import WRITERS
+
+    generator = population()
+    start = time.perf_counter()
+    WRITERS[fmt](generator, path, n_rows)
+    seconds = time.perf_counter() - start
+    return {
+        "filas_s": int(n_rows / seconds),
+        "mb": round(os.path.getsize(path) / 2**20, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def measure(fmt: str, n_rows: int, path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", fmt, str(n_rows), path],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    quality = fidelity()
+    print_table("Fidelidad de la población sintética", [quality])
+
+    rows, peaks = [], {}
+    with tempfile.TemporaryDirectory(prefix="bench_synthetic_") as tmp:
+        for fmt in FORMATS:
+            for n_rows in sizes:
+                path = os.path.join(tmp, f"students_{n_rows}.{fmt}")
+                result = measure(fmt, n_rows, path)
+                peaks[(fmt, n_rows)] = result["peak_rss_mb"]
+                rows.append({"formato": fmt, "filas": n_rows, **result})
+                os.unlink(path)
+    print_table("Escritura en streaming", rows)
+
+    growth = max(peaks[(fmt, sizes[-1])] / peaks[(fmt, sizes[0])] for fmt in FORMATS)
+    print(f"\nMáximo crecimiento del pico {sizes[0]} -> {sizes[-1]} filas: {growth:.2f}x")
+    if quality["violaciones"] or (len(sizes) > 1 and growth > MAX_PEAK_GROWTH):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(_write(sys.argv[2], int(sys.argv[3]), sys.argv[4])))
+    else:
+        main()
@@ -0,0 +1,85 @@
+"""
+Escalamiento de filas/s según la cantidad de workers, con el mismo esquema
+que usa gunicorn.conf.py: el modelo se entrena (carga) en el proceso padre,
+los workers se crean con fork y comparten su memoria copy-on-write, y cada
+uno limita XGBoost a núcleos / workers hilos.
+
+Cada tarea recorre el camino completo de un lote: preprocesamiento, matriz
+del modelo, predict_proba y reglas de riesgo (esta última parte retiene el
+GIL, por eso escala con procesos y no con hilos).
+`python benchmarks/bench_workers.py 1 2 4 8`
+"""
+
+from _common import print_table, synthetic_features
+
+import gc
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.utils.preprocessing import prepare_model_input, to_model_matrix
+from app.utils.risk_rules import build_risk_details_dicts
+
+TRAINING_ROWS = 4424
+CHUNK_ROWS = 2_000
+N_CHUNKS = 32
+
+_model = None
+_chunks = []
+
+
+def _init_worker(n_threads: int) -> None:
+    _model.get_booster().set_param({"nthread": n_threads})
+    _model.set_params(n_jobs=n_threads)
+
+
+def _score(index: int) -> int:
+    input_df = prepare_model_input(_chunks[index])
+    risk = _model.predict_proba(to_model_matrix(input_df))[:, 1]
+    build_risk_details_dicts(input_df, risk.tolist())
+    return len(input_df)
+
+
+def main() -> None:
+    global _model, _chunks
+    from xgboost import XGBClassifier
+
+    train = to_model_matrix(prepare_model_input(synthetic_features(TRAINING_ROWS, seed=1)))
+    rng = np.random.default_rng(1)
+    y = (train["efficiency_ratio"] + rng.normal(0, 0.3, len(train)) < 0.6).astype(int)
+    # n_jobs=1 al entrenar: el pool de OpenMP del padre no sobrevive al fork
+    _model = XGBClassifier(n_estimators=200, max_depth=6, n_jobs=1).fit(train, y)
+    _chunks = [synthetic_features(CHUNK_ROWS, seed=10 + i) for i in range(N_CHUNKS)]
+    gc.freeze()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    worker_counts = [int(arg) for arg in sys.argv[1:]] or sorted({1, 2, 4, cores})
+    ctx = mp.get_context("fork")
+
+    rows = []
+    baseline = None
+    for n_workers in worker_counts:
+        n_threads = max(1, cores // n_workers)
+        with ctx.Pool(n_workers, initializer=_init_worker, initargs=(n_threads,)) as pool:
+            pool.map(_score, range(n_workers))  # calentamiento
+            start = time.perf_counter()
+            n_rows = sum(pool.map(_score, range(N_CHUNKS), chunksize=1))
+            elapsed = time.perf_counter() - start
+        throughput = n_rows / elapsed
+        baseline = baseline or throughput
+        rows.append(
+            {
+                "workers": n_workers,
+                "nthread/worker": n_threads,
+                "rows/s": round(throughput),
+                "speedup": round(throughput / baseline, 2),
+            }
+        )
+    print_table(f"Escalamiento por workers ({cores} núcleos)", rows)
+
+
+if __name__ == "__main__":
+    main()
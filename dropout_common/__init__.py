@@ -0,0 +1,11 @@
+"""
+Código compartido entre el entrenamiento (`src`) y el API (`api/app`).
+
+- `rule_engine`: motor de reglas de riesgo (lo usan `src.predict` y el API).
+- `onnx_model`: conversión a ONNX al exportar el modelo y sesión de inferencia.
+- `lazy_imports`: importación diferida de numpy/pandas para el arranque del API.
+
+Los scripts de `src` lo importan desde la raíz del repositorio; el API lo
+recibe junto a `app/` en la imagen de Docker y, en desarrollo, con la raíz del
+repositorio en el path (`pythonpath` de pytest en `api/tox.ini`).
+"""
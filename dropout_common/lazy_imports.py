@@ -0,0 +1,60 @@
+"""
+Importación diferida de dependencias pesadas (numpy, pandas).
+
+`import app.main` solo necesita FastAPI y pydantic para registrar las rutas;
+pandas y numpy agregan cerca de medio segundo al arranque. Los módulos de la
+app los declaran con `pd = lazy_import("pandas")`: el proxy importa el módulo
+real en el primer acceso a un atributo y copia su espacio de nombres, así que
+los accesos siguientes no pasan por `__getattr__` y no tienen costo extra.
+"""
+
+import importlib
+import threading
+import types
+from importlib.util import find_spec
+from typing import Any, Dict
+
+_proxies: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule(types.ModuleType):
+    """Proxy de un módulo que se importa en el primer acceso a un atributo."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_loaded"] = False
+
+    def _load(self) -> types.ModuleType:
+        with self._lazy_lock:
+            module = importlib.import_module(self.__name__)
+            if not self._lazy_loaded:
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_lazy_loaded"] = True
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Proxy diferido de `name`. La disponibilidad se verifica de inmediato (sin
+    ejecutar el módulo), de modo que un `except ImportError` sigue funcionando.
+    """
+    proxy = _proxies.get(name)
+    if proxy is None:
+        if find_spec(name) is None:
+            raise ImportError(f"No module named '{name}'")
+        proxy = _proxies[name] = LazyModule(name)
+    return proxy
+
+
+def load_lazy_modules() -> None:
+    """Importa todos los módulos diferidos (calentamiento fuera del camino de /health)."""
+    for proxy in list(_proxies.values()):
+        proxy._load()
@@ -0,0 +1,148 @@
+"""
+Backend de inferencia con ONNX Runtime (CPU).
+
+`convert_to_onnx` convierte el campeón (XGBClassifier con onnxmltools o
+RandomForestClassifier con skl2onnx) a `model.onnx` junto al modelo MLflow
+exportado, con la versión del modelo y el orden de variables en los
+metadatos, y verifica contra el modelo original que las probabilidades
+coinciden. El API solo necesita `onnxruntime`: carga la sesión sin importar
+mlflow, xgboost ni sklearn.
+
+La sesión se ajusta para servir lotes desde varios workers: un hilo
+inter-op (el grafo es un único operador de ensamble), `intra_op_threads`
+hilos para el ensamble y sin spinning de los hilos ociosos, para que los
+workers no se roben CPU esperando trabajo. Los hilos de ONNX Runtime no
+sobreviven a un fork: `set_threads` (llamado desde `post_fork` de gunicorn vía
+`set_model_threads`) crea la sesión del worker.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+ONNX_FILE_NAME = "model.onnx"
+ONNX_INPUT_NAME = "input"
+ONNX_PROBABILITIES = "probabilities"
+ONNX_TARGET_OPSET = 15
+# Máxima diferencia absoluta aceptada contra `predict_proba` del modelo original
+ONNX_MAX_ABS_DIFF = 1e-5
+
+
+def _onnx_graph(model: Any, n_features: int) -> Any:
+    if hasattr(model, "get_booster"):
+        import xgboost as xgb
+        from onnxmltools import convert_xgboost
+        from onnxmltools.convert.common.data_types import FloatTensorType
+
+        # El conversor solo acepta variables llamadas f0..fn: se convierte una
+        # copia sin nombres (el orden de columnas queda en los metadatos)
+        booster = copy.deepcopy(model.get_booster())
+        booster.feature_names = None
+        unnamed = xgb.XGBClassifier()
+        unnamed.load_model(bytearray(booster.save_raw("json")))
+        return convert_xgboost(
+            unnamed,
+            initial_types=[(ONNX_INPUT_NAME, FloatTensorType([None, n_features]))],
+            target_opset=ONNX_TARGET_OPSET,
+        )
+    if hasattr(model, "estimators_"):
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+
+        return convert_sklearn(
+            model,
+            initial_types=[(ONNX_INPUT_NAME, FloatTensorType([None, n_features]))],
+            options={id(model): {"zipmap": False}},
+            target_opset=ONNX_TARGET_OPSET,
+        )
+    raise ValueError(f"Unsupported model type for ONNX export: {type(model).__name__}")
+
+
+def convert_to_onnx(
+    model: Any,
+    path: Path,
+    feature_names: Sequence[str],
+    model_version: str = "",
+    check_rows: Any = None,
+) -> float:
+    """
+    Guarda `model` en ONNX en `path`. Con `check_rows` (matriz del modelo)
+    compara las probabilidades de ONNX Runtime con `predict_proba` y no escribe
+    el archivo si difieren más de ONNX_MAX_ABS_DIFF. Retorna esa diferencia.
+    """
+    graph = _onnx_graph(model, len(feature_names))
+    for key, value in (
+        ("model_version", model_version),
+        ("feature_names", json.dumps(list(feature_names))),
+    ):
+        entry = graph.metadata_props.add()
+        entry.key, entry.value = key, value
+
+    max_diff = 0.0
+    if check_rows is not None:
+        session = OnnxModel(graph.SerializeToString())
+        expected = np.asarray(model.predict_proba(check_rows))[:, 1]
+        max_diff = float(np.max(np.abs(session.predict_proba(check_rows)[:, 1] - expected)))
+        if max_diff > ONNX_MAX_ABS_DIFF:
+            raise ValueError(
+                f"ONNX probabilities differ from the original model by {max_diff:.2e} "
+                f"(max {ONNX_MAX_ABS_DIFF:.0e})"
+            )
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(graph.SerializeToString())
+    tmp_path.replace(path)
+    return max_diff
+
+
+class OnnxModel:
+    """Sesión de ONNX Runtime con la interfaz `predict_proba` del modelo original."""
+
+    def __init__(self, source: Any, intra_op_threads: int = 0) -> None:
+        # `source`: ruta a model.onnx o los bytes del grafo
+        self.source = str(source) if isinstance(source, Path) else source
+        self.set_threads(intra_op_threads)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.version: str = metadata.get("model_version", "")
+        self.feature_names: Sequence[str] = json.loads(metadata.get("feature_names", "[]"))
+
+    def set_threads(self, intra_op_threads: int) -> None:
+        """Crea la sesión con `intra_op_threads` hilos (0 = uno por núcleo físico)."""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        self.intra_op_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            self.source, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names:
+                X = X[list(self.feature_names)]
+            X = X.to_numpy()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        (probabilities,) = self.session.run([ONNX_PROBABILITIES], {ONNX_INPUT_NAME: X})
+        return probabilities
+
+
+def load_onnx_model(path: Path, intra_op_threads: int = 0) -> Optional[OnnxModel]:
+    """Sesión para `path`; None si el archivo no existe."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return OnnxModel(path, intra_op_threads)
@@ -0,0 +1,352 @@
+"""
+Motor de reglas declarativas compiladas a predicados vectorizados de NumPy.
+
+Las reglas se escriben en un archivo JSON (o YAML) con la misma sintaxis de los
+`disparador` de negocio, p. ej. `tuition_fees_up_to_date == 0 OR debtor == 1`.
+Al cargar el archivo cada expresión se analiza una sola vez (módulo `ast`, con
+una lista blanca de nodos) y se convierte en una función que recibe las
+columnas del lote como arreglos y devuelve la máscara booleana de todas las
+filas: no hay `row.get` ni búsqueda de alias por fila.
+
+Sintaxis soportada: comparaciones (`== != < <= > >=`, también encadenadas),
+`AND` / `OR` / `NOT`, aritmética (`+ - * /`), números, `risk_score` y las
+funciones `notnull(x)` / `isnull(x)`. Un valor faltante (NaN) no cumple ninguna
+comparación, igual que `risk_score is not None and ...` en las reglas previas,
+salvo en sumas y restas, donde cuenta como 0 (el `valor or 0` de esas reglas).
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import operator
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+from loguru import logger
+
+from dropout_common.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+RULES_FORMAT_VERSION = 1
+SCORE_VARIABLE = "risk_score"
+RELOAD_CHECK_SECONDS = 2.0
+MAX_RULES = 64  # una regla por bit del bitset uint64 de cada estudiante
+
+Columns = Mapping[str, "np.ndarray"]
+Predicate = Callable[[Columns], Any]
+
+_KEYWORDS = re.compile(r"\b(AND|OR|NOT)\b")
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_FUNCTIONS = {
+    "notnull": lambda x: ~np.isnan(x),
+    "isnull": lambda x: np.isnan(x),
+}
+_ZERO_FILLED = (ast.Add, ast.Sub)
+_BOOLEAN_NODES = (ast.BoolOp, ast.Compare, ast.Call)
+
+
+class RuleSyntaxError(ValueError):
+    """Expresión de regla inválida o fuera de la sintaxis soportada."""
+
+
+def _fill_nan(values: Any) -> Any:
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def _compile_node(node: ast.AST, names: Set[str]) -> Predicate:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(value, names) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda cols: combine.reduce([part(cols) for part in parts])
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.Not):
+            return lambda cols: np.logical_not(operand(cols))
+        if isinstance(node.op, ast.USub):
+            return lambda cols: -operand(cols)
+        raise RuleSyntaxError(f"Operador no soportado: {type(node.op).__name__}")
+
+    if isinstance(node, ast.Compare):
+        terms = [_compile_node(term, names) for term in [node.left, *node.comparators]]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARISONS:
+                raise RuleSyntaxError(f"Comparación no soportada: {type(op).__name__}")
+            ops.append(_COMPARISONS[type(op)])
+
+        def compare(cols: Columns) -> Any:
+            values = [term(cols) for term in terms]
+            masks = [op(values[i], values[i + 1]) for i, op in enumerate(ops)]
+            return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+
+        return compare
+
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _ARITHMETIC:
+            raise RuleSyntaxError(f"Operador no soportado: {type(node.op).__name__}")
+        op = _ARITHMETIC[type(node.op)]
+        left, right = _compile_node(node.left, names), _compile_node(node.right, names)
+        if isinstance(node.op, _ZERO_FILLED):
+            return lambda cols: op(_fill_nan(left(cols)), _fill_nan(right(cols)))
+        return lambda cols: op(left(cols), right(cols))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or len(node.args) != 1:
+            raise RuleSyntaxError(f"Función no soportada: {ast.dump(node.func)}")
+        func, arg = _FUNCTIONS[node.func.id], _compile_node(node.args[0], names)
+        return lambda cols: func(arg(cols))
+
+    if isinstance(node, ast.Name):
+        name = node.id.lower()
+        names.add(name)
+        return lambda cols: cols[name]
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        value = float(node.value)
+        return lambda cols: value
+
+    raise RuleSyntaxError(f"Expresión no soportada: {type(node).__name__}")
+
+
+def compile_expression(expression: str) -> "CompiledExpression":
+    """Compila una expresión `disparador` a un predicado vectorizado."""
+    try:
+        tree = ast.parse(_KEYWORDS.sub(lambda m: m.group(1).lower(), expression), mode="eval")
+    except SyntaxError as exc:
+        raise RuleSyntaxError(f"Sintaxis inválida en '{expression}': {exc.msg}") from exc
+    body = tree.body
+    if not isinstance(body, _BOOLEAN_NODES) and not (
+        isinstance(body, ast.UnaryOp) and isinstance(body.op, ast.Not)
+    ):
+        raise RuleSyntaxError(f"La expresión '{expression}' no es una condición")
+    names: Set[str] = set()
+    predicate = _compile_node(body, names)
+    return CompiledExpression(expression, predicate, frozenset(names))
+
+
+class CompiledExpression:
+    __slots__ = ("source", "predicate", "names")
+
+    def __init__(self, source: str, predicate: Predicate, names: frozenset) -> None:
+        self.source = source
+        self.predicate = predicate
+        self.names = names
+
+    def __call__(self, cols: Columns, n_rows: int) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mask = self.predicate(cols)
+        return np.broadcast_to(np.asarray(mask, dtype=bool), (n_rows,))
+
+
+class RuleStats:
+    """Contadores acumulados de una regla desde que se cargó el archivo."""
+
+    __slots__ = ("batches", "rows", "matches", "seconds")
+
+    def __init__(self) -> None:
+        self.batches = 0
+        self.rows = 0
+        self.matches = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows_evaluated": self.rows,
+            "matches": self.matches,
+            "total_ms": round(self.seconds * 1000, 3),
+            "mean_us_per_row": round(self.seconds * 1e6 / self.rows, 4) if self.rows else None,
+        }
+
+
+class Rule:
+    """Regla compilada: condición vectorizada más el payload de negocio."""
+
+    def __init__(self, spec: Dict[str, Any], priority: int) -> None:
+        self.id = str(spec.get("id") or spec["categoria"])
+        self.priority = priority
+        self.when = compile_expression(spec["when"])
+        self.payload = {
+            "categoria": spec["categoria"],
+            "nivel_riesgo": spec["nivel_riesgo"],
+            "recommendation": spec["recommendation"],
+            "intervention_steps": spec["intervention_steps"],
+        }
+        self.impact: Optional[Dict[str, Any]] = spec.get("impact")
+        self.stats = RuleStats()
+
+
+class RuleSet:
+    """Conjunto ordenado de reglas compiladas, evaluado por lote completo."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = "") -> None:
+        if spec.get("format_version", RULES_FORMAT_VERSION) != RULES_FORMAT_VERSION:
+            raise ValueError(f"Formato de reglas no soportado: {spec.get('format_version')}")
+        self.source = source
+        self.version = str(spec.get("version", ""))
+        self.loaded_at = time.time()
+        self.rules = [Rule(rule, priority) for priority, rule in enumerate(spec["rules"])]
+        if len(self.rules) > MAX_RULES:
+            raise ValueError(f"Máximo {MAX_RULES} reglas por archivo (bitset de 64 bits)")
+        ids = [rule.id for rule in self.rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"IDs de regla duplicados en {source or 'el archivo de reglas'}")
+        self.default: Dict[str, Any] = dict(spec["default"])
+        self._columns: Dict[str, Dict[str, Any]] = {
+            name.lower(): column for name, column in spec.get("columns", {}).items()
+        }
+        self._lock = threading.Lock()
+
+        referenced = set().union(*(rule.when.names for rule in self.rules)) - {SCORE_VARIABLE}
+        unknown = referenced - set(self._columns)
+        if unknown:
+            raise ValueError(f"Variables sin declarar en 'columns': {sorted(unknown)}")
+        self.variables = sorted(referenced)
+
+    def _column(self, df: pd.DataFrame, name: str) -> np.ndarray:
+        column = self._columns[name]
+        for candidate in [name, *column.get("aliases", [])]:
+            if candidate in df.columns:
+                return pd.to_numeric(df[candidate], errors="coerce").to_numpy(dtype=np.float64)
+        default = column.get("default")
+        return np.full(len(df), np.nan if default is None else float(default))
+
+    def columns(self, df: pd.DataFrame, risk_scores: Any) -> Dict[str, np.ndarray]:
+        """Arreglos float64 de las variables usadas por las reglas (alias resueltos una vez)."""
+        cols = {name: self._column(df, name) for name in self.variables}
+        cols[SCORE_VARIABLE] = np.asarray(risk_scores, dtype=np.float64).reshape(len(df))
+        return cols
+
+    def evaluate(self, df: pd.DataFrame, risk_scores: Any) -> np.ndarray:
+        """Máscaras (n_reglas, n_filas): una pasada vectorizada por regla sobre el lote."""
+        n_rows = len(df)
+        cols = self.columns(df, risk_scores)
+        masks = np.zeros((len(self.rules), n_rows), dtype=bool)
+        timings = []
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            masks[i] = rule.when(cols, n_rows)
+            timings.append(time.perf_counter() - start)
+        matches = masks.sum(axis=1).tolist()
+        with self._lock:
+            for rule, seconds, matched in zip(self.rules, timings, matches):
+                rule.stats.batches += 1
+                rule.stats.rows += n_rows
+                rule.stats.matches += matched
+                rule.stats.seconds += seconds
+        return masks
+
+    def first_match(self, masks: np.ndarray) -> np.ndarray:
+        """Índice de la primera regla (en prioridad) que cumple cada fila; -1 si ninguna."""
+        if not len(self.rules):
+            return np.full(masks.shape[1], -1)
+        first = masks.argmax(axis=0)
+        return np.where(masks.any(axis=0), first, -1)
+
+    def bitsets(self, masks: np.ndarray) -> np.ndarray:
+        """
+        Bitset uint64 por fila con todas las reglas que cumple: el bit i es la
+        regla de prioridad i, así que el bit menos significativo es la principal.
+        """
+        weights = np.left_shift(np.uint64(1), np.arange(len(self.rules), dtype=np.uint64))
+        return np.bitwise_or.reduce(masks.astype(np.uint64) * weights[:, None], axis=0)
+
+    def decode(self, bitset: int) -> List[Rule]:
+        """Reglas de un bitset, en orden de prioridad."""
+        bitset = int(bitset)
+        return [rule for rule in self.rules if bitset >> rule.priority & 1]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "id": rule.id,
+                    "priority": rule.priority,
+                    "categoria": rule.payload["categoria"],
+                    "when": rule.when.source,
+                    **rule.stats.as_dict(),
+                }
+                for rule in self.rules
+            ]
+
+
+def read_rules_file(path: Path) -> Dict[str, Any]:
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        import yaml
+
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+class RuleSetLoader:
+    """
+    Mantiene el RuleSet compilado de un archivo y lo recompila cuando cambia
+    (mtime revisado como máximo cada `check_interval` segundos). Si la nueva
+    versión no compila se registra el error y se sigue sirviendo la anterior.
+    """
+
+    def __init__(self, path: Path, check_interval: float = RELOAD_CHECK_SECONDS) -> None:
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rule_set: Optional[RuleSet] = None
+        self._mtime_ns: Optional[int] = None
+        self._checked_at = 0.0
+        self.last_error: Optional[str] = None
+
+    def get(self) -> RuleSet:
+        now = time.monotonic()
+        if self._rule_set is not None and now - self._checked_at < self.check_interval:
+            return self._rule_set
+        with self._lock:
+            self._checked_at = now
+            mtime_ns = self.path.stat().st_mtime_ns
+            if self._rule_set is None or mtime_ns != self._mtime_ns:
+                self._compile(mtime_ns)
+        assert self._rule_set is not None
+        return self._rule_set
+
+    def reload(self) -> RuleSet:
+        """Fuerza la recompilación del archivo."""
+        with self._lock:
+            self._compile(self.path.stat().st_mtime_ns)
+        assert self._rule_set is not None
+        return self._rule_set
+
+    def _compile(self, mtime_ns: int) -> None:
+        try:
+            rule_set = RuleSet(read_rules_file(self.path), source=str(self.path))
+        except Exception as exc:
+            if self._rule_set is None:
+                raise
+            self.last_error = str(exc)
+            self._mtime_ns = mtime_ns
+            logger.error(f"Keeping previous risk rules; failed to compile {self.path}: {exc}")
+            return
+        self._rule_set = rule_set
+        self._mtime_ns = mtime_ns
+        self.last_error = None
+        logger.info(f"Compiled {len(rule_set.rules)} risk rules from {self.path}")
+
@@ -0,0 +1,9 @@
+
+-- Indexes for the lookups done by the dashboard and the API prediction store
+CREATE INDEX IF NOT EXISTS idx_predictions_batch_id ON public.predictions (batch_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_student_id ON public.predictions (student_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON public.predictions (created_at);
+
+-- Columns written by the API prediction store
+ALTER TABLE public.predictions ADD COLUMN IF NOT EXISTS categoria TEXT;
+ALTER TABLE public.predictions ADD COLUMN IF NOT EXISTS model_version TEXT;
@@ -0,0 +1,5 @@
+
+-- Feature fingerprint and raw probability written by the API prediction store,
+-- used to reuse unchanged results when a batch is rescored in delta mode
+ALTER TABLE public.predictions ADD COLUMN IF NOT EXISTS feature_fingerprint TEXT;
+ALTER TABLE public.predictions ADD COLUMN IF NOT EXISTS prediction DOUBLE PRECISION;
@@ -78,6 +78,13 @@ if [[ ! -f "prod_model/modelo_final/MLmodel" ]]; then
   exit 1
 fi
 
+# Opcional: el artefacto compilado ahorra memoria por worker pero puntúa más
+# lento que XGBoost nativo; solo se sirve con MODEL_BACKEND=compiled
+if [[ "${BUILD_COMPILED_MODEL:-0}" == "1" ]]; then
+  echo "Compiling memory-mappable serving artifact (prod_model/modelo_final/compiled)..."
+  (cd api && PYTHONPATH=.. python -m app.utils.compiled_model ../prod_model/modelo_final)
+fi
+
 WHEEL_VERSION="${WHEEL_VERSION:-0.1.$(date +%Y%m%d%H%M%S)}"
 WHEEL_PACKAGE_NAME="dropout_model_artifact"
 WHEEL_OUT_DIR="artifacts/wheels/dist"
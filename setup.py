@@ -9,5 +9,5 @@ setup(
     description="Installable artifact package for dropout modelo_final",
     packages=["dropout_model_artifact"],
     include_package_data=True,
-    package_data={"dropout_model_artifact": ["model/*"]},
+    package_data={"dropout_model_artifact": ["model/*", "model/compiled/*"]},
 )
@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_predict
+
+from src.config import CALIBRATION_CV, CALIBRATION_GRID_POINTS, CALIBRATION_METHOD
+
+
+def out_of_fold_scores(model, X, y, sample_weight=None, cv=CALIBRATION_CV):
+    """
+    Probabilidades out-of-fold del estimador (mismos hiperparámetros y pesos),
+    para ajustar el calibrador sobre scores que el modelo no vio al entrenar.
+    """
+    params = {"sample_weight": sample_weight} if sample_weight is not None else None
+    proba = cross_val_predict(
+        clone(model), X, y, cv=cv, method="predict_proba", params=params, n_jobs=-1
+    )
+    return proba[:, 1]
+
+
+def _isotonic_table(scores, y):
+    iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(scores, y)
+    # IsotonicRegression.predict interpola linealmente entre estos puntos
+    return iso.X_thresholds_.tolist(), iso.y_thresholds_.tolist()
+
+
+def _logit(p, eps=1e-6):
+    p = np.clip(np.asarray(p, dtype=float), eps, 1 - eps)
+    return np.log(p / (1 - p)).reshape(-1, 1)
+
+
+def _platt_table(scores, y, grid_points=CALIBRATION_GRID_POINTS):
+    lr = LogisticRegression().fit(_logit(scores), y)
+    # La sigmoide se muestrea en una grilla para servirla con la misma interpolación
+    x = np.linspace(0.0, 1.0, grid_points)
+    y_hat = lr.predict_proba(_logit(x))[:, 1]
+    return x.tolist(), y_hat.tolist()
+
+
+def apply_calibration(calibration, scores):
+    """Aplica la tabla de calibración a un arreglo de scores crudos."""
+    return np.clip(np.interp(np.asarray(scores, dtype=float), calibration["x"], calibration["y"]), 0.0, 1.0)
+
+
+def best_f1_threshold(scores, y):
+    """
+    Umbral t que maximiza F1 con la regla `score > t`, evaluando un corte entre
+    cada par de valores distintos de score (vectorizado con sumas acumuladas).
+    """
+    scores = np.asarray(scores, dtype=float)
+    y = np.asarray(y, dtype=int)
+    order = np.argsort(-scores, kind="stable")
+    sorted_scores, sorted_y = scores[order], y[order]
+    tp = np.cumsum(sorted_y)
+    fp = np.cumsum(1 - sorted_y)
+    # Último índice de cada grupo de empates: el corte no puede separar scores iguales
+    last = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    f1 = 2 * tp[last] / (tp[last] + fp[last] + y.sum())
+    best = last[int(np.argmax(f1))]
+    lower = sorted_scores[best + 1] if best + 1 < len(sorted_scores) else 0.0
+    return float((sorted_scores[best] + lower) / 2)
+
+
+def fit_calibration(model, X, y, sample_weight=None, method=CALIBRATION_METHOD):
+    """
+    Ajusta el calibrador (isotonic | sigmoid) sobre scores out-of-fold y elige el
+    umbral de decisión sobre los scores ya calibrados.
+    Retorna la tabla compacta que el API interpola en cada lote.
+    """
+    y = np.asarray(y, dtype=int)
+    return calibration_from_scores(out_of_fold_scores(model, X, y, sample_weight), y, method)
+
+
+def calibration_from_scores(scores, y, method=CALIBRATION_METHOD):
+    """
+    Calibrador y umbral a partir de scores out-of-fold ya calculados (p. ej. los
+    del reentrenamiento incremental, que no se obtienen con `clone`).
+    """
+    y = np.asarray(y, dtype=int)
+    if method == "isotonic":
+        x_table, y_table = _isotonic_table(scores, y)
+    elif method == "sigmoid":
+        x_table, y_table = _platt_table(scores, y)
+    else:
+        raise ValueError("Método de calibración no soportado. Usa 'isotonic' o 'sigmoid'.")
+
+    calibration = {"method": method, "x": x_table, "y": y_table}
+    calibration["decision_threshold"] = best_f1_threshold(apply_calibration(calibration, scores), y)
+    return calibration
+
+
+def save_calibration_artifacts(calibration):
+    """Guarda la tabla de calibración como artefacto JSON para MLflow y el API."""
+    json_path = "calibration.json"
+    with open(json_path, "w") as f:
+        json.dump(calibration, f, indent=4)
+
+    return json_path
@@ -5,6 +5,10 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_PATH = BASE_DIR / "data" / "dropout_students.csv"
 
+# Reglas de riesgo compartidas con el API (app/risk_rules.json)
+API_DIR = BASE_DIR / "api"
+RISK_RULES_PATH = API_DIR / "app" / "risk_rules.json"
+
 # MLflow
 MLFLOW_TRACKING_URI = "http://localhost:8001"
 MLFLOW_EXPERIMENT_NAME = "students-dropout"
@@ -37,6 +41,37 @@ API_FEATURES = [
     "curricular_units_2nd_sem_grade"
 ]
 
+ENGINEERED_FEATURES = [
+    "total_approved",
+    "total_enrolled",
+    "efficiency_ratio",
+    "grade_trend"
+]
+
+# Esquema compacto de tipos para las 16 variables del modelo.
+# Banderas binarias, conteos pequeños y notas (0-20) no necesitan int64/float64;
+# XGBoost y RandomForest convierten internamente a float32 de todos modos.
+FEATURE_DTYPES = {
+    "age_at_enrollment": "int8",
+    "gender": "int8",
+    "displaced": "int8",
+    "debtor": "int8",
+    "tuition_fees_up_to_date": "int8",
+    "scholarship_holder": "int8",
+    "curricular_units_1st_sem_enrolled": "int8",
+    "curricular_units_1st_sem_approved": "int8",
+    "curricular_units_1st_sem_grade": "float32",
+    "curricular_units_2nd_sem_enrolled": "int8",
+    "curricular_units_2nd_sem_approved": "int8",
+    "curricular_units_2nd_sem_grade": "float32",
+    "total_approved": "int8",
+    "total_enrolled": "int8",
+    "efficiency_ratio": "float32",
+    "grade_trend": "float32"
+}
+
+MODEL_FEATURES = API_FEATURES + ENGINEERED_FEATURES
+
 # Configuraciones de Modelos
 
 # XGBoost
@@ -55,6 +90,54 @@ XGB_PARAM_GRID = {
     'colsample_bytree': [0.8]
 }
 
+# Búsqueda de XGBoost con folds cuantizados una vez (src/search.py)
+SEARCH_MAX_BIN = 256
+SEARCH_THREADS = 4
+
+# Búsqueda distribuida (src/distributed_search.py): "" = en este proceso,
+# "local" = pool de procesos local, "dask" = cluster en SEARCH_SCHEDULER_ADDRESS
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "")
+SEARCH_SCHEDULER_ADDRESS = os.getenv("SEARCH_SCHEDULER_ADDRESS", "")
+SEARCH_WORKERS = None  # None = un proceso por núcleo (backend local)
+SEARCH_MAX_RETRIES = 2
+
+# Entrenamiento fuera de memoria (src/out_of_core.py) sobre Parquet por chunks
+OOC_CHUNK_ROWS = 250_000
+OOC_TEST_FRACTION = 0.2
+OOC_MAX_BIN = 256
+OOC_XGB_PARAMS = {
+    'max_depth': 6,
+    'learning_rate': 0.05,
+    'n_estimators': 400,
+    'gamma': 0,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8
+}
+
+# Reentrenamiento incremental (src/incremental.py) con un semestre nuevo
+INCREMENTAL_XGB_ROUNDS = 50
+INCREMENTAL_RF_TREES = 50
+INCREMENTAL_HOLDOUT = 0.3
+
+# Población sintética (src/synthetic.py) para pruebas de escala y de carga
+SYNTHETIC_SPEC_PATH = BASE_DIR / "artifacts" / "population_spec.json"
+SYNTHETIC_QUANTILES = 1001
+SYNTHETIC_CHUNK_ROWS = 100_000
+
+# Calibración de probabilidades (isotonic | sigmoid)
+CALIBRATION_METHOD = "isotonic"
+CALIBRATION_CV = 3
+CALIBRATION_GRID_POINTS = 101
+
+# Importancia por permutación (src/feature_importance.py), cacheada por run_id + hash del set
+PERMUTATION_REPEATS = 5
+PERMUTATION_THREADS = 4
+PERMUTATION_SEED = 42
+PERMUTATION_CACHE_DIR = BASE_DIR / "artifacts" / "permutation_importance"
+
+# Monitoreo de drift: intervalos por variable en la referencia exportada
+DRIFT_BINS = 10
+
 # Random Forest
 RF_BASE_PARAMS = {
     "random_state": 42,
@@ -1,48 +1,105 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from src.config import DATA_PATH, TARGET_COL, TARGET_MAPPING, COLS_TO_DROP, API_FEATURES
+from src.config import (
+    DATA_PATH, TARGET_COL, TARGET_MAPPING, COLS_TO_DROP, API_FEATURES,
+    ENGINEERED_FEATURES, FEATURE_DTYPES
+)
 
-def load_and_prep_data():
-    df = pd.read_csv(DATA_PATH)
-    
-    # Normalización de nombres
-    df.columns = [
+
+def normalize_column_name(col):
+    return (
         col.replace(' ', '_')
            .replace('(', '')
            .replace(')', '')
            .replace('/', '_')
            .replace("'", "")
            .lower()
-        for col in df.columns
-    ]
+    )
 
-    target = TARGET_COL.lower()
-    cols_to_drop_lower = [col.lower() for col in COLS_TO_DROP]
 
-    df = df[df[target].isin(['Dropout', 'Graduate'])].copy()
-    
-    # Feature Engineering: Creamos nuevas variables basadas en las existentes 
+def read_typed_csv(path=DATA_PATH):
+    """
+    Lee solo las columnas que usa el modelo (más el target) con el esquema
+    compacto de FEATURE_DTYPES, en lugar de inferir int64/float64 para todo el CSV.
+    """
+    dtypes = _typed_columns(pd.read_csv(path, nrows=0).columns)
+
+    df = pd.read_csv(path, usecols=list(dtypes), dtype=dtypes)
+    df.columns = [normalize_column_name(col) for col in df.columns]
+    return df
+
+
+def _typed_columns(header):
+    """Columnas del modelo (más el target) presentes en `header`, con su tipo de lectura."""
+    wanted = set(API_FEATURES) | {TARGET_COL.lower()}
+    # Las notas se leen en float64 para calcular grade_trend con la misma precisión
+    # que en el API; se compactan a float32 después del feature engineering.
+    return {
+        col: FEATURE_DTYPES.get(normalize_column_name(col), 'category').replace('float32', 'float64')
+        for col in header
+        if normalize_column_name(col) in wanted
+    }
+
+
+def iter_typed_parquet(paths, chunk_rows):
+    """
+    Igual que `read_typed_csv`, pero en chunks de hasta `chunk_rows` filas
+    sobre uno o varios archivos Parquet (nunca se carga el dataset completo).
+    """
+    import pyarrow.parquet as pq
+
+    for path in paths:
+        parquet = pq.ParquetFile(path)
+        dtypes = _typed_columns(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=list(dtypes)):
+            df = batch.to_pandas().astype(dtypes)
+            df.columns = [normalize_column_name(col) for col in df.columns]
+            yield df
+
+
+def add_engineered_features(df):
+    # Feature Engineering: Creamos nuevas variables basadas en las existentes
     df['total_approved'] = df['curricular_units_1st_sem_approved'] + df['curricular_units_2nd_sem_approved']
     df['total_enrolled'] = df['curricular_units_1st_sem_enrolled'] + df['curricular_units_2nd_sem_enrolled']
     df['efficiency_ratio'] = df['total_approved'] / (df['total_enrolled'] + 1e-5)
     df['grade_trend'] = df['curricular_units_2nd_sem_grade'] - df['curricular_units_1st_sem_grade']
 
+    engineered = {col: FEATURE_DTYPES[col] for col in ENGINEERED_FEATURES}
+    return df.astype(engineered)
+
+
+def load_and_prep_data():
+    # Normalización de nombres y tipos compactos desde la lectura
+    return prep_frame(read_typed_csv(DATA_PATH))
+
+
+def prep_frame(df):
+    """
+    Filtrado, feature engineering, limpieza y mapeo del target sobre un frame
+    ya normalizado; se aplica igual al CSV completo o a cada chunk de Parquet.
+    """
+    target = TARGET_COL.lower()
+    cols_to_drop_lower = [col.lower() for col in COLS_TO_DROP]
+
+    df = df[df[target].isin(['Dropout', 'Graduate'])].copy()
+
+    df = add_engineered_features(df)
+
     # Limpieza de Outliers
     df = df.drop(df[(df['total_approved'] == 0) & (df[target] == 'Graduate')].index)
 
-    # Mapeo Binario 
-    df[target] = df[target].map(TARGET_MAPPING)
+    # Mapeo Binario
+    df[target] = df[target].map(TARGET_MAPPING).astype('int8')
 
     # Filtrar para que X tenga solo las variables del contrato del API + las calculadas
-    engineered_features = ['total_approved', 'total_enrolled', 'efficiency_ratio', 'grade_trend']
-    final_features = API_FEATURES + engineered_features
-    
+    final_features = API_FEATURES + ENGINEERED_FEATURES
+
     final_features = [f for f in final_features if f in df.columns]
-    
-    X = df[final_features]
+
+    X = df[final_features].astype({f: FEATURE_DTYPES[f] for f in final_features})
     y = df[target]
-    
+
     return X, y
 
 def get_train_test_split(X, y):
-    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
\ No newline at end of file
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
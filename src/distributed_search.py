@@ -0,0 +1,230 @@
+"""
+Búsqueda de hiperparámetros repartida entre procesos o nodos.
+
+`GridSearchCV(n_jobs=-1)` solo usa los núcleos de una máquina. Aquí cada
+candidato es una tarea independiente (sus 3 folds de CV) que se envía a un
+backend con la interfaz de `concurrent.futures`:
+
+- "local": `ProcessPoolExecutor` en esta máquina (el sustituto para pruebas);
+- "dask": `Client(SEARCH_SCHEDULER_ADDRESS).get_executor()`, con los datos de
+  entrenamiento enviados una vez a cada worker con `scatter(broadcast=True)`.
+
+Cualquier otro cluster con un `Executor` compatible se conecta igual
+(subclase de `ExecutorBackend`). Los candidatos se envían del más caro al
+más barato (n_estimators × max_depth) para que el más largo no quede para el
+final, y una tarea que falla, o cuyo worker muere, se reenvía hasta
+SEARCH_MAX_RETRIES veces. Los folds, pesos y scoring son los de
+`GridSearchCV(cv=3, scoring='f1')` y el resultado tiene las columnas de
+`cv_results_` (`src.search.results_frame`).
+"""
+
+import abc
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+from src.config import (
+    RF_BASE_PARAMS, SEARCH_BACKEND, SEARCH_MAX_RETRIES, SEARCH_SCHEDULER_ADDRESS,
+    SEARCH_WORKERS
+)
+from src.search import FoldCache, results_frame
+
+# Profundidad asumida para estimar el costo de max_depth=None (árboles sin límite)
+UNBOUNDED_DEPTH = 32
+
+# Estado por proceso worker: datos del backend local y folds cuantizados de XGBoost
+_WORKER_DATA = None
+_FOLD_CACHES = {}
+
+
+def search_data(X, y, sample_weight=None, cv=3, nthread=None):
+    """Datos que necesita cada worker; `token` identifica el dataset en sus caches."""
+    return {
+        "token": uuid.uuid4().hex,
+        "X": X,
+        "y": y,
+        "sample_weight": sample_weight,
+        "cv": cv,
+        "nthread": nthread,
+    }
+
+
+def _set_worker_data(data):
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _random_forest_scores(data, params):
+    X, y = data["X"], np.asarray(data["y"])
+    scores, fit_times = [], []
+    for train_idx, valid_idx in StratifiedKFold(n_splits=data["cv"]).split(X, y):
+        model = RandomForestClassifier(**RF_BASE_PARAMS, **params)
+        start = time.perf_counter()
+        model.fit(X.iloc[train_idx], y[train_idx])
+        fit_times.append(time.perf_counter() - start)
+        scores.append(f1_score(y[valid_idx], model.predict(X.iloc[valid_idx])))
+    return scores, fit_times
+
+
+def evaluate_candidate(model_name, params, data=None):
+    """
+    (F1 por fold, segundos de fit por fold) de un candidato. Corre en el
+    worker; sin `data` usa los datos que el backend local cargó al iniciarlo.
+    """
+    data = data if data is not None else _WORKER_DATA
+    if model_name == "random_forest":
+        return _random_forest_scores(data, params)
+    cache = _FOLD_CACHES.get(data["token"])
+    if cache is None:
+        # Un worker evalúa muchos candidatos: los folds se cuantizan una vez por proceso
+        _FOLD_CACHES.clear()
+        cache = _FOLD_CACHES[data["token"]] = FoldCache(
+            data["X"], data["y"], sample_weight=data["sample_weight"], cv=data["cv"]
+        )
+    return cache.evaluate(params, data["nthread"])
+
+
+def estimated_cost(params):
+    """Costo relativo de un candidato para ordenar el envío (más caro primero)."""
+    depth = params.get("max_depth") or UNBOUNDED_DEPTH
+    return params.get("n_estimators", 100) * depth
+
+
+class ExecutorBackend(abc.ABC):
+    """Backend sobre un `concurrent.futures.Executor`; las subclases crean el executor."""
+
+    def __init__(self):
+        self.generation = 0
+        self._executor = None
+
+    def start(self, data):
+        self._data = data
+        self._executor = self._create_executor(data)
+
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args)
+
+    def restart(self):
+        """Reemplaza un executor roto (p. ej. un worker local que murió)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor(self._data)
+        self.generation += 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def threads_per_worker(self):
+        return None
+
+    @abc.abstractmethod
+    def _create_executor(self, data):
+        """Executor con los datos de entrenamiento ya disponibles en cada worker."""
+
+
+class LocalBackend(ExecutorBackend):
+    """Pool de procesos local; cada proceso recibe los datos una vez al iniciar."""
+
+    name = "local"
+
+    def __init__(self, max_workers=SEARCH_WORKERS):
+        super().__init__()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def threads_per_worker(self):
+        return max(1, (os.cpu_count() or 1) // self.max_workers)
+
+    def _create_executor(self, data):
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_set_worker_data, initargs=(data,)
+        )
+
+
+class DaskBackend(ExecutorBackend):
+    """Cluster de Dask (dependencia opcional); los datos se replican con scatter."""
+
+    name = "dask"
+
+    def __init__(self, address=SEARCH_SCHEDULER_ADDRESS):
+        super().__init__()
+        from dask.distributed import Client
+
+        self.client = Client(address) if address else Client()
+
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args, self._scattered)
+
+    def _create_executor(self, data):
+        self._scattered = self.client.scatter(data, broadcast=True)
+        return self.client.get_executor()
+
+    def close(self):
+        super().close()
+        self.client.close()
+
+
+BACKENDS = {"local": LocalBackend, "dask": DaskBackend}
+
+
+def make_backend(name=SEARCH_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de búsqueda no soportado: '{name}'. Usa {sorted(BACKENDS)}.")
+    return BACKENDS[name]()
+
+
+def run_longest_first(backend, tasks, evaluate=evaluate_candidate, max_retries=SEARCH_MAX_RETRIES):
+    """
+    Ejecuta `evaluate(*task)` para cada tarea (model_name, params) en el
+    backend, del candidato más caro al más barato, reintentando las que
+    fallan. Retorna los resultados en el orden de `tasks`.
+    """
+    order = sorted(range(len(tasks)), key=lambda i: estimated_cost(tasks[i][1]), reverse=True)
+    attempts = [0] * len(tasks)
+    results = [None] * len(tasks)
+    pending = {backend.submit(evaluate, *tasks[i]): (i, backend.generation) for i in order}
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        failed = []
+        for future in done:
+            index, generation = pending.pop(future)
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                attempts[index] += 1
+                if attempts[index] > max_retries:
+                    for other in pending:
+                        other.cancel()
+                    raise RuntimeError(
+                        f"El candidato {tasks[index][1]} falló {attempts[index]} veces"
+                    ) from exc
+                print(f"  ⚠️ Reintentando candidato {tasks[index][1]} ({type(exc).__name__}: {exc})")
+                if isinstance(exc, BrokenExecutor) and generation == backend.generation:
+                    backend.restart()
+                failed.append(index)
+        # Los reintentos también salen del más caro al más barato
+        for index in sorted(failed, key=lambda i: estimated_cost(tasks[i][1]), reverse=True):
+            pending[backend.submit(evaluate, *tasks[index])] = (index, backend.generation)
+    return results
+
+
+def distributed_grid_search(model_name, X, y, param_grid, sample_weight=None, cv=3, backend=None):
+    """
+    Equivalente a `GridSearchCV(cv=cv, scoring='f1').fit(X, y, sample_weight=...)`
+    con los candidatos repartidos en `backend` (por defecto SEARCH_BACKEND).
+    """
+    backend = backend or make_backend()
+    candidates = list(ParameterGrid(param_grid))
+    backend.start(search_data(X, y, sample_weight, cv, backend.threads_per_worker()))
+    try:
+        evaluations = run_longest_first(backend, [(model_name, params) for params in candidates])
+    finally:
+        backend.close()
+    return results_frame(candidates, evaluations)
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.config import DRIFT_BINS
+
+
+def _edges(values, bins=DRIFT_BINS):
+    """
+    Cortes interiores de los intervalos de una variable: puntos medios entre
+    valores si es discreta (una celda por valor), si no cuantiles de train.
+    """
+    values = values[~np.isnan(values)]
+    uniques = np.unique(values)
+    if len(uniques) <= bins:
+        return (uniques[:-1] + uniques[1:]) / 2
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+
+
+def _bin_counts(values, edges):
+    # Misma convención que app.utils.drift.bin_counts: intervalos cerrados por
+    # la izquierda y una última celda con los faltantes.
+    missing = np.isnan(values)
+    counts = np.bincount(
+        np.searchsorted(edges, values[~missing], side="right"), minlength=len(edges) + 1
+    )
+    return np.append(counts, missing.sum()).astype(np.int64)
+
+
+def _histogram(values, bins=DRIFT_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    edges = _edges(values, bins)
+    return {"edges": edges.tolist(), "counts": _bin_counts(values, edges).tolist()}
+
+
+def build_drift_reference(X, risk_scores, bins=DRIFT_BINS):
+    """
+    Histogramas de referencia para el monitor de drift del API: uno por
+    variable del modelo (sobre X de train) y uno del risk_score (sobre los
+    scores calibrados del set de prueba, que es lo que verá producción).
+    """
+    return {
+        "format_version": 1,
+        "version": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_rows": len(X),
+        "features": {col: _histogram(X[col].to_numpy(dtype=np.float64), bins) for col in X.columns},
+        "risk_score": _histogram(risk_scores, bins),
+    }
+
+
+def save_drift_reference_artifacts(reference):
+    """Guarda la referencia de drift como artefacto JSON para MLflow y el API."""
+    json_path = "drift_reference.json"
+    with open(json_path, "w") as f:
+        json.dump(reference, f, indent=4)
+
+    return json_path
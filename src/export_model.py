@@ -2,7 +2,50 @@ import os
 import shutil
 import mlflow
 from src.predict import get_best_model
-from src.config import MLFLOW_TRACKING_URI
+from src.config import DATA_PATH, MLFLOW_TRACKING_URI, SYNTHETIC_SPEC_PATH
+
+# Filas de la población sintética para verificar el ONNX cuando no hay dataset
+ONNX_SYNTHETIC_CHECK_ROWS = 5000
+
+def _onnx_check_rows():
+    """
+    Filas para comparar ONNX con el modelo original: el set de prueba o, sin
+    dataset (DVC sin descargar), la población sintética exportada o, si
+    tampoco existe, una población de relleno con los rangos del dominio.
+    """
+    from src.data_processor import add_engineered_features, get_train_test_split, load_and_prep_data
+    from src.synthetic import PopulationGenerator, load_population_spec, placeholder_population
+
+    if DATA_PATH.exists():
+        return get_train_test_split(*load_and_prep_data())[1]
+    if SYNTHETIC_SPEC_PATH.exists():
+        spec = load_population_spec()
+    else:
+        print("Sin dataset ni población sintética: model.onnx se verifica sobre una población de relleno.")
+        spec = placeholder_population()
+    X, _ = PopulationGenerator(spec).sample(ONNX_SYNTHETIC_CHECK_ROWS, 0)
+    return add_engineered_features(X)
+
+def export_onnx_model(model_dir):
+    """
+    Convierte el modelo exportado a `<model_dir>/model.onnx` (backend "onnx" del
+    API), verificando que las probabilidades coinciden con las del modelo original.
+    """
+    import mlflow.pyfunc
+    from mlflow.models import Model
+    from dropout_common.onnx_model import ONNX_FILE_NAME, convert_to_onnx
+
+    metadata = Model.load(model_dir)
+    # Misma prioridad que model_loader.get_model_version
+    version = getattr(metadata, "model_id", None) or metadata.run_id or "local-model"
+    model = mlflow.pyfunc.load_model(model_dir).get_raw_model()
+    feature_names = list(model.feature_names_in_)
+    check_rows = _onnx_check_rows()[feature_names]
+    max_diff = convert_to_onnx(
+        model, os.path.join(model_dir, ONNX_FILE_NAME), feature_names,
+        model_version=version, check_rows=check_rows
+    )
+    print(f"model.onnx exportado (diferencia máxima de probabilidad: {max_diff:.2e}).")
 
 def export_best_model_for_api():
     print("Buscando el mejor modelo en el historial de MLflow...")
@@ -25,12 +68,59 @@ def export_best_model_for_api():
     )
     
     # Descargar feature_importance.json por separado
-    mlflow.artifacts.download_artifacts(
+    importance_path = mlflow.artifacts.download_artifacts(
         run_id=run_id,
         artifact_path="feature_importance.json",
         dst_path=target_dir
     )
+
+    # Copia junto al modelo para que el API sirva las importancias de la versión cargada
+    shutil.copy(importance_path, os.path.join(target_dir, "modelo_final", "feature_importance.json"))
+    # y en la raíz, que el Dockerfile empaqueta como las importancias estáticas
+    # (`source=static`); el entrenamiento ya no escribe este archivo
+    shutil.copy(importance_path, "feature_importance.json")
+
+    # La calibración viaja junto al modelo; los runs anteriores a ella no la tienen
+    try:
+        calibration_path = mlflow.artifacts.download_artifacts(
+            run_id=run_id,
+            artifact_path="calibration.json",
+            dst_path=target_dir
+        )
+        shutil.copy(calibration_path, os.path.join(target_dir, "modelo_final", "calibration.json"))
+    except Exception as exc:
+        print(f"Run {run_id} sin calibration.json ({exc}); el API servirá scores sin calibrar.")
+
+    try:
+        drift_path = mlflow.artifacts.download_artifacts(
+            run_id=run_id,
+            artifact_path="drift_reference.json",
+            dst_path=target_dir
+        )
+        shutil.copy(drift_path, os.path.join(target_dir, "modelo_final", "drift_reference.json"))
+    except Exception as exc:
+        print(f"Run {run_id} sin drift_reference.json ({exc}); el API no reportará drift.")
     
+    # Importancia por permutación (cualquier tipo de modelo); opcional en runs anteriores
+    try:
+        permutation_path = mlflow.artifacts.download_artifacts(
+            run_id=run_id,
+            artifact_path="permutation_importance.json",
+            dst_path=target_dir
+        )
+        shutil.copy(
+            permutation_path, os.path.join(target_dir, "modelo_final", "permutation_importance.json")
+        )
+    except Exception as exc:
+        print(f"Run {run_id} sin permutation_importance.json ({exc}).")
+
+    # ONNX es opcional: si faltan los conversores, el modelo no es convertible o la
+    # verificación falla, el API sigue sirviendo el modelo MLflow
+    try:
+        export_onnx_model(os.path.join(target_dir, "modelo_final"))
+    except Exception as exc:
+        print(f"ADVERTENCIA: no se exportó model.onnx ({exc!r}); el API usará el modelo MLflow.")
+
     print(f"Modelo '{model_version}' (Run ID: {run_id}) exportado.")
 
 if __name__ == "__main__":
@@ -1,42 +1,184 @@
-import pandas as pd
+import hashlib
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import mlflow
+from sklearn.metrics import roc_auc_score
+
+from src.config import (
+    PERMUTATION_CACHE_DIR, PERMUTATION_REPEATS, PERMUTATION_SEED, PERMUTATION_THREADS
+)
+
+FEATURE_IMPORTANCE_FILE = "feature_importance.json"
+PERMUTATION_IMPORTANCE_FILE = "permutation_importance.json"
 
 def format_feature_name(name: str) -> str:
     """
-    Formatea 'curricular_units_1st_sem_grade' a 'Curricular Units 1st Sem Grade' 
+    Formatea 'curricular_units_1st_sem_grade' a 'Curricular Units 1st Sem Grade'
     para que se vea elegante en el dashboard.
     """
     return name.replace('_', ' ').title()
 
-def get_feature_importance_data(model, feature_names):
+def batched_scorer(model, feature_names):
+    """
+    Función matriz float32 -> probabilidad de riesgo que puntúa todo el lote
+    en una llamada: `inplace_predict` del booster para XGBoost (sin DMatrix
+    intermedio) y `predict_proba` para el resto.
+    """
+    if hasattr(model, 'get_booster'):
+        booster = model.get_booster()
+        return lambda matrix: booster.inplace_predict(matrix, validate_features=False)
+    return lambda matrix: model.predict_proba(pd.DataFrame(matrix, columns=feature_names))[:, 1]
+
+def dataset_hash(X, y):
+    """Huella del set de evaluación (columnas, valores y etiquetas) para la cache."""
+    digest = hashlib.sha256(json.dumps(list(X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(np.asarray(y, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+def _auc_drops(score, values, y, column, baseline, n_repeats, seed):
+    # Las n_repeats permutaciones de la columna se apilan y se puntúan juntas
+    rng = np.random.default_rng(seed)
+    n_rows = len(values)
+    stacked = np.tile(values, (n_repeats, 1))
+    for repeat in range(n_repeats):
+        stacked[repeat * n_rows:(repeat + 1) * n_rows, column] = rng.permutation(values[:, column])
+    scores = np.asarray(score(stacked)).reshape(n_repeats, n_rows)
+    return [baseline - roc_auc_score(y, repeat_scores) for repeat_scores in scores]
+
+def permutation_importance(model, X, y, n_repeats=PERMUTATION_REPEATS,
+                           n_threads=PERMUTATION_THREADS, seed=PERMUTATION_SEED):
+    """
+    Caída del AUC al permutar cada variable en (X, y), sin reentrenar. Las
+    variables se reparten entre hilos (la predicción libera el GIL) y cada
+    variable puntúa sus repeticiones en un solo lote. Cada variable tiene su
+    propia semilla, así que el resultado no depende del número de hilos.
+    """
+    feature_names = list(X.columns)
+    values = X.to_numpy(dtype=np.float32)
+    y = np.asarray(y)
+    score = batched_scorer(model, feature_names)
+    baseline = roc_auc_score(y, score(values))
+    seeds = np.random.SeedSequence(seed).spawn(len(feature_names))
+
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        drops = list(pool.map(
+            lambda column: _auc_drops(score, values, y, column, baseline, n_repeats, seeds[column]),
+            range(len(feature_names)),
+        ))
+
+    importances = sorted(
+        (
+            {
+                'feature': name,
+                'importance': float(np.mean(feature_drops)),
+                'importance_std': float(np.std(feature_drops)),
+                'feature_formatted': format_feature_name(name),
+            }
+            for name, feature_drops in zip(feature_names, drops)
+        ),
+        key=lambda record: record['importance'],
+        reverse=True,
+    )
+    return {
+        'metric': 'roc_auc',
+        'baseline_score': float(baseline),
+        'n_repeats': n_repeats,
+        'n_rows': len(values),
+        'importances': importances,
+    }
+
+def cached_permutation_importance(model, X, y, run_id=None, n_repeats=PERMUTATION_REPEATS):
+    """
+    `permutation_importance` cacheada en disco por run_id del modelo + hash del
+    set de evaluación (por defecto, el run activo de MLflow). Sin run_id no se cachea.
+    """
+    if run_id is None and mlflow.active_run() is not None:
+        run_id = mlflow.active_run().info.run_id
+    data_hash = dataset_hash(X, y)
+    cache_path = Path(PERMUTATION_CACHE_DIR) / f"{run_id}_{data_hash}_{n_repeats}.json"
+    if run_id and cache_path.exists():
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+
+    result = {
+        'run_id': run_id,
+        'dataset_hash': data_hash,
+        **permutation_importance(model, X, y, n_repeats=n_repeats),
+    }
+    if run_id:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(result, indent=4), encoding="utf-8")
+    return result
+
+def get_feature_importance_data(model, feature_names, permutation=None):
     """
     Extrae la importancia de las variables y las devuelve como una lista de diccionarios.
+    Si el modelo no expone `feature_importances_` se usa la importancia por
+    permutación (`permutation`), si se calculó.
     """
     if hasattr(model, 'feature_importances_'):
         importances = model.feature_importances_
+    elif permutation is not None:
+        by_feature = {record['feature']: record['importance'] for record in permutation['importances']}
+        importances = [by_feature.get(name, 0.0) for name in feature_names]
     else:
-        importances = [0.0] * len(feature_names) 
+        importances = [0.0] * len(feature_names)
 
     df_importance = pd.DataFrame({
         'feature': feature_names,
         'importance': importances
     }).sort_values(by='importance', ascending=False)
-    
+
     df_importance['feature_formatted'] = df_importance['feature'].apply(format_feature_name)
     importance_list = df_importance.to_dict(orient='records')
-    
+
     return importance_list, df_importance
 
-def save_feature_importance_artifacts(model, feature_names):
+def log_feature_importance_artifacts(model, feature_names, X_eval=None, y_eval=None):
+    """
+    Loggea en el run activo de MLflow el JSON de importancias para el Frontend
+    y, con un set de evaluación, `permutation_importance.json` a su lado. Los
+    JSON van directo al run (no se escriben en el directorio de trabajo).
+    """
+    permutation = None
+    if X_eval is not None:
+        permutation = cached_permutation_importance(model, X_eval, y_eval)
+        mlflow.log_dict(permutation, PERMUTATION_IMPORTANCE_FILE)
+
+    importance_list, _ = get_feature_importance_data(model, feature_names, permutation)
+    mlflow.log_dict(importance_list, FEATURE_IMPORTANCE_FILE)
+    return importance_list
+
+def log_permutation_importance_for_run(run_id):
     """
-    Genera y guarda el artefacto JSON para MLflow y el Frontend.
-    (Se eliminó la generación de imágenes para optimizar el despliegue).
+    Calcula (o toma de la cache) la importancia por permutación de un run ya
+    loggeado sobre el set de prueba actual y la agrega al run.
     """
-    importance_list, _ = get_feature_importance_data(model, feature_names)
-    
-    json_path = "feature_importance.json"
-    with open(json_path, "w") as f:
-        json.dump(importance_list, f, indent=4)
-    
-    return json_path
\ No newline at end of file
+    import mlflow.sklearn
+    import mlflow.xgboost
+
+    from src.data_processor import get_train_test_split, load_and_prep_data
+
+    # Mismo criterio de sabor que get_best_model: por el nombre del run
+    run_name = mlflow.get_run(run_id).info.run_name or ""
+    flavor = mlflow.xgboost if "xgboost" in run_name.lower() else mlflow.sklearn
+    model = flavor.load_model(f"runs:/{run_id}/modelo_final")
+    X, y = load_and_prep_data()
+    _, X_test, _, y_test = get_train_test_split(X, y)
+    permutation = cached_permutation_importance(model, X_test, y_test, run_id=run_id)
+    with mlflow.start_run(run_id=run_id):
+        mlflow.log_dict(permutation, PERMUTATION_IMPORTANCE_FILE)
+    return permutation
+
+if __name__ == "__main__":
+    # python -m src.feature_importance <run_id>
+    from src.config import MLFLOW_TRACKING_URI
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    for record in log_permutation_importance_for_run(sys.argv[1])['importances']:
+        print(f"  {record['feature_formatted']:<40} {record['importance']:.4f} ± {record['importance_std']:.4f}")
@@ -0,0 +1,188 @@
+"""
+Reentrenamiento incremental con las notas de un semestre nuevo.
+
+En lugar de repetir `train_and_log_top_experiments` sobre todo el historial,
+se parte del campeón actual (de MLflow o del modelo exportado) y se agregan
+árboles entrenados solo con las filas nuevas:
+
+- XGBoost: `fit(..., xgb_model=booster)` continúa el boosting desde el
+  margen del campeón con INCREMENTAL_XGB_ROUNDS rondas nuevas;
+- Random Forest: `warm_start=True` agrega INCREMENTAL_RF_TREES árboles
+  ajustados sobre las filas nuevas y conserva los existentes.
+
+El costo crece con las filas nuevas, no con el historial. El candidato y el
+campeón se evalúan sobre la misma fracción retenida de los datos nuevos; el
+candidato se registra como run hijo de un run nuevo etiquetado con el run del
+campeón (`champion_run_id`), con calibración y referencia de drift como en
+`src.train`. Solo si supera al campeón loggea `auc_score` / `f1_score`, las
+métricas con las que `get_best_model` elige qué modelo exportar.
+"""
+
+import copy
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+from sklearn.metrics import brier_score_loss, f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.utils.class_weight import compute_class_weight, compute_sample_weight
+
+from src.calibration import apply_calibration, calibration_from_scores, save_calibration_artifacts
+from src.config import (
+    CALIBRATION_CV, INCREMENTAL_HOLDOUT, INCREMENTAL_RF_TREES, INCREMENTAL_XGB_ROUNDS,
+    MLFLOW_EXPERIMENT_NAME, MLFLOW_TRACKING_URI
+)
+from src.data_processor import prep_frame, read_typed_csv
+from src.drift import build_drift_reference, save_drift_reference_artifacts
+
+
+def load_champion(model_dir=None):
+    """
+    (modelo, "xgboost" | "random_forest", run_id) del campeón: el de mejor
+    AUC en MLflow o, con `model_dir`, el modelo exportado (p. ej. prod_model/modelo_final).
+    """
+    if model_dir is None:
+        from src.predict import get_best_model
+
+        return get_best_model()
+
+    import mlflow.sklearn
+    import mlflow.xgboost
+
+    mlmodel = yaml.safe_load((Path(model_dir) / "MLmodel").read_text(encoding="utf-8"))
+    if "xgboost" in mlmodel.get("flavors", {}):
+        return mlflow.xgboost.load_model(str(model_dir)), "xgboost", mlmodel.get("run_id")
+    return mlflow.sklearn.load_model(str(model_dir)), "random_forest", mlmodel.get("run_id")
+
+
+def continue_training(champion, model_name, X_new, y_new):
+    """Copia del campeón con árboles adicionales ajustados solo sobre (X_new, y_new)."""
+    if model_name == "xgboost":
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier(**{**champion.get_params(), "n_estimators": INCREMENTAL_XGB_ROUNDS})
+        weights = compute_sample_weight(class_weight='balanced', y=y_new)
+        model.fit(X_new, y_new, sample_weight=weights, xgb_model=champion.get_booster())
+        return model
+
+    # Con warm_start sklearn pide pesos explícitos en lugar del preset 'balanced'
+    classes = np.unique(y_new)
+    weights = compute_class_weight('balanced', classes=classes, y=y_new)
+    class_weight = dict(zip(classes.tolist(), weights.tolist()))
+    model = copy.deepcopy(champion)
+    model.set_params(
+        warm_start=True,
+        n_estimators=champion.n_estimators + INCREMENTAL_RF_TREES,
+        class_weight=class_weight,
+    )
+    model.fit(X_new, y_new)
+    return model
+
+
+def out_of_fold_scores(champion, model_name, X, y, cv=CALIBRATION_CV):
+    """
+    Scores out-of-fold de continuar el entrenamiento del campeón: el mismo
+    procedimiento por fold, para calibrar sobre filas que el candidato no vio.
+    """
+    scores = np.empty(len(y), dtype=np.float64)
+    for train_idx, test_idx in StratifiedKFold(cv).split(X, y):
+        fold_model = continue_training(champion, model_name, X.iloc[train_idx], y.iloc[train_idx])
+        scores[test_idx] = fold_model.predict_proba(X.iloc[test_idx])[:, 1]
+    return scores
+
+
+def _scores(model, X, y):
+    proba = model.predict_proba(X)[:, 1]
+    return {"auc": roc_auc_score(y, proba), "f1": f1_score(y, proba > 0.5)}
+
+
+def retrain_incremental(new_data_path, model_dir=None):
+    """
+    Continúa el entrenamiento del campeón con el CSV `new_data_path` (mismo
+    formato que dropout_students.csv), compara ambos modelos sobre la fracción
+    retenida y loggea el candidato como run hijo. Retorna (modelo, métricas).
+    """
+    import mlflow
+    import mlflow.sklearn
+    import mlflow.xgboost
+
+    from src.feature_importance import log_feature_importance_artifacts
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+
+    champion, model_name, champion_run_id = load_champion(model_dir)
+    X, y = prep_frame(read_typed_csv(new_data_path))
+    X_new, X_holdout, y_new, y_holdout = train_test_split(
+        X, y, test_size=INCREMENTAL_HOLDOUT, random_state=42, stratify=y
+    )
+
+    start = time.perf_counter()
+    model = continue_training(champion, model_name, X_new, y_new)
+    fit_seconds = time.perf_counter() - start
+
+    candidate = _scores(model, X_holdout, y_holdout)
+    baseline = _scores(champion, X_holdout, y_holdout)
+    promoted = candidate["auc"] > baseline["auc"]
+    metrics = {
+        "holdout_auc": candidate["auc"],
+        "holdout_f1": candidate["f1"],
+        "champion_holdout_auc": baseline["auc"],
+        "champion_holdout_f1": baseline["f1"],
+        "fit_seconds": fit_seconds,
+    }
+    print(
+        f"  [{model_name}_incremental] AUC retenido: {candidate['auc']:.4f} "
+        f"(campeón {baseline['auc']:.4f}) | {len(X_new)} filas nuevas en {fit_seconds:.2f}s"
+    )
+
+    # Calibración out-of-fold sobre las filas nuevas y umbral que usa el API
+    calibration = calibration_from_scores(
+        out_of_fold_scores(champion, model_name, X_new, y_new), y_new
+    )
+    raw_holdout = model.predict_proba(X_holdout)[:, 1]
+    calibrated_holdout = apply_calibration(calibration, raw_holdout)
+    metrics.update({
+        "brier_score_raw": brier_score_loss(y_holdout, raw_holdout),
+        "brier_score_calibrated": brier_score_loss(y_holdout, calibrated_holdout),
+        "decision_threshold": calibration["decision_threshold"],
+        "f1_score_calibrated": f1_score(
+            y_holdout, calibrated_holdout > calibration["decision_threshold"]
+        ),
+    })
+    if promoted:
+        # Con las métricas de src.train el candidato entra en la selección de get_best_model
+        metrics.update({"auc_score": candidate["auc"], "f1_score": candidate["f1"]})
+
+    added = INCREMENTAL_XGB_ROUNDS if model_name == "xgboost" else INCREMENTAL_RF_TREES
+    parent_tags = {"champion_run_id": champion_run_id} if champion_run_id else None
+    parent = mlflow.start_run(run_name=f"{model_name}_incremental_parent", tags=parent_tags)
+    with parent, mlflow.start_run(run_name=f"{model_name}_incremental", nested=True):
+        mlflow.log_params({
+            "base_run_id": champion_run_id,
+            "new_data": Path(new_data_path).name,
+            "new_rows": len(X_new),
+            "holdout_rows": len(X_holdout),
+            "added_estimators": added,
+        })
+        mlflow.log_metrics(metrics)
+        mlflow.set_tag("incremental_promoted", str(promoted))
+        if model_name == "xgboost":
+            mlflow.xgboost.log_model(model, "modelo_final")
+        else:
+            mlflow.sklearn.log_model(model, "modelo_final")
+        log_feature_importance_artifacts(model, X.columns, X_holdout, y_holdout)
+        mlflow.log_artifact(save_calibration_artifacts(calibration))
+        # Referencia de drift: variables de las filas nuevas y scores calibrados retenidos
+        mlflow.log_artifact(
+            save_drift_reference_artifacts(build_drift_reference(X_new, calibrated_holdout))
+        )
+
+    return model, {**metrics, "promoted": promoted}
+
+
+if __name__ == "__main__":
+    # python -m src.incremental ruta/semestre_nuevo.csv [prod_model/modelo_final]
+    retrain_incremental(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,157 @@
+"""
+Entrenamiento de XGBoost fuera de memoria sobre exportaciones Parquet por chunks.
+
+`load_and_prep_data` necesita el dataset completo en un DataFrame. Aquí cada
+chunk de Parquet pasa por el mismo `prep_frame` (filtrado, variables
+calculadas, limpieza) y se entrega a XGBoost con un `xgboost.DataIter`:
+
+- modo en memoria: `QuantileDMatrix`, que guarda solo el índice cuantizado
+  (1 byte por valor con max_bin <= 256) en lugar del frame y sus copias;
+- modo externo: `ExtMemQuantileDMatrix`, con las páginas cuantizadas en disco.
+
+La partición train/test se decide por fila con un generador sembrado por
+índice de chunk, así que es la misma en cada pasada del iterador, y la
+evaluación sobre test también se hace chunk a chunk.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import f1_score, roc_auc_score
+
+from src.config import (
+    OOC_CHUNK_ROWS, OOC_MAX_BIN, OOC_TEST_FRACTION, OOC_XGB_PARAMS, XGB_BASE_PARAMS
+)
+from src.data_processor import iter_typed_parquet, prep_frame
+from src.search import xgb_native_params
+
+
+def parquet_files(path):
+    """Un archivo Parquet o todos los `*.parquet` de un directorio, en orden."""
+    path = Path(path)
+    return sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+
+
+def iter_split_chunks(paths, split, chunk_rows=OOC_CHUNK_ROWS, test_fraction=OOC_TEST_FRACTION,
+                      seed=XGB_BASE_PARAMS["random_state"]):
+    """(X, y) preprocesados de cada chunk, solo con las filas de `split` ("train" | "test")."""
+    for index, raw in enumerate(iter_typed_parquet(paths, chunk_rows)):
+        X, y = prep_frame(raw)
+        is_test = np.random.default_rng([seed, index]).random(len(X)) < test_fraction
+        keep = is_test if split == "test" else ~is_test
+        if keep.any():
+            yield X[keep], y[keep]
+
+
+class ParquetChunkIter(xgb.DataIter):
+    """Entrega a XGBoost los chunks de train con pesos balanceados por clase."""
+
+    def __init__(self, paths, class_weight, chunk_rows=OOC_CHUNK_ROWS, cache_prefix=None):
+        self.paths = paths
+        self.class_weight = np.asarray(class_weight, dtype=np.float32)
+        self.chunk_rows = chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self.reset()
+        try:
+            X, y = next(self._chunks)
+        except StopIteration:
+            return False
+        labels = y.to_numpy()
+        input_data(data=X, label=labels, weight=self.class_weight[labels])
+        return True
+
+    def reset(self):
+        self._chunks = iter_split_chunks(self.paths, "train", self.chunk_rows)
+
+
+def balanced_class_weight(paths, chunk_rows=OOC_CHUNK_ROWS):
+    """Pesos 'balanced' de sklearn (n / (2 * n_clase)) contados en una pasada sobre train."""
+    counts = np.zeros(2, dtype=np.int64)
+    for _, y in iter_split_chunks(paths, "train", chunk_rows):
+        counts += np.bincount(y.to_numpy(), minlength=2)
+    return counts.sum() / (2 * np.maximum(counts, 1))
+
+
+def train_booster(paths, params=None, chunk_rows=OOC_CHUNK_ROWS, external_memory=False):
+    """Entrena sobre los chunks de train sin materializar el dataset."""
+    params = {**OOC_XGB_PARAMS, **(params or {})}
+    class_weight = balanced_class_weight(paths, chunk_rows)
+
+    with tempfile.TemporaryDirectory(prefix="xgb_cache_") as cache_dir:
+        if external_memory:
+            data_iter = ParquetChunkIter(
+                paths, class_weight, chunk_rows, cache_prefix=os.path.join(cache_dir, "train")
+            )
+            dtrain = xgb.ExtMemQuantileDMatrix(data_iter, max_bin=OOC_MAX_BIN)
+        else:
+            data_iter = ParquetChunkIter(paths, class_weight, chunk_rows)
+            dtrain = xgb.QuantileDMatrix(data_iter, max_bin=OOC_MAX_BIN)
+        booster = xgb.train(
+            xgb_native_params(params, OOC_MAX_BIN), dtrain, num_boost_round=params["n_estimators"]
+        )
+        del dtrain
+    return booster
+
+
+def evaluate_streaming(booster, paths, chunk_rows=OOC_CHUNK_ROWS):
+    """AUC y F1 sobre test, puntuando chunk a chunk (solo se retienen score y etiqueta)."""
+    scores, labels = [], []
+    for X, y in iter_split_chunks(paths, "test", chunk_rows):
+        scores.append(booster.inplace_predict(X.to_numpy(dtype=np.float32)).astype(np.float32))
+        labels.append(y.to_numpy())
+    scores, labels = np.concatenate(scores), np.concatenate(labels)
+    return {
+        "auc_score": roc_auc_score(labels, scores),
+        "f1_score": f1_score(labels, scores > 0.5),
+        "test_rows": len(labels),
+    }
+
+
+def to_classifier(booster):
+    """XGBClassifier con el booster entrenado: mismo flavor y API que esperan el API y el export."""
+    model = xgb.XGBClassifier(**XGB_BASE_PARAMS)
+    model.load_model(bytearray(booster.save_raw("json")))
+    return model
+
+
+def train_out_of_core(data_path, params=None, chunk_rows=OOC_CHUNK_ROWS, external_memory=False):
+    """
+    Entrena, evalúa en streaming y loggea en MLflow un run con el mismo
+    artefacto `modelo_final` que `train_and_log_top_experiments`.
+    """
+    import mlflow
+    import mlflow.xgboost
+
+    from src.config import MLFLOW_EXPERIMENT_NAME, MLFLOW_TRACKING_URI
+    from src.feature_importance import log_feature_importance_artifacts
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+
+    paths = parquet_files(data_path)
+    params = {**OOC_XGB_PARAMS, **(params or {})}
+    run_name = "xgboost_out_of_core" + ("_external" if external_memory else "")
+    with mlflow.start_run(run_name=run_name):
+        booster = train_booster(paths, params, chunk_rows, external_memory)
+        metrics = evaluate_streaming(booster, paths, chunk_rows)
+        model = to_classifier(booster)
+
+        print(f"  [{run_name}] F1_Test: {metrics['f1_score']:.4f} | AUC: {metrics['auc_score']:.4f}")
+        mlflow.log_params({**params, "chunk_rows": chunk_rows, "external_memory": external_memory})
+        mlflow.log_metrics(metrics)
+        mlflow.xgboost.log_model(model, "modelo_final")
+        log_feature_importance_artifacts(model, booster.feature_names)
+    return model, metrics
+
+
+if __name__ == "__main__":
+    # python -m src.out_of_core ruta/a/parquet_o_directorio [--external-memory]
+    train_out_of_core(sys.argv[1], external_memory="--external-memory" in sys.argv[2:])
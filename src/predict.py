@@ -1,8 +1,11 @@
+import re
+
 import pandas as pd
 import mlflow
 import mlflow.xgboost
 import mlflow.sklearn
-from src.config import MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT_NAME
+from src.config import MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT_NAME, RISK_RULES_PATH
+from src.calibration import apply_calibration
 
 def get_best_model():
     """
@@ -47,72 +50,55 @@ def get_best_model():
     return model, model_version, run_id
 
 
+_rules_loader = None
+
+
+def _risk_rules():
+    """
+    Reglas compiladas del mismo archivo que usa el API (`RISK_RULES_PATH`),
+    con el motor de reglas compartido (`dropout_common`), para no mantener una
+    copia de la lógica aquí.
+    """
+    from dropout_common.rule_engine import RuleSetLoader
+
+    global _rules_loader
+    if _rules_loader is None:
+        _rules_loader = RuleSetLoader(RISK_RULES_PATH)
+    return _rules_loader.get()
+
+
 def generate_intervention_logic(student_df, risk_score):
     """
     Evalúa las reglas de negocio del documento de Lógica de Intervención 
     para generar las recomendaciones específicas por estudiante.
     """
-    row = student_df.iloc[0]
-    features_impact = []
-    recommendation = "SEGUIMIENTO PREVENTIVO: Estudiante con perfil de graduación exitosa."
+    rule_set = _risk_rules()
+    masks = rule_set.evaluate(student_df, [risk_score] * len(student_df))
+    index = int(rule_set.first_match(masks)[0])
+    rule = rule_set.rules[index] if index >= 0 else None
+    payload = rule.payload if rule is not None else rule_set.default
+
     steps = [
-        "1. Mensaje de felicitación",
-        "2. Recordar fechas de inscripción.",
-        "3. Monitorear notas finales."
+        f"{i}. {step}"
+        for i, step in enumerate(re.split(r"(?<=\.)\s+", payload["intervention_steps"].strip()), start=1)
     ]
-    risk_level = "Bajo"
-
-    # Lógica 1: Riesgo Financiero
-    if row['tuition_fees_up_to_date'] == 0 or row['debtor'] == 1:
-        risk_level = "Alto"
-        recommendation = "RIESGO FINANCIERO DETECTADO: El estudiante presenta deudas que bloquean su permanencia."
-        steps = ["1. Verificar estado de pagos.", "2. Informar fecha límite.", "3. Remitir a Oficina de Becas."]
-        features_impact.append({
-            "feature": "tuition_fees_up_to_date / debtor",
-            "value": int(row['tuition_fees_up_to_date']),
-            "impact": "Crítico: El estudiante presenta deudas que bloquean su permanencia."
-        })
-
-    # Lógica 2: Riesgo Académico (Eficacia)
-    elif row['efficiency_ratio'] < 0.5:
-        risk_level = "Alto"
-        recommendation = "CRISIS ACADÉMICA: El estudiante aprueba menos de la mitad de su carga académica."
-        steps = ["1. Cita para análisis de materias.", "2. Taller de hábitos de estudio.", "3. Evaluar reducción de carga."]
-        features_impact.append({
-            "feature": "efficiency_ratio",
-            "value": round(float(row['efficiency_ratio']), 2),
-            "impact": "Eficacia: Solo se aprueba un bajo porcentaje de las unidades, aumentando la vulnerabilidad."
-        })
-
-    # Lógica 3: Rendimiento (Tendencia)
-    elif row.get('grade_trend', 0) < -2:
-        risk_level = "Medio"
-        recommendation = "ALERTA POR CAÍDA DE RENDIMIENTO: Descenso atípico en el promedio semestral."
-        steps = ["1. Evaluación de salud mental.", "2. Entrevista de factores personales.", "3. Mentoría de refuerzo."]
-        features_impact.append({
-            "feature": "grade_trend",
-            "value": round(float(row['grade_trend']), 2),
-            "impact": "Tendencia: Caída significativa en las notas respecto al semestre anterior."
-        })
-
-    # Lógica 4: Socioeconómico
-    elif row['scholarship_holder'] == 0 and risk_score > 0.4:
-        if risk_level == "Bajo": 
-            risk_level = "Medio"
-            recommendation = "RIESGO POR FALTA DE APOYO: Estudiante vulnerable sin subsidio institucional."
-            steps = ["1. Validar requisitos para becas.", "2. Asignar 'Mentor Par'.", "3. Evaluar flexibilidad de horario."]
+    features_impact = []
+    if rule is not None and rule.impact:
+        value = float(student_df.iloc[0][rule.impact["column"]])
         features_impact.append({
-            "feature": "scholarship_holder",
-            "value": int(row['scholarship_holder']),
-            "impact": "Soporte: Ausencia de beca combinada con probabilidad de riesgo elevada."
+            "feature": rule.impact["feature"],
+            "value": int(value) if value.is_integer() else round(value, 2),
+            "impact": rule.impact["text"]
         })
 
-    return risk_level, recommendation, steps, features_impact
+    return payload["nivel_riesgo"], payload["recommendation"], steps, features_impact
 
 
-def predict_student_risk(student_data: dict, model):
+def predict_student_risk(student_data: dict, model, calibration=None):
     """
     Calcula el riesgo y construye el payload casi final para el API.
+    Si se pasa `calibration` (tabla de calibration.json) el risk_score se
+    calibra y el outcome usa su umbral de decisión en lugar de 0.5.
     """
     df = pd.DataFrame([student_data])
 
@@ -124,6 +110,10 @@ def predict_student_risk(student_data: dict, model):
 
     # Inferencia
     risk_score = float(model.predict_proba(df)[0][1])
+    decision_threshold = 0.5
+    if calibration is not None:
+        risk_score = float(apply_calibration(calibration, [risk_score])[0])
+        decision_threshold = calibration["decision_threshold"]
     grad_score = 1.0 - risk_score
 
     # Aplicar Lógica de Negocio
@@ -131,7 +121,7 @@ def predict_student_risk(student_data: dict, model):
 
     # Respuesta estructurada
     prediction_result = {
-        "outcome": "Dropout" if risk_score > 0.5 else "Graduate",
+        "outcome": "Dropout" if risk_score > decision_threshold else "Graduate",
         "risk_score": round(risk_score, 2),
         "risk_level": risk_level,
         "class_probabilities": {
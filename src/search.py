@@ -0,0 +1,118 @@
+"""
+Búsqueda de hiperparámetros de XGBoost con folds cuantizados una sola vez.
+
+`GridSearchCV` re-corta los folds desde pandas y reconstruye (y re-cuantiza)
+el DMatrix en cada `fit` de cada candidato, aunque los datos y los folds son
+los mismos para los 36 candidatos × 3 folds de XGB_PARAM_GRID. Aquí cada fold
+se cuantiza una vez en un `QuantileDMatrix` (train) y una matriz float32
+(validación); todos los candidatos, en todos los hilos, entrenan sobre esas
+mismas matrices con `xgb.train`, que libera el GIL.
+
+Los folds (StratifiedKFold sin barajar), los pesos y el scoring (F1 con
+umbral 0.5, ponderado con `sample_weight` como hace GridSearchCV al pasar
+los pesos de `fit` al scorer) son los de `GridSearchCV(cv=3, scoring='f1')`:
+los puntajes coinciden y el resultado tiene las columnas de `cv_results_`
+que usa `train_and_log_top_experiments`.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+from src.config import SEARCH_MAX_BIN, SEARCH_THREADS, XGB_BASE_PARAMS
+
+
+def xgb_native_params(params, max_bin=SEARCH_MAX_BIN, nthread=None):
+    """Hiperparámetros de XGBClassifier (XGB_BASE_PARAMS + `params`) con los nombres de `xgb.train`."""
+    native = {
+        "objective": XGB_BASE_PARAMS["objective"],
+        "eval_metric": XGB_BASE_PARAMS["eval_metric"],
+        "seed": XGB_BASE_PARAMS["random_state"],
+        "tree_method": "hist",
+        "max_bin": max_bin,
+    }
+    if nthread:
+        native["nthread"] = nthread
+    for key, value in params.items():
+        if key == "learning_rate":
+            native["eta"] = value
+        elif key != "n_estimators":
+            native[key] = value
+    return native
+
+
+class FoldCache:
+    """Folds de CV cuantizados una vez y compartidos por todos los candidatos."""
+
+    def __init__(self, X, y, sample_weight=None, cv=3, max_bin=SEARCH_MAX_BIN):
+        self.max_bin = max_bin
+        self.feature_names = list(X.columns)
+        values = X.to_numpy(dtype=np.float32)
+        labels = np.asarray(y)
+        weights = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float32)
+
+        self.folds = []
+        for train_idx, valid_idx in StratifiedKFold(n_splits=cv).split(values, labels):
+            dtrain = xgb.QuantileDMatrix(
+                values[train_idx],
+                labels[train_idx],
+                weight=None if weights is None else weights[train_idx],
+                feature_names=self.feature_names,
+                max_bin=max_bin,
+            )
+            self.folds.append((
+                dtrain,
+                np.ascontiguousarray(values[valid_idx]),
+                labels[valid_idx],
+                None if weights is None else weights[valid_idx],
+            ))
+
+    def evaluate(self, params, nthread=None):
+        """F1 de validación por fold y segundos de entrenamiento de un candidato."""
+        native = xgb_native_params(params, self.max_bin, nthread)
+        rounds = params.get("n_estimators", 100)
+        scores, fit_times = [], []
+        for dtrain, X_valid, y_valid, w_valid in self.folds:
+            start = time.perf_counter()
+            booster = xgb.train(native, dtrain, num_boost_round=rounds)
+            fit_times.append(time.perf_counter() - start)
+            y_pred = booster.inplace_predict(X_valid) > 0.5
+            scores.append(f1_score(y_valid, y_pred, sample_weight=w_valid))
+        return scores, fit_times
+
+
+def results_frame(candidates, evaluations):
+    """Resultados con las columnas de `GridSearchCV.cv_results_` (params, mean/std/rank)."""
+    results = pd.DataFrame(
+        {
+            "params": candidates,
+            "mean_test_score": [np.mean(scores) for scores, _ in evaluations],
+            "std_test_score": [np.std(scores) for scores, _ in evaluations],
+            "mean_fit_time": [np.mean(times) for _, times in evaluations],
+        }
+    )
+    for fold in range(len(evaluations[0][0]) if evaluations else 0):
+        results[f"split{fold}_test_score"] = [scores[fold] for scores, _ in evaluations]
+    results["rank_test_score"] = (
+        results["mean_test_score"].rank(method="min", ascending=False).astype(int)
+    )
+    return results
+
+
+def xgb_grid_search(X, y, param_grid, sample_weight=None, cv=3, n_threads=SEARCH_THREADS):
+    """
+    Evalúa todos los candidatos de `param_grid` sobre los folds cacheados,
+    `n_threads` candidatos a la vez (cada uno con núcleos / n_threads hilos).
+    """
+    cache = FoldCache(X, y, sample_weight=sample_weight, cv=cv)
+    candidates = list(ParameterGrid(param_grid))
+    nthread = max(1, (os.cpu_count() or 1) // n_threads)
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        evaluations = list(pool.map(lambda params: cache.evaluate(params, nthread), candidates))
+    return results_frame(candidates, evaluations)
@@ -0,0 +1,288 @@
+"""
+Generador sembrado de poblaciones sintéticas de estudiantes.
+
+El dataset real tiene unos pocos miles de filas; para pruebas de escala y de
+carga se ajusta sobre la salida de `load_and_prep_data` un modelo compacto
+(`fit_population`, serializable a JSON, sin filas reales) y se generan
+cuantas filas hagan falta:
+
+- por clase del target: la proporción de la clase, una tabla de cuantiles
+  por variable (marginales empíricas) y la correlación de los scores normales
+  de los rangos (cópula gaussiana), que conserva la relación entre semestres,
+  entre inscritas/aprobadas/notas y con el target;
+- al generar se aplican las restricciones del dominio: aprobadas <= inscritas,
+  notas dentro del rango observado y nota 0 sin materias aprobadas (con la
+  frecuencia observada; la marginal de la nota se ajusta sobre quienes
+  aprobaron al menos una materia).
+
+La salida se genera por chunks con un generador sembrado por índice de chunk
+(el mismo resultado para la misma semilla y tamaño de chunk), así que CSV,
+Parquet y payloads JSON del API de 10M de filas se escriben con memoria acotada.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from scipy.stats import rankdata
+
+from src.config import (
+    API_FEATURES, FEATURE_DTYPES, SYNTHETIC_CHUNK_ROWS, SYNTHETIC_QUANTILES,
+    SYNTHETIC_SPEC_PATH, TARGET_COL, TARGET_MAPPING
+)
+
+# Nombres de las columnas en dropout_students.csv (normalizan a API_FEATURES)
+DATASET_COLUMNS = {
+    "age_at_enrollment": "Age at enrollment",
+    "gender": "Gender",
+    "displaced": "Displaced",
+    "debtor": "Debtor",
+    "tuition_fees_up_to_date": "Tuition fees up to date",
+    "scholarship_holder": "Scholarship holder",
+    "curricular_units_1st_sem_enrolled": "Curricular units 1st sem (enrolled)",
+    "curricular_units_1st_sem_approved": "Curricular units 1st sem (approved)",
+    "curricular_units_1st_sem_grade": "Curricular units 1st sem (grade)",
+    "curricular_units_2nd_sem_enrolled": "Curricular units 2nd sem (enrolled)",
+    "curricular_units_2nd_sem_approved": "Curricular units 2nd sem (approved)",
+    "curricular_units_2nd_sem_grade": "Curricular units 2nd sem (grade)",
+}
+SEMESTERS = ("1st", "2nd")
+TARGET_NAMES = {value: name for name, value in TARGET_MAPPING.items()}
+GRADE_DECIMALS = 2
+
+
+def _is_integer(feature):
+    return not FEATURE_DTYPES[feature].startswith("float")
+
+
+def _normal_scores(values):
+    """Scores normales de los rangos por columna (empates con rango promedio)."""
+    return ndtri(rankdata(values, axis=0) / (len(values) + 1))
+
+
+def fit_population(X, y, quantiles=SYNTHETIC_QUANTILES):
+    """
+    Modelo de la población a partir de (X, y) de `load_and_prep_data`: solo
+    usa las variables del API (las calculadas se derivan de ellas).
+    """
+    y = np.asarray(y)
+    values = X[API_FEATURES].to_numpy(dtype=np.float64)
+    grid = np.linspace(0, 1, quantiles)
+    spec = {
+        "format_version": 1,
+        "n_rows": len(values),
+        "features": API_FEATURES,
+        "classes": {},
+        "grade_range": [],
+        "zero_grade_rate": {},
+    }
+    for label in np.unique(y):
+        rows = values[y == label]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = np.corrcoef(_normal_scores(rows), rowvar=False)
+        # Variables constantes dentro de la clase: sin correlación con el resto
+        correlation = np.nan_to_num(correlation, nan=0.0)
+        np.fill_diagonal(correlation, 1.0)
+        tables = np.quantile(rows, grid, axis=0, method="inverted_cdf").T
+        for sem in SEMESTERS:
+            # La nota es el promedio de las aprobadas: su marginal se toma sin los
+            # ceros de quienes no aprobaron nada (esos se reponen en _apply_constraints)
+            approved = rows[:, API_FEATURES.index(f"curricular_units_{sem}_sem_approved")] > 0
+            grade = API_FEATURES.index(f"curricular_units_{sem}_sem_grade")
+            if approved.any():
+                tables[grade] = np.quantile(rows[approved, grade], grid, method="inverted_cdf")
+        spec["classes"][str(int(label))] = {
+            "weight": len(rows) / len(values),
+            "correlation": correlation.tolist(),
+            "quantiles": tables.tolist(),
+        }
+
+    grades = [f"curricular_units_{sem}_sem_grade" for sem in SEMESTERS]
+    spec["grade_range"] = [float(X[grades].min().min()), float(X[grades].max().max())]
+    for sem in SEMESTERS:
+        none_approved = X[f"curricular_units_{sem}_sem_approved"] == 0
+        zero_grade = X.loc[none_approved, f"curricular_units_{sem}_sem_grade"] == 0
+        spec["zero_grade_rate"][sem] = float(zero_grade.mean()) if none_approved.any() else 0.0
+    return spec
+
+
+def placeholder_features(n_rows, seed=42):
+    """Filas uniformes (sin correlaciones) de las variables del API, para cuando no hay dataset."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "age_at_enrollment": rng.integers(17, 60, n_rows),
+            "gender": rng.integers(0, 2, n_rows),
+            "displaced": rng.integers(0, 2, n_rows),
+            "debtor": rng.integers(0, 2, n_rows),
+            "tuition_fees_up_to_date": rng.integers(0, 2, n_rows),
+            "scholarship_holder": rng.integers(0, 2, n_rows),
+        }
+    )
+    for sem in SEMESTERS:
+        enrolled = rng.integers(0, 12, n_rows)
+        df[f"curricular_units_{sem}_sem_enrolled"] = enrolled
+        df[f"curricular_units_{sem}_sem_approved"] = rng.integers(0, enrolled + 1)
+        df[f"curricular_units_{sem}_sem_grade"] = np.round(rng.uniform(0, 20, n_rows), GRADE_DECIMALS)
+    return df[API_FEATURES]
+
+
+def placeholder_population(n_rows=10_000, seed=42):
+    """
+    Modelo de población ajustado sobre `placeholder_features` con un target
+    aleatorio: sin dataset (DVC sin descargar) ni modelo exportado, permite
+    generar filas con los rangos y restricciones del dominio.
+    """
+    labels = np.random.default_rng(0).integers(0, 2, n_rows)
+    return fit_population(placeholder_features(n_rows, seed), labels)
+
+
+def save_population_spec(spec, path=SYNTHETIC_SPEC_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return path
+
+
+def load_population_spec(path=SYNTHETIC_SPEC_PATH):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+class PopulationGenerator:
+    """Genera filas (variables del API + target) a partir de un modelo de `fit_population`."""
+
+    def __init__(self, spec):
+        self.features = list(spec["features"])
+        self.labels = np.array([int(label) for label in spec["classes"]])
+        self.weights = np.array([c["weight"] for c in spec["classes"].values()])
+        self.weights = self.weights / self.weights.sum()
+        self._cholesky = []
+        self._quantiles = []
+        for params in spec["classes"].values():
+            correlation = np.asarray(params["correlation"])
+            # Jitter mínimo por si la matriz quedó semidefinida (variables colineales)
+            jitter = 1e-9 * np.eye(len(correlation))
+            self._cholesky.append(np.linalg.cholesky(correlation + jitter))
+            self._quantiles.append(np.asarray(params["quantiles"]))
+        self.grade_range = spec["grade_range"]
+        self.zero_grade_rate = spec["zero_grade_rate"]
+        self._integer = np.array([_is_integer(f) for f in self.features])
+
+    def _marginals(self, uniforms, quantiles):
+        # Enteros: escalón de la tabla (solo valores observados); notas: interpolación
+        n_points = quantiles.shape[1]
+        grid = np.linspace(0, 1, n_points)
+        out = np.empty_like(uniforms)
+        for j in range(len(self.features)):
+            if self._integer[j]:
+                out[:, j] = quantiles[j, np.rint(uniforms[:, j] * (n_points - 1)).astype(int)]
+            else:
+                out[:, j] = np.interp(uniforms[:, j], grid, quantiles[j])
+        return out
+
+    def _apply_constraints(self, df, rng):
+        low, high = self.grade_range
+        for sem in SEMESTERS:
+            enrolled = df[f"curricular_units_{sem}_sem_enrolled"]
+            approved = df[f"curricular_units_{sem}_sem_approved"].clip(upper=enrolled)
+            grade = df[f"curricular_units_{sem}_sem_grade"].clip(low, high).round(GRADE_DECIMALS)
+            zero = (approved == 0) & (rng.random(len(df)) < self.zero_grade_rate[sem])
+            df[f"curricular_units_{sem}_sem_approved"] = approved
+            df[f"curricular_units_{sem}_sem_grade"] = grade.where(~zero, 0.0)
+        return df
+
+    def sample(self, n_rows, rng):
+        """(X con las 12 variables del API en int64/float64, y con el target binario)."""
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        classes = rng.choice(len(self.labels), size=n_rows, p=self.weights)
+        values = np.empty((n_rows, len(self.features)))
+        for index, (cholesky, quantiles) in enumerate(zip(self._cholesky, self._quantiles)):
+            rows = classes == index
+            normal = rng.standard_normal((int(rows.sum()), len(self.features))) @ cholesky.T
+            values[rows] = self._marginals(ndtr(normal), quantiles)
+
+        X = pd.DataFrame(values, columns=self.features)
+        X = X.astype({f: "int64" for f, integer in zip(self.features, self._integer) if integer})
+        X = self._apply_constraints(X, rng)
+        return X, pd.Series(self.labels[classes], name=TARGET_COL.lower())
+
+    def iter_chunks(self, n_rows, seed=42, chunk_rows=SYNTHETIC_CHUNK_ROWS):
+        """(X, y) de hasta `chunk_rows` filas; cada chunk con su propio generador sembrado."""
+        for index, start in enumerate(range(0, n_rows, chunk_rows)):
+            X, y = self.sample(min(chunk_rows, n_rows - start), np.random.default_rng([seed, index]))
+            X.index = y.index = pd.RangeIndex(start, start + len(X))
+            yield X, y
+
+
+def to_dataset_frame(X, y):
+    """Chunk con los nombres de columna y el Target de dropout_students.csv."""
+    df = X.rename(columns=DATASET_COLUMNS)
+    df[TARGET_COL] = y.map(TARGET_NAMES).to_numpy()
+    return df
+
+
+def to_api_inputs(X, batch_id="SYNTHETIC"):
+    """Lista de PredictionRequest (dicts) para el payload `{"inputs": [...]}` de /predict."""
+    return [
+        {
+            "student_info": {"student_id": f"SYN-{index:09d}", "name": f"Synthetic {index}"},
+            "academic_context": {"semester": 1, "batch_id": batch_id, "course": "Synthetic"},
+            "features": features,
+        }
+        for index, features in zip(X.index, X.to_dict(orient="records"))
+    ]
+
+
+def write_csv(generator, path, n_rows, seed=42, chunk_rows=SYNTHETIC_CHUNK_ROWS):
+    """CSV con el formato de dropout_students.csv, escrito chunk a chunk."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for i, (X, y) in enumerate(generator.iter_chunks(n_rows, seed, chunk_rows)):
+            to_dataset_frame(X, y).to_csv(f, header=i == 0, index=False)
+    return path
+
+
+def write_parquet(generator, path, n_rows, seed=42, chunk_rows=SYNTHETIC_CHUNK_ROWS):
+    """Parquet con el formato de dropout_students.csv, un row group por chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for X, y in generator.iter_chunks(n_rows, seed, chunk_rows):
+            table = pa.Table.from_pandas(to_dataset_frame(X, y), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def write_api_payloads(generator, path, n_rows, seed=42, batch_size=1000):
+    """NDJSON con un payload `{"inputs": [...]}` de /predict por línea (`batch_size` estudiantes)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for X, _ in generator.iter_chunks(n_rows, seed, batch_size):
+            f.write(json.dumps({"inputs": to_api_inputs(X)}) + "\n")
+    return path
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "api": write_api_payloads}
+
+
+if __name__ == "__main__":
+    # python -m src.synthetic fit                      -> ajusta sobre load_and_prep_data()
+    # python -m src.synthetic csv|parquet|api <salida> <filas> [semilla]
+    if sys.argv[1] == "fit":
+        from src.data_processor import load_and_prep_data
+
+        print(f"Modelo de población guardado en {save_population_spec(fit_population(*load_and_prep_data()))}")
+    else:
+        out, n = sys.argv[2], int(sys.argv[3])
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else 42
+        WRITERS[sys.argv[1]](PopulationGenerator(load_population_spec()), out, n, seed)
+        print(f"{n} filas sintéticas escritas en {out}")
@@ -7,17 +7,21 @@ import pandas as pd
 from xgboost import XGBClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.metrics import brier_score_loss, f1_score, roc_auc_score
 from sklearn.utils.class_weight import compute_sample_weight
 from mlflow.tracking import MlflowClient
 
 from src.config import (
     XGB_BASE_PARAMS, XGB_PARAM_GRID,
-    RF_BASE_PARAMS, RF_PARAM_GRID,
+    RF_BASE_PARAMS, RF_PARAM_GRID, SEARCH_BACKEND,
     MLFLOW_EXPERIMENT_NAME, MLFLOW_TRACKING_URI
 )
 from src.data_processor import load_and_prep_data, get_train_test_split
-from src.feature_importance import save_feature_importance_artifacts
+from src.feature_importance import log_feature_importance_artifacts
+from src.calibration import apply_calibration, fit_calibration, save_calibration_artifacts
+from src.drift import build_drift_reference, save_drift_reference_artifacts
+from src.distributed_search import distributed_grid_search
+from src.search import xgb_grid_search
 
 
 def train_and_log_top_experiments(model_name="xgboost", top_n=6):
@@ -52,11 +56,22 @@ def train_and_log_top_experiments(model_name="xgboost", top_n=6):
 
     print(f"\n🔍 Ejecutando GridSearchCV exhaustivo para {model_name}...")
 
-    grid = GridSearchCV(estimator, param_grid, cv=3, scoring='f1', n_jobs=-1)
-    grid.fit(X_train, y_train, **fit_params)
+    if SEARCH_BACKEND:
+        # Candidatos repartidos entre workers (pool local o cluster), mismos folds y scoring
+        print(f"   Backend de búsqueda: {SEARCH_BACKEND}")
+        results_df = distributed_grid_search(
+            model_name, X_train, y_train, param_grid,
+            sample_weight=fit_params.get('sample_weight'), cv=3,
+        )
+    elif model_name == "xgboost":
+        # Mismos folds, pesos y scoring que GridSearchCV, con los folds cuantizados una vez
+        results_df = xgb_grid_search(X_train, y_train, param_grid, sample_weight=weights, cv=3)
+    else:
+        grid = GridSearchCV(estimator, param_grid, cv=3, scoring='f1', n_jobs=-1)
+        grid.fit(X_train, y_train, **fit_params)
+        results_df = pd.DataFrame(grid.cv_results_)
 
     # Extraer los Top N resultados del GridSearch
-    results_df = pd.DataFrame(grid.cv_results_)
     top_results = results_df.sort_values(by='rank_test_score').head(top_n)
 
     print(f"✅ Búsqueda finalizada. Evaluando el Top {top_n} en el Set de Prueba...")
@@ -96,9 +111,29 @@ def train_and_log_top_experiments(model_name="xgboost", top_n=6):
             else:
                 mlflow.sklearn.log_model(model, "modelo_final")
 
-            # Loggear feature importance
-            json_path = save_feature_importance_artifacts(model, X.columns)
-            mlflow.log_artifact(json_path)
+            # Loggear feature importance (y por permutación sobre el set de prueba)
+            log_feature_importance_artifacts(model, X.columns, X_test, y_test)
+
+            # Calibración (out-of-fold en train) y umbral de decisión que usa el API
+            calibration = fit_calibration(
+                model, X_train, y_train,
+                sample_weight=weights if model_name == "xgboost" else None,
+            )
+            raw_test = model.predict_proba(X_test)[:, 1]
+            calibrated_test = apply_calibration(calibration, raw_test)
+            mlflow.log_metric("brier_score_raw", brier_score_loss(y_test, raw_test))
+            mlflow.log_metric("brier_score_calibrated", brier_score_loss(y_test, calibrated_test))
+            mlflow.log_metric("decision_threshold", calibration["decision_threshold"])
+            mlflow.log_metric(
+                "f1_score_calibrated",
+                f1_score(y_test, calibrated_test > calibration["decision_threshold"]),
+            )
+            mlflow.log_artifact(save_calibration_artifacts(calibration))
+
+            # Referencia de drift para el API (variables de train y scores calibrados de test)
+            mlflow.log_artifact(
+                save_drift_reference_artifacts(build_drift_reference(X_train, calibrated_test))
+            )
 
             # Rastrear cuál tiene el mejor AUC en test
             if auc > best_test_auc:
@@ -159,8 +194,7 @@ def train_model(model_name="xgboost"):
         else:
             mlflow.sklearn.log_model(best_model, "modelo_final")
 
-        json_path = save_feature_importance_artifacts(best_model, X.columns)
-        mlflow.log_artifact(json_path)
+        log_feature_importance_artifacts(best_model, X.columns, X_test, y_test)
 
         print(f"[{run_name}] F1: {f1:.4f} | AUC: {auc:.4f}")
 